@@ -0,0 +1,38 @@
+import pandas as pd
+
+import dataset
+
+FORMAT_LABELS = {"test": "Test", "odi": "ODI", "t20": "T20"}
+
+# Summed count and averaged rate columns compared between players, per style
+COMPARISON_COLUMNS = {
+    "batting": ("Runs", ["Average", "Strike Rate"]),
+    "bowling": ("Wickets", ["Economy Rate", "Average"]),
+}
+
+
+# Innings, runs and wickets per format for one player, with a total row
+def player_summary(player_batting, player_bowling):
+    batting_by_format = player_batting.groupby("Format", observed=True)[["Innings", "Runs"]].sum().reindex(dataset.FORMATS, fill_value=0)
+    bowling_by_format = player_bowling.groupby("Format", observed=True)[["Innings", "Wickets"]].sum().reindex(dataset.FORMATS, fill_value=0)
+    summary_table = pd.DataFrame({
+        "Format": [FORMAT_LABELS[fmt] for fmt in dataset.FORMATS],
+        "Batting Innings": batting_by_format["Innings"].values,
+        "Total Runs": batting_by_format["Runs"].values,
+        "Bowling Innings": bowling_by_format["Innings"].values,
+        "Total Wickets": bowling_by_format["Wickets"].values,
+    })
+    total_row = summary_table.drop(columns="Format").sum().to_frame().T.assign(Format="Total")
+    summary_table = pd.concat([summary_table, total_row], ignore_index=True)
+    return summary_table.astype({col: int for col in summary_table.columns if col != "Format"})
+
+
+# One pivot of format x year x metric with a column per player
+def comparison_pivot(rows, style):
+    metric, rate_columns = COMPARISON_COLUMNS[style]
+    return rows.astype({"Player Name": str, "Format": str}).pivot_table(
+        index=["Format", "Year"],
+        columns="Player Name",
+        values=[metric] + rate_columns,
+        aggfunc={metric: "sum", **{col: "mean" for col in rate_columns}},
+    )
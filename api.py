@@ -0,0 +1,517 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import changefeed
+import dataset
+import export
+import queries
+import rankings
+import team_selector
+import versioning
+
+logger = logging.getLogger("cricket.api")
+
+DEFAULT_PORT = 8000
+# Responses kept in memory and for how many seconds they stay fresh
+CACHE_SIZE = 512
+CACHE_TTL = 300
+# Best XI models kept warm for re-solving, one per format and year range
+TEAM_MODEL_CACHE_SIZE = 16
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Thread-safe LRU of encoded responses with a time-to-live per entry
+class ResponseCache:
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    # `scope` describes what the response depends on, for evict()
+    def put(self, key, value, scope=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Carry the entries over to a new dataset version. Keys start with the
+    # version's backend key; entries of `old` whose scope is not stale are
+    # keyed by `new`, every other entry is dropped. Returns how many were
+    # dropped.
+    def advance(self, old, new, stale):
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._entries.items() if key[0] == old and not stale(entry[2])]
+            dropped = len(self._entries) - len(entries)
+            self._entries = OrderedDict(((new,) + key[1:], entry) for key, entry in entries)
+        return dropped
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# Whether a response with this scope depends on anything in a change
+# summary (see changefeed.summarize). Scopes name the players, or the
+# formats and (start, end) years, a response was computed from.
+def _stale(scope, changes):
+    if scope is None:
+        return True
+    if "roster" in scope:
+        return changes["roster"]
+    if "players" in scope:
+        return bool(scope["players"] & changes["players"])
+    start, end = scope["years"]
+    formats = scope.get("formats")
+    return any(start <= year <= end and (formats is None or format_type in formats) for format_type, year in changes["cells"])
+
+
+# DataFrame rows as plain dicts, NaN as null
+def _records(frame):
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def _param(params, name, default=None, cast=str):
+    values = params.get(name)
+    if not values or values[0] == "":
+        if default is None:
+            raise ApiError(400, f"missing query parameter '{name}'")
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise ApiError(400, f"invalid value for '{name}': {values[0]}")
+
+
+def _list_param(params, name, cast=str):
+    values = [item for value in params.get(name, []) for item in value.split(",") if item]
+    try:
+        return [cast(value) for value in values]
+    except ValueError:
+        raise ApiError(400, f"invalid value for '{name}'")
+
+
+# One dataset version as the API serves it: the backend and its years
+class Served:
+    def __init__(self, backend):
+        self.backend = backend
+        self.years = backend.years()
+
+
+# The analytics views as JSON endpoints over a query backend. Responses are
+# cached by dataset version, path and query string and carry an ETag of
+# their body. With a live dataset, a new version replaces the backend
+# between requests; when the change feed links the two versions only the
+# cached responses and Best XI models that depend on changed rows are
+# dropped, otherwise all of them. Each request is answered from the version
+# it started on, even if another one is swapped in meanwhile.
+class CricketApi:
+    def __init__(self, backend, cache=None, live=None):
+        self.cache = cache or ResponseCache()
+        self.live = live
+        self.served = None
+        self._models = OrderedDict()
+        self._models_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._use(backend)
+        self.routes = {
+            "/health": self.health,
+            "/players": self.players,
+            "/player": self.player,
+            "/leaderboard": self.leaderboard,
+            "/compare": self.compare,
+            "/best-xi": self.best_xi,
+        }
+
+    # Serve a new backend; called with the swap lock held once running
+    def _use(self, backend):
+        previous = self.served
+        served = Served(backend)
+        changes = None
+        if previous is not None and self.live is not None and served.years == previous.years:
+            records = changefeed.changes_between(self.live.data_file, previous.backend.version, backend.version)
+            if records is not None:
+                changes = changefeed.summarize(records)
+
+        def stale(scope):
+            return changes is None or _stale(scope, changes)
+
+        old = previous.backend.key if previous is not None else None
+        with self._models_lock:
+            self._models = OrderedDict(
+                ((backend.key,) + key[1:], model) for key, model in self._models.items()
+                if key[0] == old and not stale(self._model_scope(*key[1:]))
+            )
+        evicted = self.cache.advance(old, backend.key, stale)
+        self.served = served
+        if previous is not None:
+            logger.info(json.dumps({"dataset_version": backend.version, "evicted": evicted, "kept": len(self.cache)}))
+
+    # The version a request is answered from, after swapping in the live
+    # dataset's backend when a new version has loaded
+    def _serving(self):
+        with self._swap_lock:
+            if self.live is not None:
+                backend = self.live.get()[1]
+                if backend is not self.served.backend:
+                    self._use(backend)
+            return self.served
+
+    def _model_scope(self, format_type, start, end):
+        return {"formats": {format_type}, "years": (start, end)}
+
+    # What the response of a route depends on, for selective eviction
+    def _scope(self, served, handler, params):
+        if handler == self.players:
+            return {"roster": True}
+        if handler == self.compare:
+            return {"players": set(_list_param(params, "players"))}
+        if handler in (self.leaderboard, self.best_xi):
+            return {"formats": {self._format(params)}, "years": self._years(served, params)}
+        return {"years": self._years(served, params)}
+
+    def _years(self, served, params):
+        start = _param(params, "start", served.years[0], int)
+        end = _param(params, "end", served.years[-1], int)
+        if start > end:
+            raise ApiError(400, "start must not be after end")
+        return start, end
+
+    def _format(self, params):
+        format_type = _param(params, "format")
+        if format_type not in dataset.FORMATS:
+            raise ApiError(400, f"format must be one of {', '.join(dataset.FORMATS)}")
+        return format_type
+
+    def _team_model(self, served, format_type, start, end):
+        key = (served.backend.key, format_type, start, end)
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+        model = team_selector.TeamModel(team_selector.collect_player_data(
+            served.backend.format_rows("batting", format_type, start, end),
+            served.backend.format_rows("bowling", format_type, start, end),
+        ))
+        with self._models_lock:
+            # Not kept when another version was swapped in meanwhile
+            if self.served is not served:
+                return model
+            model = self._models.setdefault(key, model)
+            while len(self._models) > TEAM_MODEL_CACHE_SIZE:
+                self._models.popitem(last=False)
+        return model
+
+    def health(self, served, params):
+        return {"status": "ok", "backend": served.backend.key, "years": [served.years[0], served.years[-1]],
+                "cache": {"entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}}
+
+    # Player names matching a search, prefix matches first
+    def players(self, served, params):
+        query = params.get("q", [""])[0]
+        return {"players": served.backend.index.search(query, limit=_param(params, "limit", 20, int))}
+
+    # Per-format summary and peer ranks for one player over a year range
+    def player(self, served, params):
+        name = _param(params, "name")
+        if name not in served.backend.index:
+            raise ApiError(404, f"unknown player '{name}'")
+        start, end = self._years(served, params)
+        batting = served.backend.player_rows("batting", name, start, end)
+        bowling = served.backend.player_rows("bowling", name, start, end)
+        player_ids = pd.concat([batting["Player ID"], bowling["Player ID"]]).unique()
+        ranks = served.backend.ranks.player_ranks(int(player_ids[0]) if len(player_ids) else None, start, end)
+        return {
+            "player": name,
+            "start": start,
+            "end": end,
+            "summary": _records(analytics.player_summary(batting, bowling)),
+            "ranks": _records(ranks),
+        }
+
+    # Leaderboard for one metric, format and year range
+    def leaderboard(self, served, params):
+        metric = _param(params, "metric", "Runs")
+        if metric not in rankings.METRICS:
+            raise ApiError(400, f"metric must be one of {', '.join(rankings.METRICS)}")
+        format_type = self._format(params)
+        start, end = self._years(served, params)
+        board = served.backend.ranks.leaderboard(metric, format_type, start, end, _param(params, "limit", 10, int))
+        return {"metric": metric, "format": format_type, "start": start, "end": end, "leaderboard": _records(board)}
+
+    # Yearly totals and rates of several players side by side
+    def compare(self, served, params):
+        players = _list_param(params, "players")
+        unknown = [name for name in players if name not in served.backend.index]
+        if unknown:
+            raise ApiError(404, f"unknown players: {', '.join(unknown)}")
+        if len(players) < 2:
+            raise ApiError(400, "give at least two players")
+        style = _param(params, "style", "batting")
+        if style not in analytics.COMPARISON_COLUMNS:
+            raise ApiError(400, "style must be batting or bowling")
+        pivot = analytics.comparison_pivot(served.backend.players_rows(style, players), style)
+        rows = pivot.stack("Player Name").dropna(how="all").reset_index()
+        return {"style": style, "players": players, "rows": _records(rows)}
+
+    # Best XIs for a format and year range under optional constraints
+    def best_xi(self, served, params):
+        format_type = self._format(params)
+        start, end = self._years(served, params)
+        model = self._team_model(served, format_type, start, end)
+        teams = model.solve(
+            k=min(_param(params, "k", 1, int), 10),
+            locked=_list_param(params, "locked", int),
+            excluded=_list_param(params, "excluded", int),
+            min_allrounders=_param(params, "min_allrounders", 0, int),
+            keepers=_list_param(params, "keepers", int),
+        )
+        columns = ["Player ID", "Player Name", "Role", "Assigned_Role", "Bat_Points", "Bowl_Points", "Total_Points"]
+        return {
+            "format": format_type,
+            "start": start,
+            "end": end,
+            "teams": [{"points": float(team["Total_Points"].sum()), "players": _records(team[columns])} for team in teams],
+        }
+
+    # (content type, file name, byte chunks) of a streamed export. Exports
+    # are never cached; the parameters are checked before any chunk is made.
+    def export(self, path, query):
+        served = self._serving()
+        view = path.rstrip("/").rsplit("/", 1)[-1]
+        params = parse_qs(query)
+        file_type = _param(params, "type", "csv")
+        start, end = self._years(served, params)
+        if view == "history":
+            options = {"style": _param(params, "style", "batting"), "formats": _list_param(params, "formats") or None,
+                       "players": _list_param(params, "players") or None}
+        elif view == "leaderboard":
+            options = {"metric": _param(params, "metric", "Runs"), "format_type": self._format(params),
+                       "limit": _param(params, "limit", 0, int) or None}
+        elif view == "sweep":
+            options = {"format_type": self._format(params), "weights": {
+                name: _list_param(params, name, float) for name in team_selector.DEFAULT_WEIGHTS if name in params
+            }}
+        else:
+            raise ApiError(404, f"no export '{view}'; use one of {', '.join(export.EXPORTS)}")
+        try:
+            chunks = export.stream(export.open_export(served.backend, view, start=start, end=end, **options), file_type)
+        except ValueError as error:
+            raise ApiError(400, str(error))
+        return export.EXPORT_TYPES[file_type], f"{view}.{file_type}", chunks
+
+    # (etag, body) for a request, from the cache when fresh
+    def respond(self, path, query):
+        handler = self.routes.get(path.rstrip("/") or "/health")
+        if handler is None:
+            raise ApiError(404, f"no endpoint {path}")
+        served = self._serving()
+        params = parse_qs(query)
+        key = (served.backend.key, path, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+        cached = None if handler == self.health else self.cache.get(key)
+        if cached is not None:
+            return cached
+        body = json.dumps(handler(served, params), default=_json_default).encode("utf-8")
+        response = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        if handler != self.health:
+            self.cache.put(key, response, self._scope(served, handler, params))
+        return response
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.startswith("/export/"):
+                self._stream(url)
+                return
+            started = time.perf_counter()
+            try:
+                etag, body = api.respond(url.path, url.query)
+            except ApiError as error:
+                self._send(error.status, json.dumps({"error": str(error)}).encode("utf-8"))
+                return
+            except Exception:
+                logger.exception("request failed: %s", self.path)
+                self._send(500, b'{"error": "internal error"}')
+                return
+
+            if etag in self.headers.get("If-None-Match", ""):
+                self._send(304, b"", etag)
+            else:
+                self._send(200, body, etag)
+            logger.info(json.dumps({"path": url.path, "ms": round((time.perf_counter() - started) * 1000, 2)}))
+
+        # Export written with chunked transfer encoding as it is produced. The
+        # first chunk is made before the headers, so most failures still get
+        # an error status; a later one drops the connection mid-body.
+        def _stream(self, url):
+            started = time.perf_counter()
+            try:
+                content_type, file_name, chunks = api.export(url.path, url.query)
+                first = next(chunks, b"")
+            except ApiError as error:
+                self._send(error.status, json.dumps({"error": str(error)}).encode("utf-8"))
+                return
+            except Exception:
+                logger.exception("export failed: %s", self.path)
+                self._send(500, b'{"error": "internal error"}')
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            written = 0
+            try:
+                for data in itertools.chain([first], chunks):
+                    if data:
+                        self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+                        written += len(data)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+                return
+            except Exception:
+                logger.exception("export failed mid-stream: %s", self.path)
+                self.close_connection = True
+                return
+            logger.info(json.dumps({"path": url.path, "bytes": written, "ms": round((time.perf_counter() - started) * 1000, 2)}))
+
+        def _send(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"max-age={api.cache.ttl}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def open_api(backend_name=None, data_file=None):
+    data_file = data_file or dataset.default_data_file()
+    backend_name = backend_name or os.environ.get("CRICKET_BACKEND", "memory")
+    live = versioning.LiveDataset(
+        data_file,
+        lambda version: queries.open_backend(backend_name, data_file, version=version),
+        lambda backend, version: queries.update_backend(backend, data_file, version),
+        lambda backend, version: queries.backend_stale(backend, data_file, version),
+    )
+    return CricketApi(live.get()[1], live=live)
+
+
+def serve(port=DEFAULT_PORT, backend_name=None):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(open_api(backend_name)))
+    print(f"Cricket API listening on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Fire `requests` GETs at the given URLs from `concurrency` threads and
+# report throughput and latency percentiles
+def load_test(urls, requests=500, concurrency=16):
+    def fetch(i):
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(urls[i % len(urls)])) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(status >= 400 for _, status in results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{requests} requests, {concurrency} concurrent: {requests / elapsed:.0f} req/s, "
+          f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cricket analytics JSON API")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "loadtest"])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backend", choices=["memory", "sqlite", "duckdb"])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "serve":
+        serve(args.port, args.backend)
+    else:
+        base = f"http://127.0.0.1:{args.port}"
+        load_test([
+            f"{base}/players?q=sha",
+            f"{base}/player?name=V%20Kohli",
+            f"{base}/leaderboard?metric=Runs&format=odi&start=2015&end=2020&limit=20",
+            f"{base}/compare?players=V%20Kohli,RG%20Sharma&style=batting",
+            f"{base}/best-xi?format=t20&k=3",
+        ], args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,267 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import json
-import plotly.express as px
-
-
-# Load the cricket data JSON file with caching
-@st.cache_data
-def load_data(json_file):
-    with open(json_file, 'r') as f:
-        return json.load(f)
-
-# Convert JSON data to a DataFrame with caching
-@st.cache_data
-def json_to_dataframe(data):
-    records = []
-    for format_type, styles in data.items():
-        for style, years in styles.items():
-            for year, stats in years.items():
-                for record in stats:
-                    record['Format'] = format_type
-                    record['Style'] = style
-                    records.append(record)
-    return pd.DataFrame(records)
+import logging
+import os
+
+import analytics
+import charts
+import dataset
+import export
+import form
+import instrumentation
+import queries
+import rankings
+import ratings
+import refresh
+import similarity
+import simulation
+import team_selector
+import versioning
+from instrumentation import stage
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+# Players shown side by side in Player Comparison
+MAX_COMPARISON_PLAYERS = 8
+
+# Neighbours precomputed per player for the Similar Players view
+NEIGHBOUR_TABLE_SIZE = 20
+
+# Ranked XIs offered by the Optimal Team Selector
+MAX_ALTERNATIVE_XIS = 5
+
+# Values offered per scoring weight in the sensitivity sweep
+SWEEP_OPTIONS = {
+    "runs": ("Points per Run", [0.5, 1, 1.5, 2]),
+    "fours": ("Points per Four", [0, 1, 2]),
+    "sixes": ("Points per Six", [1, 2, 3, 4]),
+    "duck_penalty": ("Penalty per Duck", [0, 2, 4, 6]),
+    "wickets": ("Points per Wicket", [15, 20, 25, 30, 35]),
+    "economy": ("Economy Bonus Scale", [0, 0.5, 1, 2]),
+    "roles": ("Role Threshold Scale", [0.75, 1, 1.25]),
+}
+MAX_SWEEP_CONFIGS = 500
+
+# Simulated seasons offered for the Optimal XI strength simulation
+SIMULATION_SIZES = [1000, 5000, 10000, 20000, 50000]
+SIMULATION_SEED = 42
+SIMULATION_BINS = 40
+# Worker processes for large simulations (1 runs in-process)
+SIMULATION_WORKERS = int(os.environ.get("CRICKET_SIM_WORKERS", "1"))
+
+# Entries kept by the cached loaders. Their keys carry the dataset version,
+# so the entries of replaced versions age out instead of piling up.
+PLAYER_CACHE_ENTRIES = 256
+VIEW_CACHE_ENTRIES = 16
+# Best XI models kept warm, one per backend version, format and year range
+TEAM_MODEL_CACHE_SIZE = 16
+
+# CRICKET_ADMIN=1 shows the Data Refresh control in the sidebar
+ADMIN = os.environ.get("CRICKET_ADMIN") == "1"
+# Seconds between refresh job status updates in the sidebar
+REFRESH_POLL_SECONDS = 2
+
+
+# Dataset shared by all sessions. A new version written by convert.py is
+# warmed in the background, by applying its change feed to the current
+# tables when possible, and swapped in without a restart; a version first
+# opened without its mapped arrays is opened again once they are written.
+# The backend key carries the version, so only caches keyed on it are
+# invalidated.
+@st.cache_resource
+def get_live_dataset(backend_name, data_file):
+    instrumentation.mark_miss("get_live_dataset")
+    return versioning.LiveDataset(
+        data_file,
+        lambda version: queries.open_backend(backend_name, data_file, version=version),
+        lambda backend, version: queries.update_backend(backend, data_file, version),
+        lambda backend, version: queries.backend_stale(backend, data_file, version),
+    )
 
 # Filter player data with caching
-@st.cache_data
-def filter_player_data(df, selected_player, start_year, end_year):
-    return df[(df["Player Name"] == selected_player) & (df["Year"].between(int(start_year), int(end_year)))]
+@st.cache_data(max_entries=PLAYER_CACHE_ENTRIES)
+def filter_player_data(_backend, backend_key, style, selected_player, start_year, end_year):
+    instrumentation.mark_miss("filter_player_data")
+    return _backend.player_rows(style, selected_player, start_year, end_year)
+
+# Number of plotted points in a trace (pie traces carry values instead of x)
+def trace_points(trace):
+    values = getattr(trace, "x", None)
+    if values is None:
+        values = getattr(trace, "values", None)
+    return len(values) if values is not None else 0
+
+# Render a Plotly figure, timing its serialization as its own stage; the
+# template is cut down to the trace types the figure draws first
+def show_chart(fig, **kwargs):
+    points = sum(trace_points(trace) for trace in fig.data)
+    with stage("plotly_chart", rows=points):
+        st.plotly_chart(charts.slim(fig), **kwargs)
+
+# Start and end year pickers over the years in the dataset, shared by the
+# views through session state. The range defaults to every year, and a
+# selection no longer in the dataset falls back to that default.
+def select_year_range(backend):
+    years = [str(y) for y in backend.years()]
+    if st.session_state.get("start_year") not in years:
+        st.session_state["start_year"] = years[0]
+    if st.session_state.get("end_year") not in years:
+        st.session_state["end_year"] = years[-1]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        valid_start_years = [y for y in years if int(y) <= int(st.session_state["end_year"])]
+        start_year_index = valid_start_years.index(st.session_state["start_year"]) if st.session_state["start_year"] in valid_start_years else 0
+        start_year = st.selectbox("Start Year", valid_start_years, index=start_year_index, key="start_year")
+
+    with col2:
+        valid_end_years = [y for y in years if int(y) >= int(st.session_state["start_year"])]
+        end_year_index = valid_end_years.index(st.session_state["end_year"]) if st.session_state["end_year"] in valid_end_years else len(valid_end_years) - 1
+        end_year = st.selectbox("End Year", valid_end_years, index=end_year_index, key="end_year")
+    return start_year, end_year
+
+# Sidebar panel listing the timed stages of the current run
+def render_debug_panel():
+    records = instrumentation.get_records()
+    st.sidebar.markdown("### ⏱ Stage Timings")
+    if not records:
+        st.sidebar.write("No stages recorded")
+        return
+    timings = pd.DataFrame(records)[["stage", "duration_ms", "rows", "cache"]]
+    st.sidebar.dataframe(timings, hide_index=True)
+    st.sidebar.write(f"Total: {timings['duration_ms'].sum():.1f} ms")
+
+# Sidebar panel with bytes per column of the typed tables
+def render_memory_panel(batting, bowling):
+    st.sidebar.markdown("### 💾 Memory Usage")
+    for name, table in [("Batting", batting), ("Bowling", bowling)]:
+        report = dataset.memory_report(table)
+        st.sidebar.write(f"**{name}**: {len(table)} rows, {report['Bytes'].sum() / 1024:.1f} KiB")
+        st.sidebar.dataframe(report, hide_index=True)
+
+# Feature matrix and precomputed neighbour table for one format with caching
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def load_similarity(_backend, backend_key, format_type, min_innings, metric):
+    instrumentation.mark_miss("load_similarity")
+    years = _backend.years()
+    features = similarity.player_features(
+        _backend.format_rows("batting", format_type, years[0], years[-1]),
+        _backend.format_rows("bowling", format_type, years[0], years[-1]),
+    )
+    player_ids, matrix = similarity.feature_matrix(features, min_innings)
+    table = similarity.neighbour_table(matrix, NEIGHBOUR_TABLE_SIZE, metric)
+    return features, player_ids, matrix, table
+
+# Rolling N-year form for every player and format with caching
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def load_rolling_form(_backend, backend_key, window):
+    instrumentation.mark_miss("load_rolling_form")
+    return form.rolling_form(_backend.all_rows("batting"), _backend.all_rows("bowling"), window)
+
+# Best XI model per format and year range, shared by all sessions and
+# re-solved in place as the selection constraints change
+@st.cache_resource(max_entries=TEAM_MODEL_CACHE_SIZE)
+def get_team_model(_backend, backend_key, format_type, start_year, end_year):
+    instrumentation.mark_miss("get_team_model")
+    with stage("query:format_rows"):
+        batting_rows = _backend.format_rows("batting", format_type, start_year, end_year)
+        bowling_rows = _backend.format_rows("bowling", format_type, start_year, end_year)
+    return team_selector.TeamModel(team_selector.collect_player_data(batting_rows, bowling_rows))
+
+# Best XI selection frequency over a grid of scoring weights with caching
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def load_weight_sweep(_backend, backend_key, format_type, start_year, end_year, weights):
+    instrumentation.mark_miss("load_weight_sweep")
+    components, year_count = team_selector.player_components(
+        _backend.format_rows("batting", format_type, start_year, end_year),
+        _backend.format_rows("bowling", format_type, start_year, end_year),
+    )
+    grid = team_selector.weight_grid(**dict(weights))
+    return team_selector.selection_frequency(components, team_selector.weight_sweep(components, year_count, grid))
+
+# Simulated seasons for an XI from its players' yearly points with caching;
+# the fixed seed keeps the result stable across reruns
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def load_simulation(_backend, backend_key, format_type, start_year, end_year, player_ids, n_sims):
+    instrumentation.mark_miss("load_simulation")
+    yearly_points = team_selector.yearly_player_points(
+        _backend.format_rows("batting", format_type, start_year, end_year),
+        _backend.format_rows("bowling", format_type, start_year, end_year),
+    )
+    return simulation.simulate_xi(yearly_points, list(player_ids), n_sims, SIMULATION_SEED, SIMULATION_WORKERS)
+
+# Modification time of the rating history, so a rewritten file is reloaded
+def rating_file_version():
+    return os.path.getmtime(ratings.HISTORY_FILE) if os.path.exists(ratings.HISTORY_FILE) else None
+
+# Rating history written by convert.py, or computed here if it is missing
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def load_ratings(_backend, backend_key, history_file, modified):
+    instrumentation.mark_miss("load_ratings")
+    history = ratings.load_history(history_file)
+    if history.empty:
+        history, _ = ratings.refresh_history(history, _backend.all_rows("batting"), _backend.all_rows("bowling"))
+    return history
+
+# Queue a refresh of the selected partitions. Only a job file is written and
+# the worker process started here; the scrape runs in that process while
+# every session keeps being served from the current version.
+def render_refresh_panel():
+    with st.sidebar.expander("🔄 Data Refresh"):
+        years = refresh.years()[::-1]
+        formats = st.multiselect("Formats", dataset.FORMATS, default=dataset.FORMATS)
+        styles = st.multiselect("Styles", dataset.STYLES, default=dataset.STYLES)
+        selected_years = st.multiselect("Years", years, default=years[:2])
+        strict = st.checkbox("Skip partitions that fail validation", value=True)
+        if st.button("Queue Refresh", disabled=not (formats and styles and selected_years)):
+            job = refresh.enqueue(refresh.partition_keys(formats, styles, selected_years), strict)
+            refresh.start_worker()
+            st.toast(f"Queued refresh of {len(job['partitions'])} partitions")
+        render_refresh_status()
+
+
+@st.fragment(run_every=REFRESH_POLL_SECONDS)
+def render_refresh_status():
+    jobs = refresh.list_jobs()[:refresh.JOBS_SHOWN]
+    if not jobs:
+        st.caption("No refresh jobs")
+    for job in jobs:
+        label = f"{job['status'].title()}: {job['checked']}/{job['total']} checked, {len(job['published'])} published"
+        if job["status"] in ("queued", "running"):
+            st.progress(job["checked"] / max(job["total"], 1), text=label)
+            st.caption(job["message"])
+        else:
+            version = f" (version {job['version']})" if job.get("version") else ""
+            st.caption(f"{job['id']} {label}{version}")
+
+
+# Download button for an export of a view. The file is encoded chunk by
+# chunk only when the button is clicked, on a thread apart from the script.
+def render_export(backend, view, label, file_name, file_type, **params):
+    st.download_button(
+        f"📥 {label}",
+        data=lambda: export.export_bytes(backend, view, file_type, **params),
+        file_name=f"{file_name}.{file_type}",
+        mime=export.EXPORT_TYPES[file_type],
+        key=f"export_{file_name}",
+        on_click="ignore",
+    )
+
+
+# Autocomplete options for a player search box, falling back to the full roster
+def search_players(index, query, exclude=()):
+    with stage("player_search", rows=len(index)) as record:
+        matches = index.search(query, exclude=exclude)
+        if not matches:
+            st.caption(f"No players match '{query}'")
+            matches = index.search("", exclude=exclude)
+        record["rows"] = len(matches)
+    return matches
 
 # Main Streamlit app
 def main():
+    instrumentation.reset()
     # Apply custom CSS
     st.markdown(
         """
@@ -50,97 +281,47 @@ def main():
     st.sidebar.header("Filters")
 
     # Load data
-    data_file = "cricket_data.json"
-    cricket_data = load_data(data_file)
-    df = json_to_dataframe(cricket_data)
-
-    # Preprocessing
-    numeric_columns = ["Matches", "Innings", "Runs", "Wickets", "Average", "Strike Rate", "Overs", "4s", "6s", "Economy Rate"]
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    data_file = dataset.default_data_file()
+    with stage("get_live_dataset", cached=True):
+        live_dataset = get_live_dataset(os.environ.get("CRICKET_BACKEND", "memory"), data_file)
+        data_version, backend = live_dataset.get()
 
     # Filtering options
     filter_type = st.sidebar.selectbox(
     "🔍 Select Filter Type", 
-    ["Player Wise", "Format Wise", "Year Wise", "Player Comparison", "Optimal Team Selector"]
+    ["Player Wise", "Format Wise", "Year Wise", "Player Comparison", "Similar Players", "Optimal Team Selector"]
 )
+    show_debug_panel = st.sidebar.checkbox("Show Performance Panel", value=False)
+    export_type = st.sidebar.selectbox("📥 Export As", export.available_types())
+    st.sidebar.caption(f"Dataset version {data_version}" + (" (newer version loading)" if live_dataset.loading else ""))
+    if ADMIN:
+        render_refresh_panel()
 
    
     
     if filter_type == "Player Wise":
-            player_names = sorted(df["Player Name"].unique())
+            player_names = search_players(backend.index, st.sidebar.text_input("Search Player"))
             selected_player = st.sidebar.selectbox("Select Player", player_names)
             st.header(f"📊 Player Wise Analysis of {selected_player}")
 
             # Year range selection with dynamic constraints
             st.subheader("Filter by Year Range")
-            col1, col2 = st.columns(2)
-
-            years = [str(y) for y in range(2011, 2026)]
-            if "start_year" not in st.session_state:
-                st.session_state["start_year"] = "2011"
-            if "end_year" not in st.session_state:
-                st.session_state["end_year"] = "2025"
+            start_year, end_year = select_year_range(backend)
 
-            with col1:
-                valid_start_years = [y for y in years if int(y) <= int(st.session_state.get("end_year", "2025"))]
-                start_year_index = valid_start_years.index(st.session_state["start_year"]) if st.session_state["start_year"] in valid_start_years else 0
-                start_year = st.selectbox("Start Year", valid_start_years, index=start_year_index, key="start_year")
-
-            with col2:
-                valid_end_years = [y for y in years if int(y) >= int(st.session_state.get("start_year", "2011"))]
-                end_year_index = valid_end_years.index(st.session_state["end_year"]) if st.session_state["end_year"] in valid_end_years else len(valid_end_years) - 1
-                end_year = st.selectbox("End Year", valid_end_years, index=end_year_index, key="end_year")
+            # Filter data for the selected player and year range
+            with stage("filter_player_data", cached=True) as record:
+                player_batting = filter_player_data(backend, backend.key, "batting", selected_player, st.session_state["start_year"], st.session_state["end_year"])
+                player_bowling = filter_player_data(backend, backend.key, "bowling", selected_player, st.session_state["start_year"], st.session_state["end_year"])
+                record["rows"] = len(player_batting) + len(player_bowling)
 
-            # Convert 'Year' column to numeric and handle errors gracefully
-            df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
+            # Fill only numeric columns
+            for player_table in (player_batting, player_bowling):
+                numeric_cols = player_table.select_dtypes(include=["number"]).columns
+                player_table[numeric_cols] = player_table[numeric_cols].fillna(0)
 
-            # Filter data for the selected player and year range
-            player_data = filter_player_data(df, selected_player, st.session_state["start_year"], st.session_state["end_year"])
             # Combined Table (Summary)
             st.markdown("### Player Summary (Combined)")
-            summary_table = pd.DataFrame({
-                "Format": ["Test", "ODI", "T20"],
-                "Batting Innings": [
-                    player_data[(player_data["Format"] == "test") & (player_data["Style"] == "batting")]["Innings"].sum(),
-                    player_data[(player_data["Format"] == "odi") & (player_data["Style"] == "batting")]["Innings"].sum(),
-                    player_data[(player_data["Format"] == "t20") & (player_data["Style"] == "batting")]["Innings"].sum(),
-                ],
-                "Total Runs": [
-                    player_data[(player_data["Format"] == "test") & (player_data["Style"] == "batting")]["Runs"].sum(),
-                    player_data[(player_data["Format"] == "odi") & (player_data["Style"] == "batting")]["Runs"].sum(),
-                    player_data[(player_data["Format"] == "t20") & (player_data["Style"] == "batting")]["Runs"].sum(),
-                ],
-                "Bowling Innings": [
-                    player_data[(player_data["Format"] == "test") & (player_data["Style"] == "bowling")]["Innings"].sum(),
-                    player_data[(player_data["Format"] == "odi") & (player_data["Style"] == "bowling")]["Innings"].sum(),
-                    player_data[(player_data["Format"] == "t20") & (player_data["Style"] == "bowling")]["Innings"].sum(),
-                ],
-                "Total Wickets": [
-                    player_data[(player_data["Format"] == "test") & (player_data["Style"] == "bowling")]["Wickets"].sum(),
-                    player_data[(player_data["Format"] == "odi") & (player_data["Style"] == "bowling")]["Wickets"].sum(),
-                    player_data[(player_data["Format"] == "t20") & (player_data["Style"] == "bowling")]["Wickets"].sum(),
-                ],
-            })
-
-            # Add a row for totals
-            total_row = pd.DataFrame({
-                "Format": ["Total"],
-                "Batting Innings": [summary_table["Batting Innings"].sum()],
-                "Total Runs": [summary_table["Total Runs"].sum()],
-                "Bowling Innings": [summary_table["Bowling Innings"].sum()],
-                "Total Wickets": [summary_table["Total Wickets"].sum()],
-            })
-
-            # Concatenate the total row to the summary table
-            summary_table = pd.concat([summary_table, total_row], ignore_index=True)
-
-            # Convert columns to integer type
-            summary_table["Batting Innings"] = summary_table["Batting Innings"].astype(int)
-            summary_table["Total Runs"] = summary_table["Total Runs"].astype(int)
-            summary_table["Bowling Innings"] = summary_table["Bowling Innings"].astype(int)
-            summary_table["Total Wickets"] = summary_table["Total Wickets"].astype(int)
+            summary_table = analytics.player_summary(player_batting, player_bowling)
 
             # Display the table
             st.table(summary_table.set_index("Format").style.set_properties(**{
@@ -154,36 +335,17 @@ def main():
             st.markdown("## 🏏 Batting Performance")
             st.markdown("### Batting Summary (Detailed)")
 
-            # Convert numeric columns safely
-            player_data["Runs"] = pd.to_numeric(player_data["Runs"], errors="coerce")
-            player_data["Balls Faced"] = pd.to_numeric(player_data["Balls Faced"], errors="coerce")
-            player_data["Innings"] = pd.to_numeric(player_data["Innings"], errors="coerce")
-            player_data["4s"] = pd.to_numeric(player_data["4s"], errors="coerce")
-            player_data["6s"] = pd.to_numeric(player_data["6s"], errors="coerce")
-            player_data["Not Outs"] = pd.to_numeric(player_data["Not Outs"], errors="coerce")
-
-            # Fill only numeric columns
-            numeric_cols = player_data.select_dtypes(include=["number"]).columns
-            player_data[numeric_cols] = player_data[numeric_cols].fillna(0)
-
-            # Convert to int
-            player_data["Innings"] = player_data["Innings"].astype(int)
-            player_data["Runs"] = player_data["Runs"].astype(int)
-            player_data["Balls Faced"] = player_data["Balls Faced"].astype(int)
-            player_data["4s"] = player_data["4s"].astype(int)
-            player_data["6s"] = player_data["6s"].astype(int)
-            player_data["Not Outs"] = player_data["Not Outs"].astype(int)
-
             # Aggregate batting data
-            batting_table = player_data[player_data["Style"] == "batting"].groupby("Format").agg({
-                "Innings": "sum",
-                "Runs": "sum",
-                "4s": "sum",
-                "6s": "sum",
-                "Balls Faced": "sum",
-                "Average": "mean",
-                "Not Outs": "sum"
-            }).reset_index()
+            with stage("groupby:batting_summary", rows=len(player_batting)):
+                batting_table = player_batting.groupby("Format", observed=True).agg({
+                    "Innings": "sum",
+                    "Runs": "sum",
+                    "4s": "sum",
+                    "6s": "sum",
+                    "Balls Faced": "sum",
+                    "Average": "mean",
+                    "Not Outs": "sum"
+                }).reset_index()
 
             # Check if table has data
             if batting_table.empty:
@@ -221,7 +383,7 @@ def main():
                 }))
 
             # Calculate Batting Average Over the Years
-            batting_yearly = player_data[player_data["Style"] == "batting"].groupby("Year").agg({
+            batting_yearly = player_batting.groupby("Year").agg({
                 "Runs": "sum",
                 "Innings": "sum",
                 "Not Outs": "sum"
@@ -233,38 +395,39 @@ def main():
             # Batting Average Bar Graph
             if not batting_yearly.empty:
                 st.markdown("### Batting Average Over the Years")
-                fig_batting_avg = px.bar(
+                fig_batting_avg = charts.bar(
                     batting_yearly,
                     x="Year",
                     y="Average",
+                    agg=None,
                     title=f"Mean Batting Average Over Years for {selected_player}",
                     labels={"Average": "Batting Average", "Year": "Year"},
-                    text_auto=".2f"
+                    text_format=".2f"
                 )
                 fig_batting_avg.update_layout(
                     yaxis=dict(title="Batting Average"),
                     xaxis=dict(title="Year"),
                     title=dict(x=0.5),
                 )
-                st.plotly_chart(fig_batting_avg, use_container_width=True)
+                show_chart(fig_batting_avg, use_container_width=True)
             else:
                 st.markdown("### No Batting Data Available for Mean Batting Average")
 
             # Batting Performance Chart
             st.subheader(f"Batting Performance of {selected_player}")
-            batting_data = player_data[player_data["Style"] == "batting"].copy()
+            batting_data = player_batting.copy()
 
             # Check if batting data exists for plotting
             if batting_data.empty:
                 st.markdown("### NO DATA")
             else:
                 # Plot the batting averages over years
-                fig_batting = px.line(
+                fig_batting = charts.line(
                     batting_data,
                     x="Year",
                     y="Average",
                     color="Format",
-                    markers=True,
+                    agg="mean",
                     title="Batting Averages Over Years"
                 )
 
@@ -274,22 +437,20 @@ def main():
                 fig_batting.update_yaxes(rangemode="tozero")  # Set y-axis range to zero
 
                 # Display the chart
-                st.plotly_chart(fig_batting)
+                show_chart(fig_batting)
 
                 # Line plot for 4s and 6s
                 st.markdown("### 4s and 6s Over Years")
                 plot_option = st.radio("Select Metric", ["4s", "6s"], horizontal=True)
-                chart_data = player_data.groupby(["Year", "Format"])[plot_option].sum().reset_index()
 
-                if chart_data.empty:
+                if player_batting.empty:
                     st.markdown("### NO DATA")
                 else:
-                    fig_4s_6s = px.line(
-                        chart_data,
+                    fig_4s_6s = charts.line(
+                        player_batting,
                         x="Year",
                         y=plot_option,
                         color="Format",
-                        markers=True,
                         title=f"{plot_option} Over Years",
                     )
 
@@ -298,39 +459,22 @@ def main():
                     fig_4s_6s.update_yaxes(rangemode="tozero")  # Set y-axis range to zero       
 
                     # Display the chart
-                    st.plotly_chart(fig_4s_6s)
+                    show_chart(fig_4s_6s)
 
             st.markdown("## 🎯 Bowling Performance")
             st.markdown("### Bowling Summary (Detailed)")
             
             # Filter bowling data
-            bowling_data = player_data[player_data["Style"] == "bowling"].copy()
-            
-            # Convert numeric columns
-            numeric_cols = ["Innings", "Wickets", "Average", "Economy Rate"]
-            
-            for col in numeric_cols:
-                if col in bowling_data.columns:
-                    bowling_data[col] = (
-                        bowling_data[col]
-                        .replace("-", pd.NA)
-                        .pipe(pd.to_numeric, errors="coerce")
-                    )
-            
-            # Fill missing numeric values
-            bowling_data[numeric_cols] = bowling_data[numeric_cols].fillna(0)
-            
+            bowling_data = player_bowling.copy()
+
             # Aggregate
-            bowling_table = bowling_data.groupby("Format", as_index=False).agg({
-                "Innings": "sum",
-                "Wickets": "sum",
-                "Average": "mean",
-                "Economy Rate": "mean"
-            })
-            
-            # Ensure aggregated columns are numeric
-            for col in ["Innings", "Wickets", "Average", "Economy Rate"]:
-                bowling_table[col] = pd.to_numeric(bowling_table[col], errors="coerce").fillna(0)
+            with stage("groupby:bowling_summary", rows=len(bowling_data)):
+                bowling_table = bowling_data.groupby("Format", as_index=False, observed=True).agg({
+                    "Innings": "sum",
+                    "Wickets": "sum",
+                    "Average": "mean",
+                    "Economy Rate": "mean"
+                })
             
             # Handle "NO DATA" for bowling summary table
             if bowling_table.empty:
@@ -361,21 +505,18 @@ def main():
             st.markdown("### Bowling Economy Rate Over Years")
 
             # Filter for relevant bowling data
-            bowling_economy_data = player_data[(player_data["Style"] == "bowling") & (player_data["Economy Rate"] > 0)]
+            bowling_economy_data = player_bowling[player_bowling["Economy Rate"] > 0]
 
             if bowling_economy_data.empty:
                 st.markdown("### NO DATA")
             else:
-                # Group by Year and Format for average Economy Rate
-                economy_rate_chart_data = bowling_economy_data.groupby(["Year", "Format"])["Economy Rate"].mean().reset_index()
-
-                # Create the line plot
-                fig_bowling = px.line(
-                    economy_rate_chart_data,
+                # Average Economy Rate per Year and Format, aggregated for the chart
+                fig_bowling = charts.line(
+                    bowling_economy_data,
                     x="Year",
                     y="Economy Rate",
                     color="Format",
-                    markers=True,
+                    agg="mean",
                     title="Bowling Economy Rate Over Years"
                 )
 
@@ -384,10 +525,10 @@ def main():
                 fig_bowling.update_yaxes(rangemode="tozero")  # Set y-axis range to zero       
 
                 # Display the chart
-                st.plotly_chart(fig_bowling)
+                show_chart(fig_bowling)
 
             # Calculate Bowling Average Over the Years
-            bowling_yearly = player_data[player_data["Style"] == "bowling"].groupby("Year").agg({
+            bowling_yearly = player_bowling.groupby("Year").agg({
                 "Wickets": "sum",
                 "Runs": "sum"  # Assuming this column represents "Runs Conceded"
             }).reset_index()
@@ -398,36 +539,35 @@ def main():
             # Bowling Average Bar Graph
             if not bowling_yearly.empty:
                 st.markdown("### Bowling Average Over the Years")
-                fig_bowling_avg = px.bar(
+                fig_bowling_avg = charts.bar(
                     bowling_yearly,
                     x="Year",
                     y="Average",
+                    agg=None,
                     title=f"Mean Bowling Average Over Years for {selected_player}",
                     labels={"Average": "Bowling Average", "Year": "Year"},
-                    text_auto=".2f"
+                    text_format=".2f"
                 )
                 fig_bowling_avg.update_layout(
                     yaxis=dict(title="Bowling Average"),
                     xaxis=dict(title="Year"),
                     title=dict(x=0.5),
                 )
-                st.plotly_chart(fig_bowling_avg, use_container_width=True)
+                show_chart(fig_bowling_avg, use_container_width=True)
             else:
                 st.markdown("### No Bowling Data Available for Mean Bowling Average")
 
             # Wickets Over Years
             st.markdown("### Wickets Over Years")
-            wickets_chart_data = player_data.groupby(["Year", "Format"])["Wickets"].sum().reset_index()
 
-            if wickets_chart_data.empty:
+            if player_bowling.empty:
                 st.markdown("### NO DATA")
             else:
-                fig_wickets = px.line(
-                    wickets_chart_data,
+                fig_wickets = charts.line(
+                    player_bowling,
                     x="Year",
                     y="Wickets",
                     color="Format",
-                    markers=True,
                     title="Wickets Over Years"
                 )
 
@@ -436,33 +576,90 @@ def main():
                 fig_wickets.update_yaxes(rangemode="tozero")  # Set y-axis range to zero       
 
                 # Display the chart
-                st.plotly_chart(fig_wickets)
+                show_chart(fig_wickets)
+
+            # Rolling Form Over Sliding Year Windows
+            st.markdown("## 📈 Rolling Form")
+            col1, col2 = st.columns(2)
+            with col1:
+                window = st.slider("Window (Years)", 1, 5, 3)
+            with col2:
+                form_metric = st.selectbox("Form Metric", ["Runs", "Average", "Strike Rate", "Wickets", "Economy Rate", "Bowling Average"])
+
+            with stage("load_rolling_form", cached=True) as record:
+                rolling = load_rolling_form(backend, backend.key, window)
+                record["rows"] = len(rolling)
+            player_ids = pd.concat([player_batting["Player ID"], player_bowling["Player ID"]]).unique()
+            player_form = rolling[
+                rolling["Player ID"].isin(player_ids)
+                & rolling["Year"].between(int(st.session_state["start_year"]), int(st.session_state["end_year"]))
+            ].dropna(subset=[form_metric])
+
+            if player_form.empty:
+                st.markdown("### NO DATA")
+            else:
+                fig_form = charts.line(
+                    player_form,
+                    x="Year",
+                    y=form_metric,
+                    color="Format",
+                    agg="mean",
+                    title=f"{form_metric} Over Rolling {window}-Year Windows",
+                )
+                fig_form.update_yaxes(rangemode="tozero")
+                show_chart(fig_form)
+
+            # Batting and Bowling Ratings History
+            st.markdown("## ⭐ Ratings")
+            with stage("load_ratings", cached=True):
+                rating_history = load_ratings(backend, backend.key, ratings.HISTORY_FILE, rating_file_version())
+            player_ratings = rating_history[
+                rating_history["Player ID"].isin(player_ids)
+                & rating_history["Year"].between(int(st.session_state["start_year"]), int(st.session_state["end_year"]))
+            ]
+            if player_ratings.empty:
+                st.markdown("### NO DATA")
+            else:
+                rating_type = st.radio("Rating", ["Batting Rating", "Bowling Rating"], horizontal=True)
+                fig_ratings = charts.line(
+                    player_ratings,
+                    x="Year",
+                    y=rating_type,
+                    color="Format",
+                    agg="mean",
+                    title=f"{rating_type} Over Years (100 = format average)",
+                )
+                fig_ratings.update_yaxes(rangemode="tozero")
+                show_chart(fig_ratings)
+
+            # Standing among all players in the same format and year range
+            st.markdown("## 🏅 Rank Among Peers")
+            with stage("rank_lookup", rows=len(backend.ranks)):
+                peer_ranks = backend.ranks.player_ranks(
+                    int(player_ids[0]) if len(player_ids) else None, st.session_state["start_year"], st.session_state["end_year"]
+                )
+            if peer_ranks.empty:
+                st.markdown("### NO DATA")
+            else:
+                st.dataframe(
+                    peer_ranks.style.format({"Value": "{:.2f}", "Percentile": "{:.0f}"}),
+                    hide_index=True,
+                )
+
+            col1, col2 = st.columns(2)
+            for col, style in zip((col1, col2), dataset.STYLES):
+                with col:
+                    render_export(backend, "history", f"Export {style.title()} History", f"{selected_player}_{style}", export_type,
+                                  style=style, players=[selected_player], start=st.session_state["start_year"], end=st.session_state["end_year"])
 
     elif filter_type == "Format Wise":
             st.header("📊 Format Wise Analysis")
             formats = ["test", "odi", "t20"]
 
-            # Years Selection Logic
-            years = [str(y) for y in range(2011, 2026)]
-            if "start_year" not in st.session_state:
-                st.session_state["start_year"] = "2011"
-            if "end_year" not in st.session_state:
-                st.session_state["end_year"] = "2025"
-
-            col1, col2 = st.columns(2)
-            with col1:
-                valid_start_years = [y for y in years if int(y) <= int(st.session_state.get("end_year", "2025"))]
-                start_year_index = valid_start_years.index(st.session_state["start_year"]) if st.session_state["start_year"] in valid_start_years else 0
-                start_year = st.selectbox("Start Year", valid_start_years, index=start_year_index, key="start_year")
-
-            with col2:
-                valid_end_years = [y for y in years if int(y) >= int(st.session_state.get("start_year", "2011"))]
-                end_year_index = valid_end_years.index(st.session_state["end_year"]) if st.session_state["end_year"] in valid_end_years else len(valid_end_years) - 1
-                end_year = st.selectbox("End Year", valid_end_years, index=end_year_index, key="end_year")
+            start_year, end_year = select_year_range(backend)
 
-            # Filter data based on the selected year range
-            df["Year"] = pd.to_numeric(df["Year"], errors="coerce")  # Ensure 'Year' column is numeric
-            filtered_df = df[(df["Year"] >= int(start_year)) & (df["Year"] <= int(end_year))]
+            with stage("load_ratings", cached=True):
+                rating_history = load_ratings(backend, backend.key, ratings.HISTORY_FILE, rating_file_version())
 
             for format_type in formats:
                 st.subheader(f"{format_type.upper()} Format Analysis")
@@ -472,29 +669,48 @@ def main():
 
                 with col1:
                     st.write("**Top Batting Performers**")
-                    format_data = filtered_df[(filtered_df["Format"] == format_type) & (filtered_df["Style"] == "batting")]
-                    aggregated_data = format_data.groupby("Player Name", as_index=False).agg({"Runs": "sum", "Average": "mean"})
-                    top_performers = aggregated_data.nlargest(5, "Runs")[["Player Name", "Runs", "Average"]]
+                    with stage("view:top_batting"):
+                        top_performers = backend.views.top("batting", format_type, start_year, end_year)
                     top_performers["Runs"] = top_performers["Runs"].astype(int)
                     top_performers["Average"] = top_performers["Average"].round(2)
                     st.table(top_performers)
 
                 with col2:
                     st.write("**Top Bowling Performers**")
-                    bowling_data = filtered_df[(filtered_df["Format"] == format_type) & (filtered_df["Style"] == "bowling")]
-                    aggregated_bowling = bowling_data.groupby("Player Name", as_index=False).agg({"Wickets": "sum", "Average": "mean"})
-                    top_bowling_performers = aggregated_bowling.nlargest(5, "Wickets")[["Player Name", "Wickets", "Average"]]
+                    with stage("view:top_bowling"):
+                        top_bowling_performers = backend.views.top("bowling", format_type, start_year, end_year)
                     top_bowling_performers["Wickets"] = top_bowling_performers["Wickets"].astype(int)
                     top_bowling_performers["Average"] = top_bowling_performers["Average"].round(2)
                     st.table(top_bowling_performers)
 
+                with col1:
+                    st.write(f"**Top Rated Batters ({end_year})**")
+                    st.table(ratings.top_rated(rating_history, format_type, int(end_year), "Batting Rating"))
+
+                with col2:
+                    st.write(f"**Top Rated Bowlers ({end_year})**")
+                    st.table(ratings.top_rated(rating_history, format_type, int(end_year), "Bowling Rating"))
+
+            # Leaderboards of any length straight from the rank index
+            st.subheader("🏆 Leaderboards")
+            col1, col2 = st.columns(2)
+            with col1:
+                board_metric = st.selectbox("Leaderboard Metric", list(rankings.METRICS))
+            with col2:
+                board_size = st.slider("Leaderboard Size", 5, 50, 10)
+            for col, format_type in zip(st.columns(len(formats)), formats):
+                with col:
+                    st.write(f"**{format_type.upper()}**")
+                    board = backend.ranks.leaderboard(board_metric, format_type, start_year, end_year, board_size)
+                    st.dataframe(board.drop(columns="Percentile").round(2), hide_index=True)
+                    render_export(backend, "leaderboard", "Export Full Leaderboard", f"{board_metric}_{format_type}_{start_year}_{end_year}",
+                                  export_type, metric=board_metric, format_type=format_type, start=start_year, end=end_year)
+
     elif filter_type == "Year Wise":
             st.header("📊 Year Wise Analysis")
-            years = sorted(df["Year"].dropna().unique())
+            years = backend.years()
             selected_year = st.sidebar.selectbox("Select Year", years)
 
-            year_data = df[df["Year"] == selected_year]
-
             formats = ["test", "odi", "t20"]
             for format_type in formats:
                 st.subheader(f"{format_type.upper()} Format in {selected_year}")
@@ -503,238 +719,231 @@ def main():
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    # Batting Contributions
-                    batting_data = year_data[(year_data["Format"] == format_type) & (year_data["Style"] == "batting")]
-                    batting_contributions = batting_data.groupby("Player Name", as_index=False).agg({"Runs": "sum"})
-                    batting_top_5 = batting_contributions.nlargest(5, "Runs")
-                    batting_others = pd.DataFrame({"Player Name": ["Others"], "Runs": [batting_contributions["Runs"].sum() - batting_top_5["Runs"].sum()]})
-                    batting_final = pd.concat([batting_top_5, batting_others])
-
-                    fig_batting = px.pie(
+                    # Batting Contributions: top 5 plus Others, from the materialized view
+                    with stage("view:batting_contributions"):
+                        batting_final = backend.views.contributions("batting", format_type, selected_year)
+
+                    fig_batting = charts.pie(
                         batting_final,
                         values="Runs",
                         names="Player Name",
                         title="Batting Contributions",
                         hole=0.4
                     )
-                    st.plotly_chart(fig_batting)
+                    show_chart(fig_batting)
 
                 with col2:
                     # Bowling Contributions
-                    bowling_data = year_data[(year_data["Format"] == format_type) & (year_data["Style"] == "bowling")]
-                    bowling_contributions = bowling_data.groupby("Player Name", as_index=False).agg({"Wickets": "sum"})
-                    bowling_top_5 = bowling_contributions.nlargest(5, "Wickets")
-                    bowling_others = pd.DataFrame({"Player Name": ["Others"], "Wickets": [bowling_contributions["Wickets"].sum() - bowling_top_5["Wickets"].sum()]})
-                    bowling_final = pd.concat([bowling_top_5, bowling_others])
+                    with stage("view:bowling_contributions"):
+                        bowling_final = backend.views.contributions("bowling", format_type, selected_year)
 
-                    fig_bowling = px.pie(
+                    fig_bowling = charts.pie(
                         bowling_final,
                         values="Wickets",
                         names="Player Name",
                         title="Bowling Contributions",
                         hole=0.4
                     )
-                    st.plotly_chart(fig_bowling)
+                    show_chart(fig_bowling)
 
     elif filter_type == "Player Comparison":
-            #starts from here
-            
             # Select Players for Comparison
             st.header("📊 Player Comparison")
-            player_names = sorted(df["Player Name"].unique())
-            player_1 = st.selectbox("Select Player 1", player_names)
-            player_2 = st.selectbox("Select Player 2", [player for player in player_names if player != player_1])
+            if "comparison_players" not in st.session_state:
+                st.session_state["comparison_players"] = backend.index.search("", limit=2)
+            chosen = st.session_state["comparison_players"]
+            candidates = search_players(backend.index, st.text_input("Search Players"), exclude=chosen)
+            players = st.multiselect(
+                f"Select Players (up to {MAX_COMPARISON_PLAYERS})",
+                chosen + candidates,
+                key="comparison_players",
+                max_selections=MAX_COMPARISON_PLAYERS,
+            )
 
-            # Filter data for selected players
-            player_1_data = df[df["Player Name"] == player_1]
-            player_2_data = df[df["Player Name"] == player_2]
-            
             # Style Selection (Batting vs Bowling)
             styles = ["batting", "bowling"]
             selected_style = st.selectbox("Select Style", styles)
+            metric, rate_columns = analytics.COMPARISON_COLUMNS[selected_style]
 
-            # Define the formats (Test, ODI, T20)
-            formats = ["test", "odi", "t20"]
-
-            # Function to filter and get data for each format
-            def get_format_data(player_data, format_type, style):
-                return player_data[(player_data["Format"] == format_type) & (player_data["Style"] == style)]
-
-            # Create side-by-side comparison layout
-            col1, col2 = st.columns(2)
-
-            
-
-            # Side-by-Side Comparison by Format
-            for format_type in formats:
-                st.subheader(f"{format_type.capitalize()} Format")
-
-                # Filter data for the selected style and format
-                player_1_format_data = get_format_data(player_1_data, format_type, selected_style)
-                player_2_format_data = get_format_data(player_2_data, format_type, selected_style)
-
-                # Merge the data for both players
-                combined_data = pd.merge(
-                    player_1_format_data[["Year", "Runs" if selected_style == "batting" else "Wickets"]],
-                    player_2_format_data[["Year", "Runs" if selected_style == "batting" else "Wickets"]],
-                    on="Year",
-                    suffixes=(f" ({player_1})", f" ({player_2})")
+            if len(players) < 2:
+                st.info("Select at least two players to compare.")
+            else:
+                # One pivot of player x format x year x metric feeds every table and chart below
+                with stage("query:comparison_rows"):
+                    comparison_rows = backend.players_rows(selected_style, players)
+                with stage("pivot:comparison", rows=len(comparison_rows)):
+                    comparison = analytics.comparison_pivot(comparison_rows, selected_style)
+                available_formats = set(comparison.index.get_level_values("Format"))
+                player_ids = comparison_rows.astype({"Player Name": str}).drop_duplicates("Player Name").set_index("Player Name")["Player ID"]
+                player_ids = player_ids.reindex(players).dropna().astype(int)
+                all_years = backend.years()
+                render_export(backend, "history", "Export History of All Selected Players", f"comparison_{selected_style}", export_type,
+                              style=selected_style, players=list(players))
+
+                # Side-by-Side Comparison by Format
+                for format_type in dataset.FORMATS:
+                    st.subheader(f"{format_type.capitalize()} Format")
+                    if format_type not in available_formats:
+                        st.markdown("### NO DATA")
+                        continue
+
+                    format_pivot = comparison.loc[format_type]
+                    st.write(f"**{selected_style.capitalize()} ({metric}) by Year in {format_type.capitalize()} Format**")
+                    st.dataframe(format_pivot[metric].reindex(columns=players))
+
+                    # Show advanced metrics for batting/bowling
+                    advanced = pd.DataFrame({col: format_pivot[col].mean() for col in rate_columns}).reindex(players)
+                    st.dataframe(advanced.style.format("{:.2f}"))
+
+                    st.write(f"**Percentile Among All {format_type.capitalize()} Players ({all_years[0]}–{all_years[-1]})**")
+                    st.dataframe(backend.ranks.percentiles(player_ids, format_type, all_years[0], all_years[-1]).style.format("{:.0f}", na_rep="–"))
+
+                # Show overall comparison for each player and each format
+                st.subheader("Overall Comparison Across All Formats")
+                totals = comparison[metric].groupby(level="Format").sum().reindex(columns=players)
+                totals_long = totals.reset_index().melt(id_vars="Format", var_name="Player Name", value_name=metric)
+                fig_overall = charts.bar(
+                    totals_long,
+                    x="Format",
+                    y=metric,
+                    color="Player Name",
+                    agg=None,
+                    barmode="group",
+                    title=f"Total {selected_style.capitalize()} Across Formats",
                 )
+                show_chart(fig_overall, key="comparison_overall_chart")
 
-                # Rename columns for clarity
-                combined_data.columns = ["Year", f"{player_1} {selected_style.capitalize()}", f"{player_2} {selected_style.capitalize()}"]
+                # Final Conclusion/Comparison
+                st.subheader("Final Comparison Summary")
+                verb = "scored" if selected_style == "batting" else "taken"
+                for player, total in totals.sum().sort_values(ascending=False).items():
+                    st.write(f"{player} has {verb} a total of {int(total)} {metric.lower()} across formats.")
 
-                # Show the combined table for comparison
-                st.write(f"**{player_1} vs {player_2} in {format_type.capitalize()} Format**")
-                st.dataframe(combined_data)
-
-                # Show advanced metrics for batting/bowling
-                if selected_style == "batting":
-                    st.write(f"**Batting Average**")
-                    st.write(f"{player_1}: {player_1_format_data['Average'].mean():.2f} | {player_2}: {player_2_format_data['Average'].mean():.2f}")
-                    st.write(f"**Strike Rate**")
-                    st.write(f"{player_1}: {player_1_format_data['Strike Rate'].mean():.2f} | {player_2}: {player_2_format_data['Strike Rate'].mean():.2f}")
-                else:
-                    st.write(f"**Bowling Economy Rate**")
-                    st.write(f"{player_1}: {player_1_format_data['Economy Rate'].mean():.2f} | {player_2}: {player_2_format_data['Economy Rate'].mean():.2f}")
-                    st.write(f"**Bowling Average**")
-                    st.write(f"{player_1}: {player_1_format_data['Average'].mean():.2f} | {player_2}: {player_2_format_data['Average'].mean():.2f}")
+    elif filter_type == "Similar Players":
+            st.header("🧬 Similar Players")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                format_selected = st.selectbox("Select Match Format", dataset.FORMATS)
+            with col2:
+                distance = st.radio("Distance", ["cosine", "euclidean"], horizontal=True)
+            with col3:
+                min_innings = st.number_input("Minimum Innings", min_value=1, max_value=100, value=5)
+            neighbours = st.slider("Number of Similar Players", 1, NEIGHBOUR_TABLE_SIZE, 5)
 
-            # Show overall comparison for each player and each format
-            st.subheader("Overall Comparison Across All Formats")
+            with stage("load_similarity", cached=True):
+                features, player_ids, matrix, table = load_similarity(backend, backend.key, format_selected, int(min_innings), distance)
 
-            # For each player, show the total Runs or Wickets across all formats
-            player_1_total = player_1_data[player_1_data["Style"] == selected_style].groupby("Format").agg({"Runs": "sum", "Wickets": "sum"})
-            player_2_total = player_2_data[player_2_data["Style"] == selected_style].groupby("Format").agg({"Runs": "sum", "Wickets": "sum"})
+            eligible = set(features.loc[player_ids, "Player Name"])
+            candidates = [name for name in search_players(backend.index, st.sidebar.text_input("Search Player")) if name in eligible]
+            if not candidates:
+                candidates = sorted(eligible)
+            selected_player = st.sidebar.selectbox("Select Player", candidates)
 
-            # Show the comparison as bar charts
-            fig_overall_1 = px.bar(player_1_total, x=player_1_total.index, y="Runs" if selected_style == "batting" else "Wickets", title=f"{player_1} Total {selected_style.capitalize()} Across Formats")
-            fig_overall_2 = px.bar(player_2_total, x=player_2_total.index, y="Runs" if selected_style == "batting" else "Wickets", title=f"{player_2} Total {selected_style.capitalize()} Across Formats")
+            if selected_player is None:
+                st.markdown("### NO DATA")
+            else:
+                player_id = features.index[features["Player Name"] == selected_player][0]
+                with stage("similarity_query", rows=len(player_ids)):
+                    similar = similarity.similar_players(features, player_ids, matrix, player_id, neighbours, distance, table)
 
-            col1, col2 = st.columns(2)
-            with col1:
-                st.plotly_chart(fig_overall_1, key=f"{player_1}_overall_chart")
-            with col2:
-                st.plotly_chart(fig_overall_2, key=f"{player_2}_overall_chart")
+                st.subheader(f"Players most like {selected_player} in {format_selected.upper()}")
+                profile = features.loc[[player_id], similarity.FEATURES]
+                st.write("**Profile**")
+                st.dataframe(profile.style.format("{:.2f}", na_rep="-"), hide_index=True)
+                st.dataframe(similar.drop(columns="Player ID").style.format("{:.2f}", subset=similar.columns[2:], na_rep="-"), hide_index=True)
 
-            # Final Conclusion/Comparison
-            st.subheader(f"Final Comparison Summary Between {player_1} and {player_2}")
-            if selected_style == "batting":
-                st.write(f"In terms of batting, {player_1} has scored a total of {player_1_total['Runs'].sum()} runs across formats, while {player_2} has scored {player_2_total['Runs'].sum()} runs.")
-            else:
-                st.write(f"In terms of bowling, {player_1} has taken {player_1_total['Wickets'].sum()} wickets across formats, while {player_2} has taken {player_2_total['Wickets'].sum()} wickets.")
-               
-               
-               
-               
     elif filter_type == "Optimal Team Selector":
-            from pulp import LpProblem, LpVariable, lpSum, LpMaximize, LpBinary
-
-            formats = list(cricket_data.keys())
+            formats = dataset.FORMATS
             format_selected = st.selectbox("Select Match Format", formats)
 
-            years = [str(y) for y in range(2011, 2026)]
-            if "start_year" not in st.session_state:
-                st.session_state["start_year"] = "2011"
-            if "end_year" not in st.session_state:
-                st.session_state["end_year"] = "2025"
+            start_year, end_year = select_year_range(backend)
 
-            col1, col2 = st.columns(2)
-            with col1:
-                valid_start_years = [y for y in years if int(y) <= int(st.session_state.get("end_year", "2025"))]
-                start_year_index = valid_start_years.index(st.session_state["start_year"]) if st.session_state["start_year"] in valid_start_years else 0
-                start_year = st.selectbox("Start Year", valid_start_years, index=start_year_index, key="start_year")
+            st.subheader("🧠 Optimal Playing XI")
+            model = get_team_model(backend, backend.key, format_selected, start_year, end_year)
+            df = model.df
+            names = df.set_index('Player ID')['Player Name']
+            ranked_ids = df.sort_values('Total_Points', ascending=False)['Player ID'].tolist()
+
+            with st.expander("Selection Constraints"):
+                n_teams = st.slider("XIs to Show", 1, MAX_ALTERNATIVE_XIS, 1)
+                locked = st.multiselect("Locked-in Players", ranked_ids, format_func=names.get, max_selections=11)
+                excluded = st.multiselect("Excluded Players", [p for p in ranked_ids if p not in locked], format_func=names.get)
+                keepers = st.multiselect("Wicketkeepers (one must play)", ranked_ids, format_func=names.get)
+                min_allrounders = st.number_input("Minimum Allrounders", min_value=0, max_value=11, value=0)
+
+            teams = model.solve(n_teams, tuple(locked), tuple(excluded), int(min_allrounders), tuple(keepers))
+            if not teams:
+                st.error("No XI satisfies these constraints.")
+            else:
+                optimal_df = teams[0]
+                st.dataframe(optimal_df[['Player Name', 'Assigned_Role', 'Bat_Points', 'Bowl_Points', 'Total_Points']].reset_index(drop=True))
+                for rank, team in enumerate(teams[1:], start=2):
+                    st.markdown(f"**Alternative XI #{rank}** ({team['Total_Points'].sum():.1f} points)")
+                    st.dataframe(team[['Player Name', 'Assigned_Role', 'Bat_Points', 'Bowl_Points', 'Total_Points']].reset_index(drop=True))
+                if len(teams) < n_teams:
+                    st.caption(f"Only {len(teams)} distinct XIs satisfy these constraints")
+
+                st.subheader("⚖️ Weight Sensitivity")
+                if st.checkbox("Sweep the scoring weights", help="Solve the XI for every combination of the chosen weights"):
+                    weight_columns = st.columns(2)
+                    weights = {}
+                    for i, (name, (label, options)) in enumerate(SWEEP_OPTIONS.items()):
+                        weights[name] = tuple(weight_columns[i % 2].multiselect(
+                            label, options, default=[team_selector.DEFAULT_WEIGHTS[name]], key=f"sweep_{name}"
+                        ))
+                    n_configs = int(np.prod([max(len(values), 1) for values in weights.values()]))
+                    if n_configs > MAX_SWEEP_CONFIGS:
+                        st.warning(f"{n_configs} weight combinations selected; narrow the grid to at most {MAX_SWEEP_CONFIGS}.")
+                    else:
+                        frequency = load_weight_sweep(backend, backend.key, format_selected, start_year, end_year, tuple(weights.items()))
+                        frequency['In Optimal XI'] = frequency['Player ID'].isin(optimal_df['Player ID'])
+                        st.write(f"Share of {n_configs} weight combinations in which each player makes the XI")
+                        fig = charts.bar(frequency.head(25), x='Player Name', y='Selected %', color='In Optimal XI', agg=None,
+                                         title="Best XI Selection Frequency")
+                        show_chart(fig, use_container_width=True)
+                        st.dataframe(frequency.drop(columns='Player ID'), hide_index=True)
+                        render_export(backend, "sweep", "Export the XI of Every Combination", f"sweep_{format_selected}_{start_year}_{end_year}",
+                                      export_type, format_type=format_selected, start=start_year, end=end_year,
+                                      weights={name: list(values) for name, values in weights.items()})
+
+                st.subheader("🎲 Season Simulation")
+                st.write("Each simulated season draws one historical season at random for every player in the XI.")
+                n_sims = st.select_slider("Simulated Seasons", options=SIMULATION_SIZES, value=20000)
+                alternative = st.multiselect(
+                    "Alternative XI", ranked_ids,
+                    format_func=names.get, max_selections=11, help="Pick 11 players to compare against the optimal XI",
+                )
+
+                with stage("simulate_xi", rows=n_sims):
+                    draws = load_simulation(backend, backend.key, format_selected, start_year, end_year, tuple(optimal_df['Player ID']), n_sims)
+                summary = simulation.summarize(draws)
+                for col, (label, value) in zip(st.columns(len(summary)), summary.items()):
+                    col.metric(label, f"{value:.0f}")
+
+                counts, edges = np.histogram(draws.sum(axis=1), bins=SIMULATION_BINS)
+                histogram = pd.DataFrame({"Team Points": (edges[:-1] + edges[1:]) / 2, "Seasons": counts})
+                fig = charts.bar(histogram, x="Team Points", y="Seasons", agg=None,
+                                 title="Simulated Season Points of the Optimal XI")
+                fig.update_traces(width=edges[1] - edges[0])
+                show_chart(fig, use_container_width=True)
+                st.dataframe(simulation.player_contributions(draws, optimal_df['Player Name']), hide_index=True)
+
+                if len(alternative) == 11:
+                    with stage("simulate_xi", rows=n_sims):
+                        alternative_draws = load_simulation(backend, backend.key, format_selected, start_year, end_year, tuple(alternative), n_sims)
+                    comparison = pd.DataFrame(
+                        [summary, simulation.summarize(alternative_draws)], index=["Optimal XI", "Alternative XI"]
+                    )
+                    st.dataframe(comparison.round(1))
+                    st.metric("Optimal XI Outscores Alternative", f"{simulation.head_to_head(draws, alternative_draws):.1%}")
+                elif alternative:
+                    st.caption(f"Pick {11 - len(alternative)} more players to compare the alternative XI")
+
+    if show_debug_panel:
+        render_debug_panel()
+        if isinstance(backend, queries.FrameBackend):
+            render_memory_panel(backend.tables["batting"], backend.tables["bowling"])
 
-            with col2:
-                valid_end_years = [y for y in years if int(y) >= int(st.session_state.get("start_year", "2011"))]
-                end_year_index = valid_end_years.index(st.session_state["end_year"]) if st.session_state["end_year"] in valid_end_years else len(valid_end_years) - 1
-                end_year = st.selectbox("End Year", valid_end_years, index=end_year_index, key="end_year")
-
-            def overs_to_float(overs):
-                try:
-                    overs = str(overs)
-                    if '.' in overs:
-                        whole, fraction = overs.split('.')
-                        return int(whole) + int(fraction) / 6
-                    return float(overs)
-                except:
-                    return 0.0
-
-            def economy_bonus(econ):
-                if econ <= 4.0:
-                    return 6
-                elif econ <= 5.0:
-                    return 4
-                elif econ <= 6.0:
-                    return 2
-                elif econ > 9.0:
-                    return -4
-                return 0
-
-            def infer_role(bat, bowl):
-                if bat > 40 and bowl < 15:
-                    return 'batter'
-                elif bowl > 40 and bat < 15:
-                    return 'bowler'
-                elif bat >= 20 and bowl >= 20:
-                    return 'allrounder'
-                return 'other'
-
-            def collect_player_data(cricket_data, format_selected, start_year, end_year):
-                selected_years = [y for y in cricket_data[format_selected]["batting"] if int(start_year) <= int(y) <= int(end_year)]
-                year_count = len(selected_years)
-                batting_data, bowling_data = [], []
-                for y in selected_years:
-                    batting_data.extend(cricket_data[format_selected]["batting"][y])
-                    bowling_data.extend(cricket_data[format_selected]["bowling"][y])
-
-                bat_df = pd.DataFrame(batting_data)
-                bat_df = bat_df[['Player Name', 'Runs', '4s', '6s', 'Ducks']].copy()
-                for col in ['Runs', '4s', '6s', 'Ducks']:
-                    bat_df[col] = pd.to_numeric(bat_df[col], errors='coerce').fillna(0)
-                bat_df = bat_df.groupby('Player Name', as_index=False).sum()
-
-                raw_bowl_df = pd.DataFrame(bowling_data)
-                bowl_df = raw_bowl_df[['Player Name', 'Wickets', 'Runs', 'Overs']].copy()
-                bowl_df[['Wickets', 'Runs']] = bowl_df[['Wickets', 'Runs']].apply(pd.to_numeric, errors='coerce').fillna(0)
-                bowl_df['Overs'] = raw_bowl_df['Overs'].apply(overs_to_float)
-                bowl_df = bowl_df.groupby('Player Name', as_index=False).sum()
-                bowl_df['Economy Rate'] = bowl_df.apply(lambda x: x['Runs'] / x['Overs'] if x['Overs'] > 0 else 0.0, axis=1)
-
-                bat_df['Bat_Points'] = (bat_df['Runs'] + bat_df['4s'] + 2 * bat_df['6s'] - 2 * bat_df['Ducks']) / year_count
-                bowl_df['Bowl_Points'] = (bowl_df['Wickets'] * 25 / year_count) + bowl_df['Economy Rate'].apply(economy_bonus)
-
-                df = pd.merge(bat_df, bowl_df, on='Player Name', how='outer').fillna(0)
-                df['Total_Points'] = df['Bat_Points'] + df['Bowl_Points']
-                df['Role'] = df.apply(lambda x: infer_role(x['Bat_Points'], x['Bowl_Points']), axis=1)
-                return df
-
-            def optimize_team(df):
-                players = df['Player Name'].tolist()
-                roles = df['Role'].tolist()
-                points = df['Total_Points'].tolist()
-
-                prob = LpProblem("Optimal_Team", LpMaximize)
-                x = LpVariable.dicts("Player", players, cat=LpBinary)
-
-                prob += lpSum([x[p] * pts for p, pts in zip(players, points)])
-                prob += lpSum([x[p] for p in players]) == 11
-                prob += lpSum([x[p] for p, r in zip(players, roles) if r in ['batter', 'allrounder']]) >= 6
-                prob += lpSum([x[p] for p, r in zip(players, roles) if r in ['bowler', 'allrounder']]) >= 5
-
-                prob.solve()
-                selected_players = [p for p in players if x[p].varValue == 1]
-                selected_df = df[df['Player Name'].isin(selected_players)].copy().sort_values(by='Total_Points', ascending=False)
-                sorted_by_bat = selected_df.sort_values(by='Bat_Points', ascending=False)
-                batters = sorted_by_bat.head(6)['Player Name'].tolist()
-                selected_df['Assigned_Role'] = selected_df['Player Name'].apply(lambda p: 'batter' if p in batters else 'bowler')
-                return selected_df
 
-            st.subheader("🧠 Optimal Playing XI")
-            df = collect_player_data(cricket_data, format_selected, start_year, end_year)
-            optimal_df = optimize_team(df)
-            st.dataframe(optimal_df[['Player Name', 'Assigned_Role', 'Bat_Points', 'Bowl_Points', 'Total_Points']].reset_index(drop=True))
-            
-    
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import dataset
+import rankings
+import versioning
+import views
+from player_index import PlayerIndex, build_player_index
+
+# Binary copies of the typed tables, one directory per dataset version
+ARRAY_DIR = "cricket_arrays"
+META_FILE = "meta.json"
+# Versions kept on disk; workers still serving an older one keep their
+# mapping even after its files are removed
+KEEP_VERSIONS = 2
+
+
+def array_root(data_file):
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), ARRAY_DIR)
+
+
+# Save a MultiIndexed frame as .npy files named `prefix`.*: the codes of
+# every index level and every column; returns the metadata load_frame needs
+def save_frame(frame, directory, prefix):
+    meta = {"levels": [], "columns": []}
+    for i, (name, level) in enumerate(zip(frame.index.names, frame.index.levels)):
+        entry = {"name": name, "dtype": str(level.dtype), "values": level.tolist(), "file": f"{prefix}.level.{i}.npy"}
+        np.save(os.path.join(directory, entry["file"]), frame.index.codes[i])
+        meta["levels"].append(entry)
+    for i, col in enumerate(frame.columns):
+        entry = {"name": col, "file": f"{prefix}.{i}.npy"}
+        np.save(os.path.join(directory, entry["file"]), frame[col].to_numpy())
+        meta["columns"].append(entry)
+    return meta
+
+
+# Save every column of the typed tables as a .npy file (categoricals as
+# codes, their categories in the metadata), with the player name table, the
+# per-player row offsets, the yearly sums, the rank index (see
+# rankings.py) and the materialized top player views (see views.py). The
+# version directory is written under a temporary name and renamed into
+# place when complete.
+def write_arrays(batting, bowling, data_file, version):
+    root = array_root(data_file)
+    target = os.path.join(root, version)
+    os.makedirs(root, exist_ok=True)
+    # A directory of its own, so concurrent writers never share one
+    tmp_dir = tempfile.mkdtemp(dir=root, prefix=f"{version}.", suffix=".tmp")
+    try:
+        os.chmod(tmp_dir, 0o755)
+        _write_files(batting, bowling, version, tmp_dir)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    _prune(root)
+    return target
+
+
+def _write_files(batting, bowling, version, directory):
+    index = build_player_index(batting, bowling)
+    meta = {"version": version, "names": index.names, "tables": {}}
+    for style, table in [("batting", batting), ("bowling", bowling)]:
+        columns = []
+        for i, col in enumerate(table.columns):
+            entry = {"name": col, "file": f"{style}.{i}.npy"}
+            values = table[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                entry["categories"] = [str(category) for category in values.cat.categories]
+                values = values.cat.codes
+            np.save(os.path.join(directory, entry["file"]), values.to_numpy())
+            columns.append(entry)
+        meta["tables"][style] = {"rows": len(table), "columns": columns}
+        np.save(os.path.join(directory, f"{style}.offsets.npy"), np.vstack(index.offsets[style]))
+
+    sums = rankings.yearly_sums(batting, bowling)
+    meta["sums"] = save_frame(sums, directory, "sums")
+    ranks = rankings.RankIndex(sums, rankings.player_names(batting, bowling))
+    meta["ranks"] = save_frame(ranks.table, directory, "ranks")
+    meta["views"] = views.save_views(views.build_views(batting, bowling, ranks.names), directory)
+
+    with open(os.path.join(directory, META_FILE), "w") as f:
+        json.dump(meta, f, indent=4)
+
+
+def _prune(root):
+    versions = [os.path.join(root, name) for name in os.listdir(root) if not name.endswith(".tmp")]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for path in versions[KEEP_VERSIONS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Read-only view of a mapped .npy file, as a plain ndarray for pandas
+def _load(path):
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+# Frame saved by save_frame; the columns and index codes are views of the
+# mapped files
+def load_frame(directory, meta, load=_load):
+    index = pd.MultiIndex(
+        levels=[pd.Index(level["values"], dtype=level["dtype"]) for level in meta["levels"]],
+        codes=[load(os.path.join(directory, level["file"])) for level in meta["levels"]],
+        names=[level["name"] for level in meta["levels"]],
+        verify_integrity=False,
+    )
+    columns = {entry["name"]: load(os.path.join(directory, entry["file"])) for entry in meta["columns"]}
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+# Whether the arrays of a dataset version have been written; one stat
+def has_arrays(data_file, version):
+    return os.path.exists(os.path.join(array_root(data_file), version, META_FILE))
+
+
+# Open one dataset version read-only. Every column of the tables, the
+# yearly sums and the rank index is a NumPy view of the mapped file, so
+# processes that open the same version share one copy in the page cache.
+# Returns None when that version has not been written, or was written in
+# an older layout.
+def open_arrays(data_file, version=None):
+    version = version or versioning.dataset_version(data_file)
+    directory = os.path.join(array_root(data_file), version)
+    try:
+        with open(os.path.join(directory, META_FILE), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta.get("sums"), dict) or "ranks" not in meta:
+        return None
+
+    tables = {}
+    for style, spec in meta["tables"].items():
+        columns = {}
+        for entry in spec["columns"]:
+            values = _load(os.path.join(directory, entry["file"]))
+            if "categories" in entry:
+                values = pd.Categorical.from_codes(values, categories=entry["categories"])
+            columns[entry["name"]] = values
+        tables[style] = pd.DataFrame(columns, copy=False)
+
+    offsets = {style: tuple(_load(os.path.join(directory, f"{style}.offsets.npy"))) for style in tables}
+    sums = load_frame(directory, meta["sums"])
+    names = rankings.player_names(tables["batting"], tables["bowling"])
+    ranks = rankings.RankIndex(sums, names, load_frame(directory, meta["ranks"]))
+    return {
+        "batting": tables["batting"],
+        "bowling": tables["bowling"],
+        "index": PlayerIndex(meta["names"], offsets),
+        "sums": sums,
+        "ranks": ranks,
+        "views": views.load_views(directory, meta["views"], _load) if "views" in meta else None,
+    }
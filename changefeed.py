@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+
+import identity
+
+# One JSON line per dataset version, appended when a version is written:
+#   {"version", "previous", "partitions": [{"format", "style", "year",
+#    "added": [names], "removed": [names], "changed": {name: {col: [old, new]}}}]}
+# A version written without a comparable previous one has "full": true and
+# breaks the chain; readers then rebuild everything.
+CHANGES_FILE = "dataset_changes.jsonl"
+# Versions kept in the feed
+KEEP_CHANGES = 50
+
+
+def changes_path(data_file):
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), CHANGES_FILE)
+
+
+# Rows keyed by player name, numbered when a name repeats in one partition
+def _keyed(rows):
+    keyed = {}
+    seen = {}
+    for row in rows:
+        name = row.get("Player Name")
+        seen[name] = seen.get(name, -1) + 1
+        keyed[(name, seen[name])] = row
+    return keyed
+
+
+# Row-level difference of one partition between two versions
+def diff_rows(old_rows, new_rows):
+    old, new = _keyed(old_rows), _keyed(new_rows)
+    changed = {}
+    for key in old.keys() & new.keys():
+        columns = {
+            col: [old[key].get(col), new[key].get(col)]
+            for col in old[key].keys() | new[key].keys()
+            if old[key].get(col) != new[key].get(col)
+        }
+        if columns:
+            changed[key[0]] = columns
+    return {
+        "added": sorted(key[0] for key in new.keys() - old.keys()),
+        "removed": sorted(key[0] for key in old.keys() - new.keys()),
+        "changed": changed,
+    }
+
+
+# Changes of every partition in `new` against `old`, both given as
+# {(format, style, year): rows}; partitions that only exist in `old` count
+# as fully removed. Unchanged partitions are left out.
+def diff_partitions(old, new):
+    entries = []
+    for format_type, style, year in sorted(old.keys() | new.keys()):
+        diff = diff_rows(old.get((format_type, style, year), []), new.get((format_type, style, year), []))
+        if diff["added"] or diff["removed"] or diff["changed"]:
+            entries.append({"format": format_type, "style": style, "year": str(year), **diff})
+    return entries
+
+
+def read_feed(data_file):
+    try:
+        with open(changes_path(data_file), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+# Append the record for a new version; partitions=None marks a full rewrite
+def record(data_file, version, previous, partitions=None):
+    entry = {"version": version, "previous": previous}
+    if partitions is None:
+        entry["full"] = True
+    else:
+        entry["partitions"] = partitions
+    feed = [line for line in read_feed(data_file) if line["version"] != version][-(KEEP_CHANGES - 1):]
+    feed.append(entry)
+    path = changes_path(data_file)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{CHANGES_FILE}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(line, separators=(",", ":")) + "\n" for line in feed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# Feed records leading from one version to another, oldest first, or None
+# when the chain is broken (a full rewrite, a pruned record, or a file
+# changed outside the writer)
+def changes_between(data_file, old_version, new_version):
+    by_version = {record["version"]: record for record in read_feed(data_file)}
+    chain = []
+    version = new_version
+    while version != old_version:
+        record = by_version.get(version)
+        if record is None or record.get("full") or len(chain) == len(by_version):
+            return None
+        chain.append(record)
+        version = record["previous"]
+    return chain[::-1]
+
+
+# What a chain of records touches: the (format, year) cells and
+# (format, style, year) partitions that changed, the canonical names of the
+# players whose rows changed, and whether any player was added or removed
+def summarize(records, registry=None):
+    registry = registry or identity.load_registry()
+    partitions = set()
+    names, formats, years = [], [], []
+    roster = False
+    for record in records:
+        for entry in record["partitions"]:
+            partitions.add((entry["format"], entry["style"], int(entry["year"])))
+            touched = entry["added"] + entry["removed"] + list(entry["changed"])
+            names += touched
+            formats += [entry["format"]] * len(touched)
+            years += [int(entry["year"])] * len(touched)
+            roster = roster or bool(entry["added"] or entry["removed"])
+    players = set(registry.resolve(names, formats, years)) if names else set()
+    return {
+        "partitions": partitions,
+        "cells": {(format_type, year) for format_type, _, year in partitions},
+        "players": players,
+        "roster": roster,
+    }
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Figures built from exactly the points they plot. Each helper aggregates
+# its rows server side to one value per (series, x), keeps only the plotted
+# columns and hands Plotly numpy arrays in compact dtypes, which it sends as
+# base64 typed arrays instead of JSON number lists.
+
+# Plotted points from which a line chart uses WebGL traces
+WEBGL_POINTS = 1000
+
+
+# Integers in the smallest integer dtype that holds them, other numbers as
+# float32, and anything else (names, flags) as strings
+def compact(values):
+    values = pd.Series(values)
+    if pd.api.types.is_bool_dtype(values) or not pd.api.types.is_numeric_dtype(values):
+        return values.astype(str).to_numpy(dtype=object)
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer").to_numpy()
+    return values.to_numpy(dtype=np.float32)
+
+
+# One row per plotted (series, x) point with `y` aggregated by `agg`, in
+# series order of first appearance. Numeric x is sorted within a series;
+# names keep their order, which sets the order of bars and slices. agg=None
+# takes the rows as the points already.
+def points(frame, x, y, color=None, agg="sum"):
+    keys = [color, x] if color else [x]
+    data = frame[keys + [y]]
+    if agg is not None:
+        data = data.groupby(keys, sort=False, observed=True)[y].agg(agg).reset_index()
+    order = [x] if pd.api.types.is_numeric_dtype(data[x]) and not pd.api.types.is_bool_dtype(data[x]) else []
+    if color:
+        series = {name: i for i, name in enumerate(pd.unique(data[color]))}
+        data = data.assign(_series=data[color].map(series)).sort_values(["_series"] + order, kind="stable")
+        return data.drop(columns="_series").reset_index(drop=True)
+    return data.sort_values(order, kind="stable").reset_index(drop=True) if order else data.reset_index(drop=True)
+
+
+def _series(data, color):
+    if not color:
+        return [(None, data)]
+    return [(str(name), group) for name, group in data.groupby(color, sort=False, observed=True)]
+
+
+def _layout(fig, title, x, y, color, labels):
+    labels = labels or {}
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y),
+        legend_title=labels.get(color, color) if color else None,
+        margin=dict(t=60),
+    )
+    return fig
+
+
+def _hover(x, y, labels):
+    labels = labels or {}
+    return f"{labels.get(x, x)}=%{{x}}<br>{labels.get(y, y)}=%{{y}}"
+
+
+# Line chart of `y` over `x`, one line per `color` value
+def line(frame, x, y, color=None, agg="sum", title=None, labels=None, markers=True):
+    data = points(frame, x, y, color, agg)
+    trace = go.Scattergl if len(data) > WEBGL_POINTS else go.Scatter
+    fig = go.Figure()
+    for name, group in _series(data, color):
+        fig.add_trace(trace(
+            x=compact(group[x]), y=compact(group[y]), name=name, showlegend=name is not None,
+            mode="lines+markers" if markers else "lines", hovertemplate=_hover(x, y, labels),
+        ))
+    return _layout(fig, title, x, y, color, labels)
+
+
+# Bar chart of `y` per `x`, bars of several `color` values grouped or stacked;
+# `text_format` prints each bar's value on it, e.g. ".2f"
+def bar(frame, x, y, color=None, agg="sum", title=None, labels=None, barmode="relative", text_format=None):
+    data = points(frame, x, y, color, agg)
+    fig = go.Figure()
+    for name, group in _series(data, color):
+        fig.add_trace(go.Bar(
+            x=compact(group[x]), y=compact(group[y]), name=name, showlegend=name is not None,
+            texttemplate=f"%{{y:{text_format}}}" if text_format else None,
+            hovertemplate=_hover(x, y, labels),
+        ))
+    fig.update_layout(barmode=barmode)
+    return _layout(fig, title, x, y, color, labels)
+
+
+def pie(frame, values, names, title=None, hole=0):
+    data = points(frame, names, values, agg="sum")
+    fig = go.Figure(go.Pie(
+        labels=compact(data[names]), values=compact(data[values]), hole=hole,
+        hovertemplate=f"{names}=%{{label}}<br>{values}=%{{value}}<extra></extra>",
+    ))
+    return fig.update_layout(title=title, margin=dict(t=60))
+
+
+# The figure with its template cut down to the layout and the defaults of
+# the trace types it draws; the template's defaults for every other trace
+# type are most of a small figure's payload
+def slim(fig):
+    template = fig.layout.template
+    if not template.data and not template.layout:
+        template = pio.templates[pio.templates.default] if pio.templates.default else None
+    if template is None:
+        return fig
+    used = {trace.type for trace in fig.data}
+    data = {name: traces for name, traces in template.data.to_plotly_json().items() if name in used}
+    fig.layout.template = go.layout.Template(layout=template.layout, data=data)
+    return fig
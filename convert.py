@@ -1,6 +1,15 @@
 import csv
+import datetime
 import json
 import os
+import sys
+
+import array_store
+import dataset
+import identity
+import ratings
+import validation
+import versioning
 
 def generate_json(base_dir):
     cricket_data = {
@@ -11,7 +20,7 @@ def generate_json(base_dir):
 
     formats = ["test", "odi", "t20"]
     types = ["batting", "bowling"]
-    years = range(2011, 2026)
+    years = range(2011, datetime.date.today().year + 1)
 
     for fmt in formats:
         for typ in types:
@@ -29,19 +38,84 @@ def generate_json(base_dir):
     return cricket_data
 
 
+# Give every new canonical player a stable ID in the registry file
+def update_registry(data, registry_file=identity.REGISTRY_FILE):
+    registry = identity.load_registry(registry_file)
+    names = set()
+    for fmt, styles in data.items():
+        for typ, years in styles.items():
+            for year, rows in years.items():
+                scraped = [row["Player Name"] for row in rows]
+                names.update(registry.resolve(scraped, [fmt] * len(rows), [int(year)] * len(rows)))
+
+    added = registry.register(names)
+    identity.save_registry(registry, registry_file)
+    return added
+
+
+# Atomic, versioned write of the typed rows; running apps pick the new
+# version up on their own. `prepare(version)` runs before it is published.
+def save_dataset(data, output_file, prepare=None):
+    return versioning.write_dataset(dataset.typed_data(data), output_file, prepare)
+
+
+# Rating history brought up to a published dataset version; the changed
+# years come from its change feed record
+def refresh_ratings(batting, bowling, output_file, version):
+    since = ratings.changed_since(output_file, version)
+    history, rated_years = ratings.refresh_history(ratings.load_history(), batting, bowling, since)
+    ratings.save_history(history, version=version)
+    return rated_years
+
+
+# Memory-mapped arrays and rating history for a dataset version that has
+# already been published
+def refresh_derived(data, output_file, version):
+    batting, bowling = dataset.build_tables(data)
+    array_dir = array_store.write_arrays(batting, bowling, output_file, version)
+    return array_dir, refresh_ratings(batting, bowling, output_file, version)
+
+
+# Plain JSON export for tools that still read cricket_data.json
 def save_json(data, output_file):
-    with open(output_file, "w", encoding="utf-8") as json_file:
-        json.dump(data, json_file, indent=4)
+    versioning.write_atomic(output_file, json.dumps(data, indent=4).encode("utf-8"))
 
 
 def main():
     base_dir = "./cricket_stats"
-    output_file = "cricket_data.json"
+    output_file = dataset.DATA_FILE
 
     cricket_data = generate_json(base_dir)
-    save_json(cricket_data, output_file)
+    # Check the rows before anything is published; --strict stops on failures
+    result = validation.validate(cricket_data)
+    validation.save_report(result)
+    print("\n".join(validation.summary_lines(result)))
+    if result["failed_partitions"] and "--strict" in sys.argv:
+        print(f"Nothing published; see {validation.REPORT_FILE}")
+        sys.exit(1)
+
+    # Register new players before publishing the dataset that names them
+    added = update_registry(cricket_data)
+    # The arrays are written under the new version before it is published,
+    # so running apps map them as soon as they see it
+    batting, bowling = dataset.build_tables(cricket_data)
+    array_dirs = []
+    version = save_dataset(
+        cricket_data, output_file,
+        lambda version: array_dirs.append(array_store.write_arrays(batting, bowling, output_file, version)),
+    )
+    if "--json" in sys.argv:
+        save_json(cricket_data, dataset.JSON_FILE)
+
+    rated_years = refresh_ratings(batting, bowling, output_file, version)
+    array_dir = array_dirs[0]
 
-    print(f"JSON file saved to {output_file}")
+    print(f"Dataset saved to {output_file} (version {version})")
+    if "--json" in sys.argv:
+        print(f"JSON export saved to {dataset.JSON_FILE}")
+    print(f"Memory-mapped arrays saved to {array_dir}")
+    print(f"Registered {len(added)} new players in {identity.REGISTRY_FILE}")
+    print(f"Ratings updated for {', '.join(map(str, rated_years))} in {ratings.HISTORY_FILE}")
 
 
 if __name__ == "__main__":
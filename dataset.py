@@ -0,0 +1,220 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import identity
+import packfile
+
+FORMATS = ["test", "odi", "t20"]
+STYLES = ["batting", "bowling"]
+
+# Packed dataset written by convert.py, and the plain JSON export
+DATA_FILE = "cricket_data.pack"
+JSON_FILE = "cricket_data.json"
+
+# Column dtypes for the typed batting and bowling tables
+BATTING_COUNTS = {
+    "Matches": "int16", "Innings": "int16", "Not Outs": "int16", "Runs": "int32",
+    "Balls Faced": "int32", "100s": "int16", "50s": "int16", "Ducks": "int16",
+    "4s": "int16", "6s": "int16",
+}
+BATTING_RATES = ["Average", "Strike Rate"]
+BATTING_LABELS = ["High Score"]
+
+BOWLING_COUNTS = {
+    "Matches": "int16", "Innings": "int16", "Maidens": "int16", "Runs": "int32",
+    "Wickets": "int16", "4 Wicket Hauls": "int16", "5 Wicket Hauls": "int16",
+    "10 Wicket Hauls": "int16",
+}
+BOWLING_RATES = ["Overs", "Average", "Economy Rate", "Strike Rate"]
+BOWLING_LABELS = ["BBI", "BBM"]
+
+
+# Numeric columns per style, parsed once when rows enter the dataset
+NUMERIC_COLUMNS = {
+    "batting": ["Year", *BATTING_COUNTS, *BATTING_RATES],
+    "bowling": ["Year", *BOWLING_COUNTS, *BOWLING_RATES],
+}
+
+
+def _parse_number(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# One scraped row of strings as a typed record: counts and rates become
+# numbers, text columns are kept, and "-" and other placeholders are left
+# out (a missing value reads back as NaN)
+def typed_row(style, row):
+    numeric = NUMERIC_COLUMNS[style]
+    record = {}
+    for col, value in row.items():
+        value = _parse_number(value) if col in numeric else value
+        if value is not None:
+            record[col] = value
+    return record
+
+
+# The nested data with every row typed
+def typed_data(data):
+    return {
+        format_type: {
+            style: {year: [typed_row(style, row) for row in rows] for year, rows in year_rows.items()}
+            for style, year_rows in styles.items()
+        }
+        for format_type, styles in data.items()
+    }
+
+
+# Flatten one style of the nested JSON into a DataFrame with a Format column
+def _raw_frame(data, style):
+    frames = []
+    for format_type, styles in data.items():
+        for year, rows in styles.get(style, {}).items():
+            if rows:
+                frame = pd.DataFrame(rows)
+                frame["Format"] = format_type
+                frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["Player Name", "Year", "Format"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# Cast raw string columns to categoricals, small integers and float32 rates
+def _compact(frame, names, registry, counts, rates, labels):
+    typed = pd.DataFrame(index=frame.index)
+    typed["Player ID"] = registry.lookup(frame["Player Name"]).to_numpy()
+    typed["Player Name"] = pd.Categorical(frame["Player Name"], categories=names)
+    typed["Format"] = pd.Categorical(frame["Format"], categories=FORMATS)
+    typed["Year"] = pd.to_numeric(frame["Year"], errors="coerce").fillna(0).astype("int16")
+    for col, dtype in counts.items():
+        values = frame[col] if col in frame.columns else pd.Series(np.nan, index=frame.index)
+        typed[col] = pd.to_numeric(values, errors="coerce").fillna(0).astype(dtype)
+    for col in rates:
+        values = frame[col] if col in frame.columns else pd.Series(np.nan, index=frame.index)
+        typed[col] = pd.to_numeric(values, errors="coerce").astype("float32")
+    for col in labels:
+        values = frame[col] if col in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+        typed[col] = values.astype("category")
+    # Keep each player's rows contiguous so lookups can slice by row range
+    return typed.sort_values(["Player Name", "Format", "Year"], ignore_index=True)
+
+
+# Replace scraped names with canonical names from the registry's alias rules
+def _resolve_names(frame, registry):
+    years = pd.to_numeric(frame["Year"], errors="coerce").fillna(0)
+    frame["Player Name"] = registry.resolve(frame["Player Name"], frame["Format"], years).to_numpy()
+    return frame
+
+
+# Build the typed batting and bowling tables from the nested cricket JSON.
+# Names are resolved to canonical players and keyed by their registry ID;
+# names missing from the registry get IDs for this build only.
+def build_tables(data, registry=None):
+    registry = registry or identity.load_registry()
+    raw_batting = _resolve_names(_raw_frame(data, "batting"), registry)
+    raw_bowling = _resolve_names(_raw_frame(data, "bowling"), registry)
+    names = sorted(set(raw_batting["Player Name"]).union(raw_bowling["Player Name"]))
+    registry.register(names)
+
+    batting = _compact(raw_batting, names, registry, BATTING_COUNTS, BATTING_RATES, BATTING_LABELS)
+    bowling = _compact(raw_bowling, names, registry, BOWLING_COUNTS, BOWLING_RATES, BOWLING_LABELS)
+    return batting, bowling
+
+
+# The typed tables with the partitions in `data` replaced: rows of those
+# (format, year) cells are dropped and the partitions' rows typed and merged
+# in, so only the changed partitions are parsed again
+def replace_partitions(batting, bowling, data, registry=None):
+    registry = registry or identity.load_registry()
+    tables = {"batting": batting, "bowling": bowling}
+    raw = {style: _resolve_names(_raw_frame(data, style), registry) for style in STYLES}
+    kept = {}
+    for style, table in tables.items():
+        cells = [(format_type, int(year)) for format_type, styles in data.items() for year in styles.get(style, {})]
+        replaced = np.zeros(len(table), dtype=bool)
+        for format_type, year in cells:
+            replaced |= ((table["Format"] == format_type) & (table["Year"] == year)).to_numpy()
+        kept[style] = table[~replaced]
+
+    names = sorted(
+        set(kept["batting"]["Player Name"].astype(str)).union(kept["bowling"]["Player Name"].astype(str),
+                                                               raw["batting"]["Player Name"], raw["bowling"]["Player Name"])
+    )
+    registry.register(names)
+    columns = {"batting": (BATTING_COUNTS, BATTING_RATES, BATTING_LABELS), "bowling": (BOWLING_COUNTS, BOWLING_RATES, BOWLING_LABELS)}
+    merged = {}
+    for style in STYLES:
+        counts, rates, labels = columns[style]
+        fresh = _compact(raw[style], names, registry, counts, rates, labels)
+        old = kept[style].assign(**{"Player Name": kept[style]["Player Name"].cat.set_categories(names)})
+        table = pd.concat([old, fresh], ignore_index=True)
+        for col in labels:
+            table[col] = table[col].astype(object).astype("category")
+        merged[style] = table.sort_values(["Player Name", "Format", "Year"], ignore_index=True)
+    return merged["batting"], merged["bowling"]
+
+
+# The packed dataset when present, otherwise the JSON export
+def default_data_file():
+    return DATA_FILE if os.path.exists(DATA_FILE) else JSON_FILE
+
+
+# Nested {format: {style: {year: rows}}} data, optionally limited to some
+# formats, styles and years. A packed file decodes only those partitions.
+def read_data(path, formats=None, styles=None, years=None):
+    if path.endswith(".pack"):
+        return packfile.PackReader(path).read(formats, styles, years)
+    with open(path, "r") as f:
+        data = json.load(f)
+    if formats is None and styles is None and years is None:
+        return data
+    years = None if years is None else {str(year) for year in years}
+    return {
+        format_type: {
+            style: {year: rows for year, rows in year_rows.items() if years is None or year in years}
+            for style, year_rows in format_styles.items() if styles is None or style in styles
+        }
+        for format_type, format_styles in data.items() if formats is None or format_type in formats
+    }
+
+
+# Overs are written as overs.balls, e.g. 3.4 is 3 overs and 4 balls
+def overs_to_float(overs):
+    overs = overs.fillna(0)
+    whole = np.floor(overs)
+    return whole + np.round((overs - whole) * 10) / 6
+
+
+# Bytes used by each column of a DataFrame, largest first
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "Column": usage.index,
+        "Dtype": [str(df[col].dtype) for col in usage.index],
+        "Bytes": usage.values,
+    })
+    return report.sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+def main():
+    batting, bowling = build_tables(read_data(default_data_file()))
+    for name, table in [("batting", batting), ("bowling", bowling)]:
+        report = memory_report(table)
+        print(f"{name}: {len(table)} rows, {report['Bytes'].sum()} bytes")
+        print(report.to_string(index=False))
+        print()
+
+
+if __name__ == "__main__":
+    main()
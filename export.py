@@ -0,0 +1,261 @@
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import dataset
+import queries
+import rankings
+import team_selector
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# File types an export can be written as, with their MIME types
+EXPORT_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+# Weight configurations solved per chunk of a sweep export
+SWEEP_CHUNK = 50
+
+# Every export is a view name and its parameters, turned into an iterator of
+# DataFrame chunks that all have the same columns. The chunks are encoded
+# one at a time, so neither the full result nor its encoded file is held
+# in memory twice; a bulk export of every row only ever holds one chunk.
+
+
+def available_types():
+    return [file_type for file_type in EXPORT_TYPES if file_type != "parquet" or pq is not None]
+
+
+def _years(backend, start, end):
+    years = backend.years()
+    start = int(start) if start is not None else years[0]
+    end = int(end) if end is not None else years[-1]
+    if start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
+
+def _format(format_type):
+    if format_type not in dataset.FORMATS:
+        raise ValueError(f"format must be one of {', '.join(dataset.FORMATS)}")
+    return format_type
+
+
+# Typed rows of some styles' players, formats and years: one player's
+# history, several players side by side, or the whole dataset
+def history(backend, style="batting", formats=None, start=None, end=None, players=None, chunk_rows=queries.CHUNK_ROWS):
+    if style not in dataset.STYLES:
+        raise ValueError("style must be batting or bowling")
+    formats = [_format(format_type) for format_type in formats or dataset.FORMATS]
+    start, end = _years(backend, start, end)
+    unknown = [name for name in players or [] if name not in backend.index]
+    if unknown:
+        raise ValueError(f"unknown players: {', '.join(unknown)}")
+    return backend.iter_rows(style, formats, start, end, players or None, chunk_rows)
+
+
+# Leaderboard of one metric, format and year range, best first
+def leaderboard(backend, metric="Runs", format_type="odi", start=None, end=None, limit=None, chunk_rows=queries.CHUNK_ROWS):
+    if metric not in rankings.METRICS:
+        raise ValueError(f"metric must be one of {', '.join(rankings.METRICS)}")
+    format_type = _format(format_type)
+    start, end = _years(backend, start, end)
+    board = backend.ranks.leaderboard(metric, format_type, start, end, limit)
+    return (board.iloc[i:i + chunk_rows] for i in range(0, max(len(board), 1), chunk_rows))
+
+
+# The Best XI of every weight configuration in the grid, one row per
+# configuration and selected player. Configurations are solved SWEEP_CHUNK
+# at a time and written out before the next ones are solved.
+def sweep(backend, format_type="odi", start=None, end=None, weights=None):
+    format_type = _format(format_type)
+    start, end = _years(backend, start, end)
+    unknown = set(weights or {}) - set(team_selector.DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"unknown weights: {', '.join(sorted(unknown))}")
+    grid = team_selector.weight_grid(**(weights or {}))
+
+    def chunks():
+        components, year_count = team_selector.player_components(
+            backend.format_rows("batting", format_type, start, end),
+            backend.format_rows("bowling", format_type, start, end),
+        )
+        for first in range(0, len(grid), SWEEP_CHUNK):
+            configurations = grid.iloc[first:first + SWEEP_CHUNK]
+            selected = team_selector.weight_sweep(components, year_count, configurations)
+            rows, players = np.nonzero(selected)
+            frame = configurations.iloc[rows].reset_index(names="Configuration")
+            frame["Player ID"] = components["Player ID"].to_numpy()[players]
+            frame["Player Name"] = components["Player Name"].to_numpy()[players]
+            yield frame
+
+    return chunks()
+
+
+EXPORTS = {"history": history, "leaderboard": leaderboard, "sweep": sweep}
+
+
+# Chunks of a view; parameters are checked before anything is computed, so
+# a bad request fails before the first byte is sent
+def open_export(backend, view, **params):
+    if view not in EXPORTS:
+        raise ValueError(f"export must be one of {', '.join(EXPORTS)}")
+    return EXPORTS[view](backend, **params)
+
+
+# Categories and labels as plain objects, so every chunk gets the same
+# Arrow types whatever categories it happens to hold
+def _plain(frame):
+    frame = frame.copy()
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(frame[col].dtype):
+            frame[col] = frame[col].astype(object).where(frame[col].notna(), None)
+    return frame
+
+
+def _arrow_schema(frame):
+    fields = []
+    for col in frame.columns:
+        dtype = frame[col].dtype
+        arrow_type = pa.string() if dtype == object else pa.from_numpy_dtype(dtype)
+        fields.append(pa.field(str(col), arrow_type))
+    return pa.schema(fields)
+
+
+# Write-only sink handing out what was written since the last drain; the
+# position keeps counting, which the Parquet footer offsets rely on
+class _Spool(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def csv_chunks(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+# One Parquet row group per chunk
+def parquet_chunks(frames):
+    spool = _Spool()
+    writer = None
+    for frame in frames:
+        frame = _plain(frame)
+        if writer is None:
+            schema = _arrow_schema(frame)
+            writer = pq.ParquetWriter(spool, schema, compression="zstd")
+        writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+        yield spool.drain()
+    if writer is not None:
+        writer.close()
+    yield spool.drain()
+
+
+# Encoded bytes of the chunks, piece by piece
+def stream(frames, file_type="csv"):
+    if file_type not in EXPORT_TYPES:
+        raise ValueError(f"type must be one of {', '.join(EXPORT_TYPES)}")
+    if file_type == "parquet" and pq is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    return parquet_chunks(frames) if file_type == "parquet" else csv_chunks(frames)
+
+
+# Whole export as bytes, for a download button; the rows are still
+# encoded one chunk at a time
+def export_bytes(backend, view, file_type="csv", **params):
+    buffer = io.BytesIO()
+    write_export(stream(open_export(backend, view, **params), file_type), buffer)
+    return buffer.getvalue()
+
+
+# Write encoded chunks to a binary file as they are produced; returns the
+# bytes written
+def write_export(chunks, out):
+    written = 0
+    for data in chunks:
+        out.write(data)
+        written += len(data)
+    return written
+
+
+# --weights runs=1,1.5 fours=0,1 as {"runs": [1.0, 1.5], "fours": [0.0, 1.0]}
+def parse_weights(values):
+    weights = {}
+    for value in values or []:
+        name, _, options = value.partition("=")
+        try:
+            weights[name] = [float(option) for option in options.split(",") if option]
+        except ValueError:
+            raise ValueError(f"invalid weight values: {value}")
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a view's data as CSV or Parquet")
+    parser.add_argument("view", choices=list(EXPORTS))
+    parser.add_argument("--type", choices=list(EXPORT_TYPES), help="file type (default: from --output, else csv)")
+    parser.add_argument("--output", "-o", help="file to write (default: standard output)")
+    parser.add_argument("--backend", choices=["memory", "sqlite", "duckdb"])
+    parser.add_argument("--style", default="batting")
+    parser.add_argument("--formats", nargs="+", help="formats for history; the first one for the other views")
+    parser.add_argument("--players", nargs="+")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--metric", default="Runs")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--weights", nargs="+", help="name=value,value,... per swept weight")
+    args = parser.parse_args()
+
+    file_type = args.type or ("parquet" if args.output and args.output.endswith(".parquet") else "csv")
+    data_file = dataset.default_data_file()
+    backend = queries.open_backend(args.backend or os.environ.get("CRICKET_BACKEND", "memory"), data_file)
+    params = {"start": args.start, "end": args.end}
+    format_type = args.formats[0] if args.formats else "odi"
+    if args.view == "history":
+        params.update(style=args.style, formats=args.formats, players=args.players)
+    elif args.view == "leaderboard":
+        params.update(metric=args.metric, format_type=format_type, limit=args.limit)
+    else:
+        params.update(format_type=format_type)
+
+    try:
+        if args.view == "sweep":
+            params["weights"] = parse_weights(args.weights)
+        chunks = stream(open_export(backend, args.view, **params), file_type)
+    except ValueError as error:
+        parser.error(str(error))
+    if not args.output:
+        write_export(chunks, sys.stdout.buffer)
+        return
+    with open(args.output, "wb") as out:
+        written = write_export(chunks, out)
+    print(f"Exported {args.view} to {args.output} ({written / 1024:.1f} KiB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
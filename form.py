@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+
+BATTING_COLUMNS = ["Innings", "Not Outs", "Runs", "Balls Faced"]
+BOWLING_COLUMNS = ["Innings", "Runs", "Wickets", "Balls"]
+
+
+# Dense (player, format) x year arrays of yearly sums, one per column
+def year_grid(rows, columns, years):
+    sums = rows.groupby(["Player ID", "Format", "Year"], observed=True)[columns].sum()
+    grid = sums.unstack("Year", fill_value=0)
+    grids = {col: grid[col].reindex(columns=years, fill_value=0).to_numpy(dtype=np.float64) for col in columns}
+    return grid.index, grids
+
+
+# Sum over the trailing `window` years ending at each year, via cumulative sums
+def rolling_sum(values, window):
+    cumulative = np.cumsum(values, axis=1)
+    shifted = np.zeros_like(cumulative)
+    if window < values.shape[1]:
+        shifted[:, window:] = cumulative[:, :-window]
+    return cumulative - shifted
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+# Long table of (player, format, year) windows from dense grids
+def _windows(index, grids, derived, years):
+    table = pd.DataFrame(
+        {name: values.ravel() for name, values in {**grids, **derived}.items()},
+        index=pd.MultiIndex.from_arrays(
+            [
+                np.repeat(index.get_level_values("Player ID").to_numpy(), len(years)),
+                np.repeat(index.get_level_values("Format").astype(str).to_numpy(), len(years)),
+                np.tile(years, len(index)),
+            ],
+            names=["Player ID", "Format", "Year"],
+        ),
+    )
+    return table[table["Innings"] > 0]
+
+
+# Rolling N-year batting and bowling form for every player and format at once
+def rolling_form(batting_rows, bowling_rows, window):
+    years = sorted(set(batting_rows["Year"].tolist()) | set(bowling_rows["Year"].tolist()))
+    years = list(range(years[0], years[-1] + 1)) if years else []
+
+    bat_index, bat = year_grid(batting_rows, BATTING_COLUMNS, years)
+    bat = {col: rolling_sum(values, window) for col, values in bat.items()}
+    batting = _windows(bat_index, {"Innings": bat["Innings"], "Runs": bat["Runs"]}, {
+        "Average": _ratio(bat["Runs"], bat["Innings"] - bat["Not Outs"]),
+        "Strike Rate": _ratio(bat["Runs"], bat["Balls Faced"]) * 100,
+    }, years)
+
+    bowling_rows = bowling_rows.assign(Balls=dataset.overs_to_float(bowling_rows["Overs"].astype(float)) * 6)
+    bowl_index, bowl = year_grid(bowling_rows, BOWLING_COLUMNS, years)
+    bowl = {col: rolling_sum(values, window) for col, values in bowl.items()}
+    bowling = _windows(bowl_index, {"Innings": bowl["Innings"], "Wickets": bowl["Wickets"]}, {
+        "Bowling Average": _ratio(bowl["Runs"], bowl["Wickets"]),
+        "Economy Rate": _ratio(bowl["Runs"], bowl["Balls"]) * 6,
+    }, years)
+
+    form = batting.rename(columns={"Innings": "Batting Innings"}).join(
+        bowling.rename(columns={"Innings": "Bowling Innings"}), how="outer"
+    )
+    return form.reset_index()
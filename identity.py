@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+REGISTRY_FILE = "player_registry.json"
+
+# The registry file holds two things:
+#   "players": canonical display name -> stable integer player ID. IDs are
+#              never reused or renumbered; new names get the next free ID.
+#   "aliases": rules mapping a scraped name to a canonical name, e.g.
+#              {"alias": "Virat Kohli", "player": "V Kohli"}. A rule may be
+#              scoped with "format", "from_year" and "to_year" to split two
+#              different people who share a scraped name.
+
+
+class PlayerRegistry:
+    def __init__(self, players=None, aliases=None):
+        self.ids = dict(players or {})
+        self.aliases = list(aliases or [])
+        self.names = {player_id: name for name, player_id in self.ids.items()}
+
+    def next_id(self):
+        return max(self.ids.values(), default=0) + 1
+
+    # Give every unseen canonical name the next free ID; returns the new names
+    def register(self, names):
+        added = []
+        for name in sorted(set(names) - set(self.ids)):
+            player_id = self.next_id()
+            self.ids[name] = player_id
+            self.names[player_id] = name
+            added.append(name)
+        return added
+
+    # Canonical names for scraped names, applying alias rules. Unscoped rules
+    # apply to every row; scoped rules only to rows in their format/years.
+    def resolve(self, names, formats=None, years=None):
+        raw = pd.Series(names).astype(object).reset_index(drop=True)
+        plain = {rule["alias"]: rule["player"] for rule in self.aliases if not _is_scoped(rule)}
+        resolved = raw.replace(plain) if plain else raw.copy()
+
+        for rule in filter(_is_scoped, self.aliases):
+            mask = (raw == rule["alias"]).to_numpy(copy=True)
+            if "format" in rule and formats is not None:
+                mask = mask & (np.asarray(formats) == rule["format"])
+            if years is not None:
+                years_array = np.asarray(years, dtype=int)
+                if "from_year" in rule:
+                    mask = mask & (years_array >= int(rule["from_year"]))
+                if "to_year" in rule:
+                    mask = mask & (years_array <= int(rule["to_year"]))
+            resolved = resolved.mask(mask, rule["player"])
+        return resolved
+
+    # Integer IDs for canonical names; names must already be registered
+    def lookup(self, names):
+        return pd.Series(names).map(self.ids).astype("int32")
+
+    def to_dict(self):
+        return {"players": dict(sorted(self.ids.items(), key=lambda item: item[1])), "aliases": self.aliases}
+
+
+def _is_scoped(rule):
+    return any(key in rule for key in ("format", "from_year", "to_year"))
+
+
+def load_registry(path=REGISTRY_FILE):
+    if not os.path.exists(path):
+        return PlayerRegistry()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return PlayerRegistry(data.get("players"), data.get("aliases"))
+
+
+def save_registry(registry, path=REGISTRY_FILE):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(registry.to_dict(), f, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,69 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger("cricket.instrumentation")
+
+# Streamlit runs every session's script on its own thread, so each rerun
+# keeps its own list of stage records
+_state = threading.local()
+
+
+def _records():
+    if not hasattr(_state, "records"):
+        _state.records = []
+        _state.misses = set()
+    return _state.records
+
+
+# Start a fresh set of records for the current script run
+def reset():
+    _state.records = []
+    _state.misses = set()
+
+
+# Called from inside a cached function body, which only runs on a cache miss
+def mark_miss(name):
+    _records()
+    _state.misses.add(name)
+
+
+# Time a block of work and record it as one stage of the current run
+@contextmanager
+def stage(name, rows=None, cached=False):
+    records = _records()
+    _state.misses.discard(name)
+    record = {"stage": name, "rows": rows, "cache": None}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if cached:
+            record["cache"] = "miss" if name in _state.misses else "hit"
+        records.append(record)
+        logger.info(json.dumps(record, default=str))
+
+
+# Decorator form of stage() for helper functions
+def timed(name=None):
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if hasattr(result, "__len__"):
+                    record["rows"] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+
+# Records collected so far in the current script run
+def get_records():
+    return list(_records())
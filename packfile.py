@@ -0,0 +1,131 @@
+import json
+import os
+import struct
+import zlib
+
+# Packed dataset layout:
+#   MAGIC | header length (uint32, little endian) | header JSON | blocks
+# The header lists the formats and styles and one entry per (format, style,
+# year) partition with the offset and length of its block, counted from the
+# end of the header. Each block is zlib-compressed JSON holding the column
+# names once and the rows as lists of values.
+MAGIC = b"CRICPK01"
+COMPRESSION_LEVEL = 9
+
+
+# Compressed block of one partition's rows
+def _encode_rows(rows):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    body = {"columns": columns, "rows": [[row.get(col) for col in columns] for row in rows]}
+    return zlib.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decode_rows(block):
+    body = json.loads(zlib.decompress(block))
+    columns = body["columns"]
+    return [{col: value for col, value in zip(columns, values) if value is not None} for values in body["rows"]]
+
+
+# Header plus blocks for a layout and a list of (format, style, year, rows, block)
+def _assemble(layout, items):
+    partitions = []
+    offset = 0
+    for format_type, style, year, rows, block in items:
+        partitions.append({
+            "format": format_type, "style": style, "year": year,
+            "offset": offset, "length": len(block), "rows": rows, "crc32": zlib.crc32(block),
+        })
+        offset += len(block)
+    header = json.dumps({"layout": layout, "partitions": partitions}, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(header)) + header + b"".join(item[4] for item in items)
+
+
+# Bytes of the packed dataset for the nested {format: {style: {year: rows}}} data
+def encode(data):
+    items = [
+        (format_type, style, year, len(rows), _encode_rows(rows))
+        for format_type, styles in data.items()
+        for style, years in styles.items()
+        for year, rows in years.items()
+    ]
+    return _assemble({format_type: list(styles) for format_type, styles in data.items()}, items)
+
+
+# Bytes of an existing pack with some partitions replaced or added, given as
+# {(format, style, year): rows}. Untouched blocks are copied as they are,
+# without being decoded or compressed again.
+def update(path, partitions):
+    if os.path.exists(path):
+        reader = PackReader(path)
+        layout = {format_type: list(styles) for format_type, styles in reader.layout.items()}
+        items = [
+            (entry["format"], entry["style"], entry["year"], entry["rows"], block)
+            for entry, block in reader.iter_blocks()
+        ]
+    else:
+        layout, items = {}, []
+
+    positions = {(item[0], item[1], item[2]): i for i, item in enumerate(items)}
+    for (format_type, style, year), rows in partitions.items():
+        styles = layout.setdefault(format_type, [])
+        if style not in styles:
+            styles.append(style)
+        item = (format_type, style, str(year), len(rows), _encode_rows(rows))
+        key = item[:3]
+        if key in positions:
+            items[positions[key]] = item
+        else:
+            positions[key] = len(items)
+            items.append(item)
+    return _assemble(layout, items)
+
+
+# Reads the header once, then seeks to and decodes only the partitions asked for
+class PackReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a packed cricket dataset")
+            (header_length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length))
+        self.layout = header["layout"]
+        self.partitions = header["partitions"]
+        self.data_start = len(MAGIC) + 4 + header_length
+
+    # Index entries matching the filters; None means every value
+    def select(self, formats=None, styles=None, years=None):
+        years = None if years is None else {str(year) for year in years}
+        return [
+            entry for entry in self.partitions
+            if (formats is None or entry["format"] in formats)
+            and (styles is None or entry["style"] in styles)
+            and (years is None or entry["year"] in years)
+        ]
+
+    # (entry, compressed block) for each selected partition, checksums verified
+    def iter_blocks(self, formats=None, styles=None, years=None):
+        with open(self.path, "rb") as f:
+            for entry in sorted(self.select(formats, styles, years), key=lambda e: e["offset"]):
+                f.seek(self.data_start + entry["offset"])
+                block = f.read(entry["length"])
+                if zlib.crc32(block) != entry["crc32"]:
+                    raise ValueError(f"corrupt block {entry['format']}/{entry['style']}/{entry['year']} in {self.path}")
+                yield entry, block
+
+    # (entry, rows) for each selected partition, decoded one block at a time
+    def iter_partitions(self, formats=None, styles=None, years=None):
+        for entry, block in self.iter_blocks(formats, styles, years):
+            yield entry, _decode_rows(block)
+
+    # Nested {format: {style: {year: rows}}} data for the selected partitions,
+    # shaped like cricket_data.json
+    def read(self, formats=None, styles=None, years=None):
+        data = {
+            format_type: {style: {} for style in format_styles if styles is None or style in styles}
+            for format_type, format_styles in self.layout.items()
+            if formats is None or format_type in formats
+        }
+        for entry, rows in self.iter_partitions(formats, styles, years):
+            data[entry["format"]][entry["style"]][entry["year"]] = rows
+        return data
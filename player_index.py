@@ -0,0 +1,89 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+# Upper bound on names handed to a selectbox
+MAX_OPTIONS = 200
+
+
+# Character trigrams of a lower-cased name, used for substring search
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PlayerIndex:
+    def __init__(self, names, offsets=None):
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        # style -> (starts, stops) row ranges per player id in a table sorted by player
+        self.offsets = offsets or {}
+
+        # Sorted keys for prefix lookups: the full name plus every later token,
+        # so "koh" finds "V Kohli" as well as "kohli" does
+        keys = []
+        self._grams = defaultdict(set)
+        for i, name in enumerate(self.names):
+            lowered = name.lower()
+            keys.append((lowered, i))
+            for token in lowered.split()[1:]:
+                keys.append((token, i))
+            for gram in _trigrams(lowered):
+                self._grams[gram].add(i)
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._ids = [i for _, i in keys]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    # Player ids whose name or any later name token starts with the query
+    def _prefix_ids(self, query):
+        lo = bisect_left(self._keys, query)
+        hi = bisect_left(self._keys, query + "\uffff")
+        return set(self._ids[lo:hi])
+
+    # Player ids whose name contains the query anywhere
+    def _substring_ids(self, query):
+        grams = _trigrams(query)
+        if not grams:
+            return set()
+        candidates = set.intersection(*(self._grams.get(gram, set()) for gram in grams))
+        return {i for i in candidates if query in self.names[i].lower()}
+
+    # Autocomplete: prefix matches first, then substring matches, in name order
+    def search(self, query, limit=MAX_OPTIONS, exclude=()):
+        query = query.strip().lower()
+        excluded = {self.positions[name] for name in exclude if name in self.positions}
+        if not query:
+            ids = [i for i in range(len(self.names)) if i not in excluded]
+            return [self.names[i] for i in ids[:limit]]
+
+        prefix_ids = sorted(self._prefix_ids(query) - excluded)
+        results = prefix_ids[:limit]
+        if len(results) < limit:
+            seen = set(prefix_ids) | excluded
+            results += sorted(self._substring_ids(query) - seen)[:limit - len(results)]
+        return [self.names[i] for i in results]
+
+    # Row range of a player in a table sorted by player, or None if unknown
+    def rows(self, style, name):
+        if style not in self.offsets or name not in self.positions:
+            return None
+        starts, stops = self.offsets[style]
+        i = self.positions[name]
+        return int(starts[i]), int(stops[i])
+
+
+# Index over tables whose rows are sorted by the shared Player Name categories
+def build_player_index(batting, bowling):
+    names = list(batting["Player Name"].cat.categories)
+    ids = np.arange(len(names))
+    offsets = {}
+    for style, table in [("batting", batting), ("bowling", bowling)]:
+        codes = table["Player Name"].cat.codes.to_numpy()
+        offsets[style] = (np.searchsorted(codes, ids, side="left"), np.searchsorted(codes, ids, side="right"))
+    return PlayerIndex(names, offsets)
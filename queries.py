@@ -0,0 +1,291 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import array_store
+import changefeed
+import dataset
+import packfile
+import storage
+from player_index import PlayerIndex, build_player_index
+from rankings import build_rank_index, player_names, replace_sums, yearly_sums
+from views import QueryViews, build_views
+
+# Both backends answer the same questions for the analytical views: the
+# in-memory one filters the typed tables, the SQL one runs indexed queries
+# against the embedded database file.
+
+# Rows per chunk when rows are streamed out, e.g. for an export
+CHUNK_ROWS = 50000
+
+
+class FrameBackend:
+    def __init__(self, batting, bowling, key="memory", index=None, sums=None, version=None, ranks=None, views=None,
+                 mapped=False):
+        self.tables = {"batting": batting, "bowling": bowling}
+        self.key = key
+        self.version = version
+        # Whether the tables are the version's mapped arrays
+        self.mapped = mapped
+        self.index = index or build_player_index(batting, bowling)
+        self.sums = yearly_sums(batting, bowling) if sums is None else sums
+        self.ranks = ranks if ranks is not None else build_rank_index(batting, bowling, self.sums)
+        # Top players per format and year span, built with the tables so the
+        # Format Wise and Year Wise pages only look results up
+        self.views = views or build_views(batting, bowling, self.ranks.names)
+
+    # Backend for a new version that differs in the partitions of `data`:
+    # only those rows are typed again, and only the yearly sums, rank spans
+    # and top player views covering the changed (format, year) cells are
+    # recomputed
+    def updated(self, data, key, version):
+        batting, bowling = dataset.replace_partitions(self.tables["batting"], self.tables["bowling"], data)
+        cells = {(format_type, int(year)) for format_type, styles in data.items() for years in styles.values() for year in years}
+        sums = replace_sums(self.sums, batting, bowling, cells)
+        ranks = self.ranks.updated(sums, player_names(batting, bowling), cells)
+        views = self.views.updated(batting, bowling, ranks.names, cells)
+        return FrameBackend(batting, bowling, key, sums=sums, version=version, ranks=ranks, views=views)
+
+    def player_names(self):
+        return self.index.names
+
+    def years(self):
+        years = set()
+        for table in self.tables.values():
+            years.update(table["Year"].unique().tolist())
+        return sorted(years)
+
+    # Rows of one player between two years, inclusive
+    def player_rows(self, style, player, start_year, end_year):
+        table = self.tables[style]
+        row_range = self.index.rows(style, player)
+        if row_range is None:
+            return table.iloc[0:0]
+        rows = table.iloc[row_range[0]:row_range[1]]
+        return rows[rows["Year"].between(int(start_year), int(end_year))]
+
+    # Every row of the given players
+    def players_rows(self, style, players):
+        table = self.tables[style]
+        ranges = [self.index.rows(style, player) for player in players]
+        return pd.concat([table.iloc[start:stop] for start, stop in filter(None, ranges)] or [table.iloc[0:0]])
+
+    def all_rows(self, style):
+        return self.tables[style]
+
+    # Rows of one format between two years, inclusive
+    def format_rows(self, style, format_type, start_year, end_year):
+        table = self.tables[style]
+        return table[(table["Format"] == format_type) & (table["Year"].between(int(start_year), int(end_year)))]
+
+    # Rows of some formats (and players, when given) between two years in
+    # chunks of at most `chunk_rows`; only one chunk is copied at a time.
+    # Nothing matching still yields one empty chunk with the columns.
+    def iter_rows(self, style, formats, start_year, end_year, players=None, chunk_rows=CHUNK_ROWS):
+        table = self.tables[style]
+        mask = table["Format"].isin(formats) & table["Year"].between(int(start_year), int(end_year))
+        if players is not None:
+            mask &= table["Player Name"].isin(players)
+        positions = np.flatnonzero(mask.to_numpy())
+        for start in range(0, max(len(positions), 1), chunk_rows):
+            yield table.iloc[positions[start:start + chunk_rows]]
+
+    # Per-player sum of a metric (and mean Average) for a format and year range
+    def player_totals(self, style, format_type, start_year, end_year, metric, limit=None):
+        rows = self.format_rows(style, format_type, start_year, end_year)
+        totals = rows.groupby("Player ID", as_index=False).agg({"Player Name": "first", metric: "sum", "Average": "mean"})
+        totals["Player Name"] = totals["Player Name"].astype(str)
+        if limit is not None:
+            return totals.nlargest(limit, metric).reset_index(drop=True)
+        return totals.sort_values(metric, ascending=False, ignore_index=True)
+
+
+class SqlBackend:
+    def __init__(self, db_path, engine="sqlite", key=None, version=None, ranks=None, views=None):
+        self.db_path = db_path
+        self.engine = engine
+        self.key = key or db_path
+        self.version = version
+        self._duckdb = None
+        self._index = None
+        self._ranks = ranks
+        self._views = views
+        # Whether the rank index and views are the version's mapped arrays
+        self.mapped = ranks is not None and views is not None
+        self._lock = threading.Lock()
+
+    # Name-only index, built on first use from the database
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = PlayerIndex(self.player_names())
+        return self._index
+
+    # Rank and percentile index stored with the dataset version, or else
+    # built on first use from the database
+    @property
+    def ranks(self):
+        if self._ranks is None:
+            self._ranks = build_rank_index(self.all_rows("batting"), self.all_rows("bowling"))
+        return self._ranks
+
+    # Top player views stored with the dataset version, or else answered by
+    # aggregate queries against the database
+    @property
+    def views(self):
+        if self._views is None:
+            self._views = QueryViews(self)
+        return self._views
+
+    # SQLite connections are cheap and not shared across threads, so each
+    # query opens its own; DuckDB hands out a cursor per query instead
+    def _query(self, sql, params=()):
+        if self.engine == "duckdb":
+            with self._lock:
+                if self._duckdb is None:
+                    self._duckdb = storage.duckdb.connect(self.db_path, read_only=True)
+                cursor = self._duckdb.cursor()
+            try:
+                return cursor.execute(sql, list(params)).df()
+            finally:
+                cursor.close()
+        con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            return pd.read_sql_query(sql, con, params=list(params))
+        finally:
+            con.close()
+
+    # _query fetched `chunk_rows` rows at a time from an open cursor
+    def _query_chunks(self, sql, params=(), chunk_rows=CHUNK_ROWS):
+        if self.engine == "duckdb":
+            with self._lock:
+                if self._duckdb is None:
+                    self._duckdb = storage.duckdb.connect(self.db_path, read_only=True)
+                cursor = self._duckdb.cursor()
+            close = cursor.close
+        else:
+            con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            cursor = con.cursor()
+            close = con.close
+        try:
+            cursor.execute(sql, list(params))
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchmany(chunk_rows)
+            yield pd.DataFrame(rows, columns=columns)
+            while len(rows) == chunk_rows:
+                rows = cursor.fetchmany(chunk_rows)
+                if rows:
+                    yield pd.DataFrame(rows, columns=columns)
+        finally:
+            close()
+
+    def player_names(self):
+        names = self._query(
+            'SELECT "Player Name" FROM batting UNION SELECT "Player Name" FROM bowling ORDER BY 1'
+        )
+        return names["Player Name"].tolist()
+
+    def years(self):
+        years = self._query('SELECT "Year" FROM batting UNION SELECT "Year" FROM bowling ORDER BY 1')
+        return [int(year) for year in years["Year"]]
+
+    def player_rows(self, style, player, start_year, end_year):
+        return self._query(
+            f'SELECT * FROM {style} WHERE "Player Name" = ? AND "Year" BETWEEN ? AND ? ORDER BY "Year"',
+            (player, int(start_year), int(end_year)),
+        )
+
+    def players_rows(self, style, players):
+        placeholders = ", ".join("?" for _ in players)
+        return self._query(f'SELECT * FROM {style} WHERE "Player Name" IN ({placeholders}) ORDER BY "Year"', tuple(players))
+
+    def all_rows(self, style):
+        return self._query(f"SELECT * FROM {style}")
+
+    def format_rows(self, style, format_type, start_year, end_year):
+        return self._query(
+            f'SELECT * FROM {style} WHERE "Format" = ? AND "Year" BETWEEN ? AND ?',
+            (format_type, int(start_year), int(end_year)),
+        )
+
+    def iter_rows(self, style, formats, start_year, end_year, players=None, chunk_rows=CHUNK_ROWS):
+        sql = f'SELECT * FROM {style} WHERE "Format" IN ({", ".join("?" for _ in formats)}) AND "Year" BETWEEN ? AND ?'
+        params = [*formats, int(start_year), int(end_year)]
+        if players is not None:
+            sql += f' AND "Player Name" IN ({", ".join("?" for _ in players)})'
+            params += list(players)
+        return self._query_chunks(sql, params, chunk_rows)
+
+    def player_totals(self, style, format_type, start_year, end_year, metric, limit=None):
+        sql = (
+            f'SELECT "Player ID", MIN("Player Name") AS "Player Name", SUM("{metric}") AS "{metric}", '
+            f'AVG("Average") AS "Average" '
+            f'FROM {style} WHERE "Format" = ? AND "Year" BETWEEN ? AND ? '
+            f'GROUP BY "Player ID" ORDER BY 3 DESC, 1'
+        )
+        params = [format_type, int(start_year), int(end_year)]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._query(sql, params)
+
+
+def _mapped_backend(stored, key, version):
+    return FrameBackend(
+        stored["batting"], stored["bowling"], key,
+        index=stored["index"], sums=stored["sums"], version=version, ranks=stored["ranks"], views=stored["views"],
+        mapped=True,
+    )
+
+
+# Backend for the given name: "memory" (default), "sqlite" or "duckdb".
+# A dataset version, when given, is part of the backend key so that caches
+# keyed on it are invalidated by a new version. Without tables, the memory
+# backend maps the version's arrays written by convert.py, or else parses
+# the JSON file; the SQL backends take the rank index and the top player
+# views from those arrays.
+def open_backend(name, data_file, batting=None, bowling=None, version=None):
+    if name in storage.DATABASE_FILES:
+        db_path, engine = storage.ensure_database(data_file, name)
+        stored = array_store.open_arrays(data_file, version)
+        return SqlBackend(db_path, engine, key=f"{db_path}@{version}" if version else None, version=version,
+                          ranks=stored["ranks"] if stored is not None else None,
+                          views=stored["views"] if stored is not None else None)
+    key = f"memory@{version}" if version else "memory"
+    if batting is None:
+        stored = array_store.open_arrays(data_file, version)
+        if stored is not None:
+            return _mapped_backend(stored, key, version)
+        batting, bowling = dataset.build_tables(dataset.read_data(data_file))
+    return FrameBackend(batting, bowling, key, version=version)
+
+
+# The in-memory backend moved forward to a new version by applying the
+# change feed: only the changed partitions are decoded from the packed file.
+# When the new version's arrays have been written they are mapped instead,
+# as a full load would. None when there is no unbroken feed from the
+# backend's version, or for the SQL backends, which rebuild their database
+# file instead.
+def update_backend(backend, data_file, version):
+    if not isinstance(backend, FrameBackend) or backend.version is None or not data_file.endswith(".pack"):
+        return None
+    stored = array_store.open_arrays(data_file, version)
+    if stored is not None:
+        return _mapped_backend(stored, f"memory@{version}", version)
+    records = changefeed.changes_between(data_file, backend.version, version)
+    if records is None:
+        return None
+    data = {}
+    reader = packfile.PackReader(data_file)
+    for format_type, style, year in changefeed.summarize(records)["partitions"]:
+        rows = reader.read([format_type], [style], [year])[format_type][style].get(str(year), [])
+        data.setdefault(format_type, {}).setdefault(style, {})[str(year)] = rows
+    return backend.updated(data, f"memory@{version}", version)
+
+
+# Whether a backend opened without the arrays of its version should be
+# opened again now that convert.py or scrap_data.py has written them
+def backend_stale(backend, data_file, version):
+    return not backend.mapped and array_store.has_arrays(data_file, version)
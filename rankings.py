@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+
+# Ranked metrics; True where a lower value ranks higher
+METRICS = {
+    "Runs": False,
+    "Batting Average": False,
+    "Strike Rate": False,
+    "Boundaries": False,
+    "Wickets": False,
+    "Economy": True,
+}
+# Innings needed in a span to be ranked on a rate (average, strike rate, economy)
+MIN_INNINGS = 3
+
+BATTING_SUMS = ["Innings", "Not Outs", "Runs", "Balls Faced", "4s", "6s"]
+BOWLING_SUMS = ["Innings", "Runs", "Wickets", "Balls"]
+
+
+# Per (player, format, year) sums the metrics are derived from
+def yearly_sums(batting, bowling):
+    keys = ["Player ID", "Format", "Year"]
+    bat = batting.astype({"Format": str}).groupby(keys)[BATTING_SUMS].sum()
+    bowling = bowling.assign(Balls=dataset.overs_to_float(bowling["Overs"].astype(float)) * 6)
+    bowl = bowling.astype({"Format": str}).groupby(keys)[BOWLING_SUMS].sum()
+    bowl.columns = ["Bowling " + col for col in BOWLING_SUMS]
+    return bat.join(bowl, how="outer").fillna(0).astype(np.float64)
+
+
+# Metric values from summed columns; NaN where a player is not eligible
+def derive_metrics(sums):
+    batted = sums["Innings"] > 0
+    bowled = sums["Bowling Innings"] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dismissals = sums["Innings"] - sums["Not Outs"]
+        metrics = pd.DataFrame({
+            "Runs": sums["Runs"].where(batted),
+            "Batting Average": (sums["Runs"] / dismissals).where((sums["Innings"] >= MIN_INNINGS) & (dismissals > 0)),
+            "Strike Rate": (sums["Runs"] / sums["Balls Faced"] * 100).where((sums["Innings"] >= MIN_INNINGS) & (sums["Balls Faced"] > 0)),
+            "Boundaries": (sums["4s"] + sums["6s"]).where(batted),
+            "Wickets": sums["Bowling Wickets"].where(bowled),
+            "Economy": (sums["Bowling Runs"] / sums["Bowling Balls"] * 6).where(
+                (sums["Bowling Innings"] >= MIN_INNINGS) & (sums["Bowling Balls"] > 0)
+            ),
+        }, index=sums.index)
+    return metrics
+
+
+# Dense rank (1 = best) and percentile (100 = best) of every metric within
+# each group, plus the number of players ranked on it
+def rank_metrics(metrics, group_keys):
+    ranked = metrics.copy()
+    groups = metrics.groupby(level=group_keys)
+    for metric, lower_is_better in METRICS.items():
+        grouped = groups[metric]
+        ranked[f"{metric} Rank"] = grouped.rank(method="dense", ascending=lower_is_better)
+        ranked[f"{metric} Percentile"] = grouped.rank(method="max", ascending=not lower_is_better, pct=True) * 100
+        ranked[f"{metric} Ranked"] = grouped.transform("count")
+    return ranked
+
+
+# Ranked metrics for the given (start, end) spans, as positions into
+# `years`: per-span sums come from cumulative yearly sums, and all spans are
+# ranked in one grouped sort
+def _rank_spans(sums, years, starts, ends):
+    grid = sums.unstack("Year", fill_value=0)
+    entities = grid.index
+    columns = {}
+    for col in sums.columns:
+        values = grid[col].reindex(columns=years, fill_value=0).to_numpy()
+        cumulative = np.hstack([np.zeros((len(values), 1)), np.cumsum(values, axis=1)])
+        columns[col] = (cumulative[:, ends + 1] - cumulative[:, starts]).ravel()
+
+    span_sums = pd.DataFrame(columns, index=pd.MultiIndex.from_arrays(
+        [
+            np.repeat(entities.get_level_values("Format").to_numpy(), len(starts)),
+            np.tile(np.asarray(years)[starts], len(entities)),
+            np.tile(np.asarray(years)[ends], len(entities)),
+            np.repeat(entities.get_level_values("Player ID").to_numpy(), len(starts)),
+        ],
+        names=["Format", "Start", "End", "Player ID"],
+    ))
+    span_sums = span_sums[(span_sums["Innings"] > 0) | (span_sums["Bowling Innings"] > 0)]
+    return rank_metrics(derive_metrics(span_sums), ["Format", "Start", "End"])
+
+
+# Ranks for every format and every (start, end) year span, single years
+# included, computed together
+class RankIndex:
+    def __init__(self, sums, names, table=None):
+        self.names = names
+        years = sums.index.get_level_values("Year")
+        self.years = list(range(int(years.min()), int(years.max()) + 1)) if len(sums) else []
+        if table is None:
+            starts, ends = np.triu_indices(len(self.years))
+            table = _rank_spans(sums, self.years, starts, ends).sort_index()
+        self.table = table
+
+    # Index for new yearly sums that differ only in the given (format, year)
+    # cells: spans covering none of them keep their ranks, the others are
+    # ranked again
+    def updated(self, sums, names, cells):
+        years = sums.index.get_level_values("Year")
+        if not len(sums) or list(range(int(years.min()), int(years.max()) + 1)) != self.years:
+            return RankIndex(sums, names)
+        starts, ends = np.triu_indices(len(self.years))
+        table = self.table
+        fresh = []
+        for format_type in sorted({format_type for format_type, _ in cells}):
+            changed = np.array([self.years.index(year) for cell_format, year in cells if cell_format == format_type])
+            covering = ((starts[:, None] <= changed) & (changed <= ends[:, None])).any(axis=1)
+            spans = pd.MultiIndex.from_arrays(
+                [[format_type] * covering.sum(), np.asarray(self.years)[starts[covering]], np.asarray(self.years)[ends[covering]]]
+            )
+            table = table[~table.index.droplevel("Player ID").isin(spans)]
+            format_sums = sums[sums.index.get_level_values("Format") == format_type]
+            fresh.append(_rank_spans(format_sums, self.years, starts[covering], ends[covering]))
+        return RankIndex(sums, names, pd.concat([table, *fresh]).sort_index())
+
+    def __len__(self):
+        return len(self.table)
+
+    def _span(self, format_type, start_year, end_year):
+        try:
+            return self.table.loc[(format_type, int(start_year), int(end_year))]
+        except KeyError:
+            return self.table.iloc[0:0].droplevel(["Format", "Start", "End"])
+
+    # Value, rank and percentile of each metric for one player, per format
+    def player_ranks(self, player_id, start_year, end_year, formats=dataset.FORMATS):
+        rows = []
+        for format_type in formats:
+            span = self._span(format_type, start_year, end_year)
+            if player_id not in span.index:
+                continue
+            ranks = span.loc[player_id]
+            for metric in METRICS:
+                if pd.isna(ranks[metric]):
+                    continue
+                rows.append({
+                    "Format": format_type,
+                    "Metric": metric,
+                    "Value": ranks[metric],
+                    "Rank": int(ranks[f"{metric} Rank"]),
+                    "Of": int(ranks[f"{metric} Ranked"]),
+                    "Percentile": ranks[f"{metric} Percentile"],
+                })
+        return pd.DataFrame(rows, columns=["Format", "Metric", "Value", "Rank", "Of", "Percentile"])
+
+    # Percentile of every metric for the given players in one format and span
+    def percentiles(self, player_ids, format_type, start_year, end_year):
+        span = self._span(format_type, start_year, end_year)
+        table = span.reindex(list(player_ids))[[f"{metric} Percentile" for metric in METRICS]]
+        table.columns = list(METRICS)
+        table.index = table.index.map(self.names).rename("Player Name")
+        return table
+
+    # Leaderboard of any length for one metric, best first
+    def leaderboard(self, metric, format_type, start_year, end_year, limit=None):
+        span = self._span(format_type, start_year, end_year).dropna(subset=[metric])
+        board = span.sort_values([f"{metric} Rank", metric], ascending=[True, METRICS[metric]])
+        board = board[[metric, f"{metric} Rank", f"{metric} Percentile"]].head(limit).reset_index()
+        board.insert(1, "Player Name", board["Player ID"].map(self.names))
+        board = board.rename(columns={f"{metric} Rank": "Rank", f"{metric} Percentile": "Percentile"})
+        return board.drop(columns="Player ID").astype({"Rank": int})
+
+
+# Yearly sums with the given (format, year) cells summed again from the
+# new tables; every other cell is kept
+def replace_sums(sums, batting, bowling, cells):
+    cell_index = pd.MultiIndex.from_tuples(sorted(cells), names=["Format", "Year"])
+    kept = sums[~sums.index.droplevel("Player ID").isin(cell_index)]
+
+    def in_cells(table):
+        return pd.MultiIndex.from_arrays([table["Format"].astype(str), table["Year"]]).isin(cell_index)
+
+    fresh = yearly_sums(batting[in_cells(batting)], bowling[in_cells(bowling)])
+    return pd.concat([kept, fresh]).sort_index()
+
+
+# Player ID -> name for the typed tables
+def player_names(batting, bowling):
+    names = pd.concat([batting[["Player ID", "Player Name"]], bowling[["Player ID", "Player Name"]]])
+    return names.astype({"Player Name": str}).drop_duplicates("Player ID").set_index("Player ID")["Player Name"]
+
+
+# Rank index for the typed tables; `sums` can be passed in when the yearly
+# sums were precomputed (see array_store)
+def build_rank_index(batting, bowling, sums=None):
+    return RankIndex(yearly_sums(batting, bowling) if sums is None else sums, player_names(batting, bowling))
@@ -0,0 +1,162 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+
+import changefeed
+import dataset
+import versioning
+
+HISTORY_FILE = "ratings_history.csv"
+HISTORY_COLUMNS = ["Player ID", "Player Name", "Format", "Year", "Batting Rating", "Bowling Rating"]
+HISTORY_DTYPES = {"Player ID": "int32", "Player Name": str, "Format": str, "Year": "int16",
+                  "Batting Rating": "float64", "Bowling Rating": "float64"}
+
+# Each year a rating moves (1 - DECAY) of the way towards that year's
+# performance index, where 100 is the average output of the players who
+# batted (or bowled) in that format that year. Years without a match pull
+# the rating towards zero, so a player out of the side fades gradually.
+DECAY = 0.7
+BASELINE = 100
+# Ratings that have faded below this are no longer carried forward
+MIN_RATING = 1.0
+# Dataset version the stored history was computed from
+RATED_FILE = "ratings_manifest.json"
+
+
+# Performance index per (player, format) for one year, 100 = format average
+def yearly_performance(batting_rows, bowling_rows, year):
+    bat = batting_rows[(batting_rows["Year"] == year) & (batting_rows["Innings"] > 0)]
+    bat_points = (bat["Runs"] + bat["4s"] + 2 * bat["6s"] - 2 * bat["Ducks"]).astype(float)
+    bat_points = bat_points.groupby([bat["Player ID"], bat["Format"].astype(str)]).sum()
+
+    bowl = bowling_rows[(bowling_rows["Year"] == year) & (bowling_rows["Innings"] > 0)]
+    bowl_points = (25 * bowl["Wickets"]).astype(float)
+    bowl_points = bowl_points.groupby([bowl["Player ID"], bowl["Format"].astype(str)]).sum()
+
+    performance = pd.DataFrame({"Batting": bat_points, "Bowling": bowl_points})
+    performance.index.names = ["Player ID", "Format"]
+    format_means = performance.groupby(level="Format").transform("mean")
+    return (performance / format_means.where(format_means > 0) * BASELINE).fillna(0)
+
+
+# Latest carried-forward ratings before `year`, decayed over any skipped years
+def _previous_ratings(history, year, decay):
+    earlier = history[history["Year"] < year]
+    if earlier.empty:
+        empty = pd.MultiIndex.from_tuples([], names=["Player ID", "Format"])
+        return pd.DataFrame({"Batting": [], "Bowling": []}, index=empty, dtype="float64")
+    latest = earlier.sort_values("Year").groupby(["Player ID", "Format"]).tail(1)
+    factor = decay ** (year - latest["Year"] - 1).to_numpy()
+    previous = pd.DataFrame({
+        "Batting": latest["Batting Rating"].to_numpy() * factor,
+        "Bowling": latest["Bowling Rating"].to_numpy() * factor,
+    }, index=pd.MultiIndex.from_arrays([latest["Player ID"], latest["Format"].astype(str)], names=["Player ID", "Format"]))
+    return previous
+
+
+# Recompute one year's ratings from the year before it, replacing that year
+def update_ratings(history, batting_rows, bowling_rows, year, decay=DECAY):
+    previous = _previous_ratings(history, year, decay)
+    performance = yearly_performance(batting_rows, bowling_rows, year)
+    previous, performance = previous.align(performance, join="outer", fill_value=0)
+    ratings = decay * previous + (1 - decay) * performance
+
+    played = ratings.index.isin(performance[(performance > 0).any(axis=1)].index)
+    ratings = ratings[played | (ratings.max(axis=1) >= MIN_RATING)]
+
+    names = pd.concat([
+        history[["Player ID", "Player Name"]],
+        batting_rows[["Player ID", "Player Name"]].astype({"Player Name": str}),
+        bowling_rows[["Player ID", "Player Name"]].astype({"Player Name": str}),
+    ]).drop_duplicates("Player ID", keep="last").set_index("Player ID")["Player Name"]
+
+    rows = ratings.reset_index().rename(columns={"Batting": "Batting Rating", "Bowling": "Bowling Rating"})
+    rows["Year"] = year
+    rows["Player Name"] = rows["Player ID"].map(names)
+    rows = rows[HISTORY_COLUMNS].round({"Batting Rating": 2, "Bowling Rating": 2})
+
+    kept = history[history["Year"] != year]
+    return pd.concat([kept, rows], ignore_index=True).sort_values(["Year", "Format", "Player ID"], ignore_index=True)
+
+
+# Bring the history up to date: every year from `since` (the earliest year
+# whose rows changed) is recomputed and rolled forward, as is the latest
+# stored year (the current season is refreshed nightly), and any newer years
+# are appended. Returns the updated history and the years (re)computed.
+def refresh_history(history, batting_rows, bowling_rows, since=None, decay=DECAY):
+    data_years = sorted(set(batting_rows["Year"].tolist()) | set(bowling_rows["Year"].tolist()))
+    if not data_years:
+        return history, []
+    start = int(history["Year"].max()) if not history.empty else data_years[0]
+    if since is not None:
+        start = min(start, int(since))
+    years = list(range(max(start, data_years[0]), data_years[-1] + 1))
+    for year in years:
+        history = update_ratings(history, batting_rows, bowling_rows, year, decay)
+    return history, years
+
+
+# Earliest year whose rows changed between the dataset version the history
+# was rated from and `version`, read from the change feed. None when nothing
+# changed; 0 (every year) when the rated version is unknown or the feed
+# does not reach back to it.
+def changed_since(data_file, version, rated_file=RATED_FILE):
+    rated = rated_version(rated_file)
+    if rated == version:
+        return None
+    records = changefeed.changes_between(data_file, rated, version) if rated else None
+    if records is None:
+        return 0
+    cells = changefeed.summarize(records)["cells"]
+    return min(year for _, year in cells) if cells else None
+
+
+def rated_version(rated_file=RATED_FILE):
+    try:
+        with open(rated_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+def load_history(history_file=HISTORY_FILE):
+    if not os.path.exists(history_file):
+        return pd.DataFrame(columns=HISTORY_COLUMNS).astype(HISTORY_DTYPES)
+    return pd.read_csv(history_file, dtype=HISTORY_DTYPES)
+
+
+# Write the history, and the dataset version it was rated from when known
+def save_history(history, history_file=HISTORY_FILE, version=None, rated_file=RATED_FILE):
+    versioning.write_atomic(history_file, history.to_csv(index=False).encode("utf-8"))
+    if version is not None:
+        versioning.write_atomic(rated_file, json.dumps({"version": version}).encode("utf-8"))
+
+
+# Top rated players for one format as of a year
+def top_rated(history, format_type, year, rating, limit=5):
+    rows = history[(history["Format"] == format_type) & (history["Year"] == year)]
+    return rows.nlargest(limit, rating)[["Player Name", rating]].reset_index(drop=True)
+
+
+def main():
+    history = load_history()
+    data_file = dataset.default_data_file()
+    version = versioning.dataset_version(data_file)
+    since = changed_since(data_file, version)
+    # Only the seasons from the earliest changed (or latest rated) one
+    # onwards are recomputed, so only those seasons are decoded
+    years = None
+    if not history.empty and since != 0:
+        first = int(history["Year"].max()) if since is None else min(int(history["Year"].max()), since)
+        years = range(first, datetime.date.today().year + 1)
+    batting, bowling = dataset.build_tables(dataset.read_data(data_file, years=years))
+
+    history, years = refresh_history(history, batting, bowling, since)
+    save_history(history, version=version)
+    print(f"Ratings updated for {', '.join(map(str, years)) or 'no years'} in {HISTORY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
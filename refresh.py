@@ -0,0 +1,283 @@
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import uuid
+
+import dataset
+import versioning
+
+# One JSON file per refresh job. The app and the CLI only add queued jobs;
+# the single worker process is the only writer once a job has started.
+#   {"id", "partitions": ["format/style/year"], "strict", "status": queued |
+#    running | done | failed, "queued_at", "started_at", "finished_at",
+#    "checked", "total", "published": [keys], "message", "version"}
+REFRESH_DIR = "refresh_jobs"
+# Held by the running worker, with its process ID
+WORKER_LOCK = "worker.pid"
+WORKER_LOG = "worker.log"
+FIRST_YEAR = 2011
+# Most recent jobs listed by `status` and the app
+JOBS_SHOWN = 5
+# Finished jobs kept on disk
+KEEP_JOBS = 50
+
+SCRAPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrap_data.py")
+CHECKED_LINE = re.compile(r"^Checked (\d+)/(\d+)")
+
+
+def job_path(job_id):
+    return os.path.join(REFRESH_DIR, f"{job_id}.json")
+
+
+def save_job(job):
+    os.makedirs(REFRESH_DIR, exist_ok=True)
+    versioning.write_atomic(job_path(job["id"]), json.dumps(job, indent=4).encode("utf-8"))
+
+
+def load_job(job_id):
+    try:
+        with open(job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Jobs newest first; ids start with the queue time, to the microsecond, so
+# they sort by it
+def list_jobs():
+    try:
+        names = sorted((name for name in os.listdir(REFRESH_DIR) if name.endswith(".json")), reverse=True)
+    except OSError:
+        return []
+    jobs = (load_job(name[:-len(".json")]) for name in names)
+    return [job for job in jobs if job]
+
+
+def years():
+    return list(range(FIRST_YEAR, datetime.date.today().year + 1))
+
+
+# "format/style/year" keys of every selected combination, most recent first
+def partition_keys(formats, styles, selected_years):
+    unknown = (set(formats) - set(dataset.FORMATS)) | (set(styles) - set(dataset.STYLES)) | \
+        ({int(year) for year in selected_years} - set(years()))
+    if unknown:
+        raise ValueError(f"Unknown formats, styles or years: {', '.join(map(str, sorted(unknown, key=str)))}")
+    return [
+        f"{format_type}/{style}/{year}"
+        for year in sorted({int(year) for year in selected_years}, reverse=True)
+        for format_type in dataset.FORMATS if format_type in formats
+        for style in dataset.STYLES if style in styles
+    ]
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def enqueue(partitions, strict=False):
+    if not partitions:
+        raise ValueError("No partitions selected")
+    job = {
+        "id": f"{datetime.datetime.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:6]}",
+        "partitions": list(partitions),
+        "strict": strict,
+        "status": "queued",
+        "queued_at": _now(),
+        "checked": 0,
+        "total": len(partitions),
+        "published": [],
+        "message": "Waiting for the worker",
+    }
+    save_job(job)
+    return job
+
+
+def _pid_alive(pid):
+    # os.kill ends the process on Windows instead of probing it
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _lock_path():
+    return os.path.join(REFRESH_DIR, WORKER_LOCK)
+
+
+# Process ID of the running worker, if any
+def worker_pid():
+    try:
+        with open(_lock_path(), "r") as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    return pid if _pid_alive(pid) else None
+
+
+# Take the worker lock; a lock left by a dead worker is taken over
+def _acquire_lock():
+    os.makedirs(REFRESH_DIR, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(_lock_path(), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if worker_pid() is not None:
+                return False
+            try:
+                os.remove(_lock_path())
+            except OSError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def _release_lock():
+    try:
+        os.remove(_lock_path())
+    except OSError:
+        pass
+
+
+# Start the worker as a detached process unless one is running. Returns
+# immediately, so it is safe to call from the Streamlit script thread.
+def start_worker():
+    if worker_pid() is not None:
+        return False
+    os.makedirs(REFRESH_DIR, exist_ok=True)
+    with open(os.path.join(REFRESH_DIR, WORKER_LOG), "a", encoding="utf-8") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "worker"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            cwd=os.getcwd(), start_new_session=True,
+        )
+    return True
+
+
+# Scrape the job's partitions straight into the dataset in a child process,
+# recording its progress lines in the job file as they arrive. Each partition
+# is published as its own version while the scrape runs.
+def run_job(job):
+    job.update(status="running", started_at=_now(), message="Starting the scraper")
+    save_job(job)
+    command = [sys.executable, "-u", SCRAPER, "--direct", "--partitions", ",".join(job["partitions"])]
+    if job.get("strict"):
+        command.append("--strict")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, encoding="utf-8", errors="replace")
+    for line in process.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        print(line, flush=True)
+        checked = CHECKED_LINE.match(line)
+        if checked:
+            job["checked"], job["total"] = int(checked.group(1)), int(checked.group(2))
+        elif line.startswith("✅ Published:"):
+            job["published"].append(line.split(":", 1)[1].split("(")[0].strip().replace(" ", "/"))
+        job["message"] = line
+        save_job(job)
+    returncode = process.wait()
+
+    job["finished_at"] = _now()
+    if returncode == 0:
+        job["status"] = "done"
+        if os.path.exists(dataset.DATA_FILE):
+            job["version"] = versioning.dataset_version(dataset.DATA_FILE)
+    else:
+        job["status"] = "failed"
+        job["message"] = f"Scraper exited with code {returncode}: {job['message']}"
+    save_job(job)
+    return job
+
+
+def _prune_jobs():
+    finished = [job for job in list_jobs() if job["status"] in ("done", "failed")]
+    for job in finished[KEEP_JOBS:]:
+        try:
+            os.remove(job_path(job["id"]))
+        except OSError:
+            pass
+
+
+# Run queued jobs oldest first until none are left. Only one worker runs at
+# a time; the queue is checked again after the lock is released, so a job
+# queued while the worker was stopping is not left behind.
+def work():
+    while _acquire_lock():
+        try:
+            # Jobs still marked running were left by a worker that died
+            for job in list_jobs():
+                if job["status"] == "running":
+                    job.update(status="failed", finished_at=_now(), message="Worker stopped before the job finished")
+                    save_job(job)
+            while True:
+                queued = [job for job in list_jobs() if job["status"] == "queued"]
+                if not queued:
+                    break
+                job = run_job(queued[-1])
+                print(f"Job {job['id']} {job['status']}: {len(job['published'])} partitions published", flush=True)
+            _prune_jobs()
+        finally:
+            _release_lock()
+        if not any(job["status"] == "queued" for job in list_jobs()):
+            break
+
+
+def describe(job):
+    progress = f"{job['checked']}/{job['total']}"
+    version = f", version {job['version']}" if job.get("version") else ""
+    return f"{job['id']} {job['status']} {progress} checked, {len(job['published'])} published{version}: {job['message']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh dataset partitions in a background worker")
+    parser.add_argument("command", nargs="?", default="enqueue", choices=["enqueue", "status", "worker"])
+    parser.add_argument("--formats", nargs="+", default=dataset.FORMATS)
+    parser.add_argument("--styles", nargs="+", default=dataset.STYLES)
+    parser.add_argument("--years", nargs="+", type=int, default=years()[-2:])
+    parser.add_argument("--strict", action="store_true", help="keep partitions that fail validation out")
+    parser.add_argument("--wait", action="store_true", help="follow the job until it finishes")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        work()
+        return
+    if args.command == "status":
+        jobs = list_jobs()[:JOBS_SHOWN]
+        print("\n".join(describe(job) for job in jobs) if jobs else "No refresh jobs")
+        print(f"Worker running (pid {worker_pid()})" if worker_pid() else "Worker idle")
+        return
+
+    try:
+        job = enqueue(partition_keys(args.formats, args.styles, args.years), args.strict)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Queued {job['id']}: {len(job['partitions'])} partitions")
+    print("Worker started" if start_worker() else "Worker already running")
+    if args.wait:
+        last = None
+        while job["status"] in ("queued", "running"):
+            time.sleep(1)
+            job = load_job(job["id"]) or job
+            if describe(job) != last:
+                last = describe(job)
+                print(last)
+        sys.exit(0 if job["status"] == "done" else 1)
+
+
+if __name__ == "__main__":
+    main()
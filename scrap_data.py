@@ -1,20 +1,48 @@
 import asyncio
 import csv
+import datetime
+import hashlib
+import json
 import os
-from playwright.async_api import async_playwright, TimeoutError
+import sys
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError
+
+import convert
+import dataset
+import packfile
+import ratings
+import validation
+import versioning
 
 BASE_URL = "https://stats.espncricinfo.com/ci/engine/stats/index.html"
 
 FORMATS = {"test": 1, "odi": 2, "t20": 3}
 TYPES = ["batting", "bowling"]
 TEAM_ID = 6
-YEARS = range(2011, 2026)
+YEARS = range(2011, datetime.date.today().year + 1)
+# The current and previous year can still change; older years are closed and
+# only fetched when never stored before, or with --all-years
+OPEN_YEARS = 2
 
 OUTPUT_DIR = "cricket_stats"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Limit concurrency to avoid Cricinfo blocking
-sem = asyncio.Semaphore(2)
+# --direct writes each scraped partition straight into the packed dataset
+# instead of a CSV for convert.py; --csv keeps the CSV copy for auditing
+DIRECT = "--direct" in sys.argv
+WRITE_CSV = not DIRECT or "--csv" in sys.argv
+# --strict keeps partitions that fail validation out of the dataset
+STRICT = "--strict" in sys.argv
+# --partitions test/batting/2025,odi/bowling/2024 checks only those
+# partitions, closed years included
+PARTITIONS = sys.argv[sys.argv.index("--partitions") + 1].split(",") if "--partitions" in sys.argv else None
+
+# Pages fetched at once, one browser each, to avoid Cricinfo blocking
+WORKERS = 2
+
+# Per partition: the page's ETag / Last-Modified and a hash of its raw table
+# rows, used to skip partitions whose page has not changed
+SCRAPE_MANIFEST = "scrape_manifest.json"
 
 # Correct headers per format & type
 headers = {
@@ -47,85 +75,225 @@ headers = {
 }
 
 
-async def scrape_data(format_name, format_id, stat_type):
-    async with sem:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            # Increase timeout
-            page.set_default_timeout(120000)
-            page.set_default_navigation_timeout(120000)
-
-            for year in YEARS:
-                url = (
-                    f"{BASE_URL}?class={format_id};"
-                    f"spanmax1=31+Dec+{year};spanmin1=01+Jan+{year};"
-                    f"spanval1=span;team={TEAM_ID};"
-                    f"template=results;type={stat_type}"
-                )
-
-                print(f"Scraping: {format_name.upper()} | {stat_type.upper()} | {year}")
-
-                success = False
-                for attempt in range(3):
-                    try:
-                        await page.goto(url, wait_until="domcontentloaded", timeout=120000)
-                        await page.wait_for_selector("table", timeout=120000)
-                        success = True
-                        break
-                    except TimeoutError:
-                        print(f"⚠ Timeout: {url} (Attempt {attempt+1}/3)")
-                        await asyncio.sleep(5)
-
-                if not success:
-                    print(f"❌ Skipping {format_name} {stat_type} {year}")
-                    continue
-
-                rows = await page.locator("tr.data1").all()
-                player_data = []
+def save_csv(format_name, stat_type, year, player_data):
+    file_name = f"{format_name}_{stat_type}_{year}.csv"
+    file_path = os.path.join(OUTPUT_DIR, file_name)
 
-                expected_cols = len(headers[format_name][stat_type]) - 1  # without Year
+    with open(file_path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(headers[format_name][stat_type])
+        writer.writerows(player_data)
 
-                for row in rows:
-                    cells = [cell.strip() for cell in await row.locator("td").all_inner_texts()]
-                    cells = [cell for cell in cells if cell]
+    print(f"✅ Saved: {file_path}")
 
-                    if not cells:
-                        continue
 
-                    # Fix column shifting issue
-                    if len(cells) >= expected_cols:
-                        cells = cells[:expected_cols]  # Trim extra
-                    else:
-                        continue  # Skip broken rows
+# Parse the scraped cells once into typed rows and publish them as one
+# partition of the dataset. Each partition is its own atomic, versioned
+# write, so an interrupted scrape leaves every partition either old or new.
+def save_partition(format_name, stat_type, year, player_data):
+    header = headers[format_name][stat_type]
+    rows = [dataset.typed_row(stat_type, dict(zip(header, cells))) for cells in player_data]
+    convert.update_registry({format_name: {stat_type: {str(year): rows}}})
+    version = versioning.write_partitions({(format_name, stat_type, year): rows}, dataset.DATA_FILE)
+    print(f"✅ Published: {format_name} {stat_type} {year} ({len(rows)} rows, version {version})")
 
-                    cells.append(str(year))
-                    player_data.append(cells)
 
-                file_name = f"{format_name}_{stat_type}_{year}.csv"
-                file_path = os.path.join(OUTPUT_DIR, file_name)
+def load_scrape_manifest():
+    try:
+        with open(SCRAPE_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-                with open(file_path, mode="w", newline="", encoding="utf-8") as file:
-                    writer = csv.writer(file)
-                    writer.writerow(headers[format_name][stat_type])
-                    writer.writerows(player_data)
 
-                print(f"✅ Saved: {file_path}")
+def save_scrape_manifest(manifest):
+    versioning.write_atomic(SCRAPE_MANIFEST, json.dumps(manifest, indent=4, sort_keys=True).encode("utf-8"))
 
-                await asyncio.sleep(1)
 
-            await browser.close()
+# Whether the partition is already stored where this run writes it
+def is_stored(format_name, stat_type, year, packed):
+    if WRITE_CSV and not os.path.exists(os.path.join(OUTPUT_DIR, f"{format_name}_{stat_type}_{year}.csv")):
+        return False
+    return not DIRECT or (format_name, stat_type, str(year)) in packed
 
 
-async def main():
-    tasks = []
+# Partitions to fetch, most recent year first. Closed years already stored
+# are left out unless every year is asked for; `selected` "format/style/year"
+# keys are all fetched.
+def plan_jobs(manifest, packed, all_years=False, selected=None):
+    if selected is not None:
+        jobs = [(format_name, stat_type, int(year)) for format_name, stat_type, year in (key.split("/") for key in selected)]
+        return sorted(set(jobs), key=lambda job: (-job[2], list(FORMATS).index(job[0]), TYPES.index(job[1])))
+    current_year = datetime.date.today().year
+    jobs = []
+    for year in sorted(YEARS, reverse=True):
+        for format_name in FORMATS:
+            for stat_type in TYPES:
+                closed = year <= current_year - OPEN_YEARS
+                known = f"{format_name}/{stat_type}/{year}" in manifest and is_stored(format_name, stat_type, year, packed)
+                if closed and known and not all_years:
+                    continue
+                jobs.append((format_name, stat_type, year))
+    return jobs
+
+
+def partition_url(format_name, stat_type, year):
+    return (
+        f"{BASE_URL}?class={FORMATS[format_name]};"
+        f"spanmax1=31+Dec+{year};spanmin1=01+Jan+{year};"
+        f"spanval1=span;team={TEAM_ID};"
+        f"template=results;type={stat_type}"
+    )
+
+
+# Fetch one partition. A conditional request with the stored validators
+# comes first; a page that still loads is fingerprinted from its raw row
+# text before any cell is parsed. Returns True when new rows were saved.
+async def scrape_partition(page, format_name, stat_type, year, manifest, packed):
+    url = partition_url(format_name, stat_type, year)
+    key = f"{format_name}/{stat_type}/{year}"
+    entry = manifest.get(key, {})
+    stored = is_stored(format_name, stat_type, year, packed)
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+
+    print(f"Scraping: {format_name.upper()} | {stat_type.upper()} | {year}")
+
+    conditions = {}
+    if stored and entry.get("etag"):
+        conditions["If-None-Match"] = entry["etag"]
+    if stored and entry.get("last_modified"):
+        conditions["If-Modified-Since"] = entry["last_modified"]
+    if conditions:
+        try:
+            check = await page.request.get(url, headers=conditions, timeout=120000)
+            if check.status == 304:
+                manifest[key] = {**entry, "checked_at": now}
+                print(f"⏭ Not modified: {format_name} {stat_type} {year}")
+                return False
+        except PlaywrightError:
+            pass
+
+    response = None
+    for attempt in range(3):
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=120000)
+            await page.wait_for_selector("table", timeout=120000)
+            break
+        except TimeoutError:
+            response = None
+            print(f"⚠ Timeout: {url} (Attempt {attempt+1}/3)")
+            await asyncio.sleep(5)
+
+    if response is None:
+        print(f"❌ Skipping {format_name} {stat_type} {year}")
+        return False
+
+    raw_rows = await page.locator("tr.data1").all_inner_texts()
+    fingerprint = hashlib.sha256("\n".join(raw_rows).encode("utf-8")).hexdigest()
+    entry = {
+        **entry,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "checked_at": now,
+    }
+    if stored and entry.get("fingerprint") == fingerprint:
+        manifest[key] = entry
+        print(f"⏭ Unchanged: {format_name} {stat_type} {year}")
+        return False
+
+    rows = await page.locator("tr.data1").all()
+    player_data = []
+    dropped = 0
+
+    expected_cols = len(headers[format_name][stat_type]) - 1  # without Year
+
+    for row in rows:
+        cells = [cell.strip() for cell in await row.locator("td").all_inner_texts()]
+        cells = [cell for cell in cells if cell]
+
+        if not cells:
+            continue
+
+        # Fix column shifting issue
+        if len(cells) >= expected_cols:
+            cells = cells[:expected_cols]  # Trim extra
+        else:
+            dropped += 1
+            continue  # Skip broken rows
+
+        cells.append(str(year))
+        player_data.append(cells)
+
+    header = headers[format_name][stat_type]
+    report = validation.validate_partition(format_name, stat_type, year, [dict(zip(header, cells)) for cells in player_data])
+    if dropped:
+        report["failures"]["short_rows"] = dropped
+    if report["failures"]:
+        failures = ", ".join(f"{name} x{count}" for name, count in report["failures"].items())
+        print(f"⚠ Validation: {format_name} {stat_type} {year}: {failures}")
+        if STRICT:
+            # Keep the old validators so the page is fetched again next run
+            manifest[key] = {**manifest.get(key, {}), "checked_at": now, "validation": report["failures"]}
+            print(f"❌ Not saved: {format_name} {stat_type} {year}")
+            return False
+
+    if WRITE_CSV:
+        save_csv(format_name, stat_type, year, player_data)
+    if DIRECT:
+        save_partition(format_name, stat_type, year, player_data)
+
+    # Only remember the fingerprint once the rows are saved
+    manifest[key] = {**entry, "fingerprint": fingerprint, "changed_at": now, "validation": report["failures"]}
+    return True
+
+
+# One browser working through the shared queue in priority order
+async def scrape_worker(queue, manifest, packed, changed, checked):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+
+        # Increase timeout
+        page.set_default_timeout(120000)
+        page.set_default_navigation_timeout(120000)
+
+        while not queue.empty():
+            job = queue.get_nowait()
+            if await scrape_partition(page, *job, manifest, packed):
+                changed.append(job)
+            save_scrape_manifest(manifest)
+            checked[0] += 1
+            print(f"Checked {checked[0]}/{checked[1]}: {'/'.join(map(str, job))}")
+            await asyncio.sleep(1)
+
+        await browser.close()
 
-    for format_name, format_id in FORMATS.items():
-        for stat_type in TYPES:
-            tasks.append(scrape_data(format_name, format_id, stat_type))
 
-    await asyncio.gather(*tasks)
+async def main():
+    # Start from the JSON export when there is no packed dataset yet
+    if DIRECT and not os.path.exists(dataset.DATA_FILE) and os.path.exists(dataset.JSON_FILE):
+        convert.save_dataset(dataset.read_data(dataset.JSON_FILE), dataset.DATA_FILE)
+
+    manifest = load_scrape_manifest()
+    packed = set()
+    if DIRECT and os.path.exists(dataset.DATA_FILE):
+        packed = {(entry["format"], entry["style"], entry["year"]) for entry in packfile.PackReader(dataset.DATA_FILE).partitions}
+
+    queue = asyncio.Queue()
+    for job in plan_jobs(manifest, packed, "--all-years" in sys.argv, PARTITIONS):
+        queue.put_nowait(job)
+    print(f"{queue.qsize()} partitions to check, most recent first")
+
+    changed = []
+    checked = [0, queue.qsize()]
+    await asyncio.gather(*(scrape_worker(queue, manifest, packed, changed, checked) for _ in range(WORKERS)))
+    print(f"{len(changed)} partitions changed")
+
+    if DIRECT and changed:
+        version = versioning.dataset_version(dataset.DATA_FILE)
+        array_dir, rated_years = convert.refresh_derived(dataset.read_data(dataset.DATA_FILE), dataset.DATA_FILE, version)
+        print(f"Memory-mapped arrays saved to {array_dir}")
+        print(f"Ratings updated for {', '.join(map(str, rated_years))} in {ratings.HISTORY_FILE}")
 
 
 if __name__ == "__main__":
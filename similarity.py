@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+
+# Per-player profile features within one format
+BATTING_FEATURES = ["Batting Average", "Strike Rate", "Boundary %", "Runs per Innings"]
+BOWLING_FEATURES = ["Economy", "Wickets per Innings", "Bowling Average", "Bowling Strike Rate"]
+FEATURES = BATTING_FEATURES + BOWLING_FEATURES
+
+# Volume features: a player who never bats or bowls simply produces nothing
+VOLUME_FEATURES = ["Boundary %", "Runs per Innings", "Wickets per Innings"]
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator.where(denominator > 0)
+
+
+# Raw per-player features for one format, keyed by Player ID
+def player_features(batting_rows, bowling_rows):
+    bat = batting_rows.groupby("Player ID").agg(
+        {"Innings": "sum", "Not Outs": "sum", "Runs": "sum", "Balls Faced": "sum", "4s": "sum", "6s": "sum"}
+    ).astype(float)
+    bowl_rows = bowling_rows.assign(Balls=dataset.overs_to_float(bowling_rows["Overs"].astype(float)) * 6)
+    bowl = bowl_rows.groupby("Player ID").agg({"Innings": "sum", "Runs": "sum", "Wickets": "sum", "Balls": "sum"}).astype(float)
+
+    features = pd.DataFrame(index=bat.index.union(bowl.index))
+    bat = bat.reindex(features.index)
+    bowl = bowl.reindex(features.index)
+    features["Batting Average"] = _ratio(bat["Runs"], bat["Innings"] - bat["Not Outs"])
+    features["Strike Rate"] = _ratio(bat["Runs"], bat["Balls Faced"]) * 100
+    features["Boundary %"] = _ratio(4 * bat["4s"] + 6 * bat["6s"], bat["Runs"]) * 100
+    features["Runs per Innings"] = _ratio(bat["Runs"], bat["Innings"])
+    features["Economy"] = _ratio(bowl["Runs"], bowl["Balls"]) * 6
+    features["Wickets per Innings"] = _ratio(bowl["Wickets"], bowl["Innings"])
+    features["Bowling Average"] = _ratio(bowl["Runs"], bowl["Wickets"])
+    features["Bowling Strike Rate"] = _ratio(bowl["Balls"], bowl["Wickets"])
+    features["Innings"] = bat["Innings"].fillna(0) + bowl["Innings"].fillna(0)
+
+    names = pd.concat([batting_rows[["Player ID", "Player Name"]], bowling_rows[["Player ID", "Player Name"]]])
+    names = names.astype({"Player Name": str}).drop_duplicates("Player ID").set_index("Player ID")["Player Name"]
+    features.insert(0, "Player Name", names.reindex(features.index))
+    return features
+
+
+# Z-scored feature matrix for the players with at least min_innings innings.
+# Missing volume features count as zero output; missing rate features (no
+# balls faced, no wickets) are set to the format mean so they do not pull
+# players together or apart.
+def feature_matrix(features, min_innings=1):
+    eligible = features[features["Innings"] >= min_innings]
+    raw = eligible[FEATURES].copy()
+    raw[VOLUME_FEATURES] = raw[VOLUME_FEATURES].fillna(0)
+    values = raw.to_numpy(dtype=np.float64)
+
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~np.isfinite(std) | (std == 0)] = 1.0
+    matrix = (values - np.nan_to_num(mean)) / std
+    matrix = np.nan_to_num(matrix, nan=0.0).astype(np.float32)
+    return eligible.index.to_numpy(), matrix
+
+
+# Pairwise similarity (cosine) or negated distance (euclidean); larger is closer
+def pairwise_scores(matrix, queries=None, metric="cosine"):
+    queries = matrix if queries is None else queries
+    if metric == "cosine":
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        query_norms = np.linalg.norm(queries, axis=1)
+        query_norms[query_norms == 0] = 1.0
+        return (queries @ matrix.T) / np.outer(query_norms, norms)
+    squared = (queries ** 2).sum(axis=1)[:, None] + (matrix ** 2).sum(axis=1)[None, :] - 2 * queries @ matrix.T
+    return -np.sqrt(np.maximum(squared, 0))
+
+
+# Top-k neighbour positions and scores for every player, excluding themselves
+def neighbour_table(matrix, k=10, metric="cosine"):
+    scores = pairwise_scores(matrix, metric=metric)
+    np.fill_diagonal(scores, -np.inf)
+    k = min(k, max(len(matrix) - 1, 0))
+    if k == 0:
+        return np.empty((len(matrix), 0), dtype=int), np.empty((len(matrix), 0))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+# k most similar players to one player, as a table with their raw features
+def similar_players(features, player_ids, matrix, player_id, k=10, metric="cosine", table=None):
+    position = int(np.flatnonzero(player_ids == player_id)[0])
+    if table is not None and table[0].shape[1] >= k:
+        neighbours, scores = table[0][position, :k], table[1][position, :k]
+    else:
+        scores = pairwise_scores(matrix, matrix[position:position + 1], metric=metric)[0]
+        scores[position] = -np.inf
+        neighbours = np.argsort(-scores)[:k]
+        scores = scores[neighbours]
+
+    result = features.loc[player_ids[neighbours], ["Player Name"] + FEATURES].reset_index()
+    result.insert(2, "Similarity" if metric == "cosine" else "Distance", scores if metric == "cosine" else -scores)
+    return result
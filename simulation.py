@@ -0,0 +1,87 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Simulated seasons drawn per batch; bounds the size of each random block
+CHUNK_SIZE = 10000
+
+
+# Padded array of each player's historical yearly points. A player's pool
+# runs from their first to their last season in the data, with seasons
+# missed in between counted as zero. Players with no history score zero.
+def sample_pools(yearly_points, player_ids):
+    pools = []
+    for player_id in player_ids:
+        history = yearly_points[yearly_points["Player ID"] == player_id].set_index("Year")["Total_Points"]
+        if history.empty:
+            pools.append(np.zeros(1))
+            continue
+        span = range(int(history.index.min()), int(history.index.max()) + 1)
+        pools.append(history.reindex(span, fill_value=0).to_numpy(dtype=np.float64))
+
+    counts = np.array([len(pool) for pool in pools], dtype=np.int64)
+    pool = np.zeros((len(pools), counts.max(initial=1)))
+    for i, values in enumerate(pools):
+        pool[i, :len(values)] = values
+    return pool, counts
+
+
+# One batch of simulated seasons: a random historical season per player
+def _simulate_chunk(pool, counts, n_sims, seed):
+    rng = np.random.default_rng(seed)
+    picks = (rng.random((n_sims, len(counts))) * counts).astype(np.int64)
+    return pool[np.arange(len(counts)), picks]
+
+
+# Per-player points for n_sims simulated seasons, shape (n_sims, players).
+# Batches use independent child seeds, so the result does not depend on
+# the number of worker processes.
+def simulate(pool, counts, n_sims=20000, seed=None, workers=1):
+    sizes = [CHUNK_SIZE] * (n_sims // CHUNK_SIZE)
+    if n_sims % CHUNK_SIZE:
+        sizes.append(n_sims % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([pool] * len(sizes), [counts] * len(sizes), sizes, seeds)
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_simulate_chunk, *args))
+    else:
+        chunks = list(map(_simulate_chunk, *args))
+    return np.concatenate(chunks) if chunks else np.zeros((0, len(counts)))
+
+
+# Simulated per-player points for an XI given as Player IDs
+def simulate_xi(yearly_points, player_ids, n_sims=20000, seed=None, workers=1):
+    pool, counts = sample_pools(yearly_points, player_ids)
+    return simulate(pool, counts, n_sims, seed, workers)
+
+
+# Expected team points, spread and percentiles over the simulated seasons
+def summarize(draws):
+    totals = draws.sum(axis=1)
+    p5, p50, p95 = np.percentile(totals, [5, 50, 95])
+    return {
+        "Expected Points": float(totals.mean()),
+        "Std Dev": float(totals.std()),
+        "P5": float(p5),
+        "Median": float(p50),
+        "P95": float(p95),
+    }
+
+
+# Mean and spread of each player's simulated contribution
+def player_contributions(draws, names):
+    means = draws.mean(axis=0)
+    return pd.DataFrame({
+        "Player Name": list(names),
+        "Expected Points": means,
+        "Std Dev": draws.std(axis=0),
+        "Share %": means / max(means.sum(), 1e-9) * 100,
+    }).sort_values("Expected Points", ascending=False, ignore_index=True)
+
+
+# Share of simulated seasons in which XI A outscores XI B
+def head_to_head(draws_a, draws_b):
+    return float((draws_a.sum(axis=1) > draws_b.sum(axis=1)).mean())
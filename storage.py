@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import dataset
+import identity
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+DATABASE_FILES = {"sqlite": "cricket_data.sqlite", "duckdb": "cricket_data.duckdb"}
+
+# Indexes cover the player, format and year lookups; style is the table itself
+INDEXES = {
+    "player": ['"Player Name"', '"Format"', '"Year"'],
+    "player_id": ['"Player ID"', '"Format"', '"Year"'],
+    "format_year": ['"Format"', '"Year"'],
+    "year": ['"Year"'],
+}
+
+
+# Pick DuckDB when it is installed and asked for, SQLite otherwise
+def resolve_engine(engine):
+    if engine == "duckdb" and duckdb is None:
+        return "sqlite"
+    return engine
+
+
+# Categorical columns are stored as plain text
+def _plain(table):
+    plain = table.copy()
+    for col in plain.select_dtypes(include=["category"]).columns:
+        plain[col] = plain[col].astype(object)
+    return plain
+
+
+def _create_indexes(con, style):
+    for name, columns in INDEXES.items():
+        con.execute(f'CREATE INDEX IF NOT EXISTS idx_{style}_{name} ON {style} ({", ".join(columns)})')
+
+
+# Load the typed batting and bowling tables into a database file, replacing
+# it. Each process builds into its own temp file in the same directory, so
+# concurrent rebuilds by several workers never touch each other's file, and
+# the last rename wins.
+def build_database(batting, bowling, db_path, engine="sqlite"):
+    engine = resolve_engine(engine)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_path)), prefix=f"{os.path.basename(db_path)}.", suffix=".tmp")
+    os.close(fd)
+    # DuckDB will not open an existing empty file
+    os.remove(tmp_path)
+
+    tables = {"batting": _plain(batting), "bowling": _plain(bowling)}
+    try:
+        if engine == "duckdb":
+            con = duckdb.connect(tmp_path)
+            for style, table in tables.items():
+                con.register("incoming", table)
+                con.execute(f"CREATE TABLE {style} AS SELECT * FROM incoming")
+                con.unregister("incoming")
+                _create_indexes(con, style)
+            con.close()
+        else:
+            con = sqlite3.connect(tmp_path)
+            for style, table in tables.items():
+                table.to_sql(style, con, index=False)
+                _create_indexes(con, style)
+            con.commit()
+            con.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return db_path
+
+
+# Build the database next to the JSON file unless an up-to-date one exists
+def ensure_database(data_file, engine="sqlite"):
+    engine = resolve_engine(engine)
+    db_path = os.path.join(os.path.dirname(os.path.abspath(data_file)), DATABASE_FILES[engine])
+    sources = [data_file] + [path for path in [identity.REGISTRY_FILE] if os.path.exists(path)]
+    if os.path.exists(db_path) and os.path.getmtime(db_path) >= max(map(os.path.getmtime, sources)):
+        return db_path, engine
+
+    batting, bowling = dataset.build_tables(dataset.read_data(data_file))
+    build_database(batting, bowling, db_path, engine)
+    return db_path, engine
+
+
+def main():
+    engine = sys.argv[1] if len(sys.argv) > 1 else "sqlite"
+    db_path, engine = ensure_database(dataset.default_data_file(), engine)
+    print(f"{engine} database saved to {db_path}")
+
+
+if __name__ == "__main__":
+    main()
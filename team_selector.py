@@ -0,0 +1,262 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pulp import LpProblem, LpVariable, lpSum, LpMaximize, LpBinary, LpStatus, PULP_CBC_CMD
+
+import dataset
+import instrumentation
+from instrumentation import stage
+
+# Size of the XI and the minimum batting and bowling options it must carry
+TEAM_SIZE = 11
+MIN_BATTING = 6
+MIN_BOWLING = 5
+
+# Weights of the points formula as collect_player_data applies them; the
+# role scale multiplies the infer_role thresholds
+DEFAULT_WEIGHTS = {"runs": 1, "fours": 1, "sixes": 2, "duck_penalty": 2, "wickets": 25, "economy": 1, "roles": 1}
+# Concurrent CBC solves in a weight sweep
+SWEEP_WORKERS = 4
+
+
+def economy_bonus(econ):
+    if econ <= 4.0:
+        return 6
+    elif econ <= 5.0:
+        return 4
+    elif econ <= 6.0:
+        return 2
+    elif econ > 9.0:
+        return -4
+    return 0
+
+
+def infer_role(bat, bowl):
+    if bat > 40 and bowl < 15:
+        return 'batter'
+    elif bowl > 40 and bat < 15:
+        return 'bowler'
+    elif bat >= 20 and bowl >= 20:
+        return 'allrounder'
+    return 'other'
+
+
+# economy_bonus for a whole array of economy rates
+def economy_bonuses(econ):
+    return np.select([econ <= 4.0, econ <= 5.0, econ <= 6.0, econ > 9.0], [6, 4, 2, -4], 0)
+
+
+# infer_role for whole arrays of points, with thresholds scaled by `scale`
+def infer_roles(bat, bowl, scale=1):
+    return np.select(
+        [(bat > 40 * scale) & (bowl < 15 * scale), (bowl > 40 * scale) & (bat < 15 * scale), (bat >= 20 * scale) & (bowl >= 20 * scale)],
+        ['batter', 'bowler', 'allrounder'], 'other',
+    )
+
+
+# Display name per Player ID across batting and bowling rows
+def player_names(batting_rows, bowling_rows):
+    names = pd.concat([batting_rows[['Player ID', 'Player Name']], bowling_rows[['Player ID', 'Player Name']]])
+    return names.astype({'Player Name': str}).drop_duplicates('Player ID').set_index('Player ID')['Player Name']
+
+
+# Batting and bowling sums per player (and per any extra key, e.g. Year)
+def _player_sums(batting_rows, bowling_rows, keys):
+    bat_df = batting_rows[keys + ['Runs', '4s', '6s', 'Ducks']].astype(float)
+    bat_df = bat_df.groupby(keys, as_index=False).sum()
+
+    bowl_df = bowling_rows[keys + ['Wickets', 'Runs']].astype(float)
+    bowl_df['Overs'] = dataset.overs_to_float(bowling_rows['Overs'].astype(float))
+    bowl_df = bowl_df.groupby(keys, as_index=False).sum()
+    bowl_df['Economy Rate'] = (bowl_df['Runs'] / bowl_df['Overs'].where(bowl_df['Overs'] > 0)).fillna(0.0)
+    return bat_df, bowl_df
+
+
+@instrumentation.timed()
+def collect_player_data(batting_rows, bowling_rows):
+    year_count = max(len(set(batting_rows['Year']) | set(bowling_rows['Year'])), 1)
+    bat_df, bowl_df = _player_sums(batting_rows, bowling_rows, ['Player ID'])
+
+    bat_df['Bat_Points'] = (bat_df['Runs'] + bat_df['4s'] + 2 * bat_df['6s'] - 2 * bat_df['Ducks']) / year_count
+    bowl_df['Bowl_Points'] = (bowl_df['Wickets'] * 25 / year_count) + bowl_df['Economy Rate'].apply(economy_bonus)
+
+    df = pd.merge(bat_df, bowl_df, on='Player ID', how='outer').fillna(0)
+    df['Player ID'] = df['Player ID'].astype(int)
+    df.insert(1, 'Player Name', df['Player ID'].map(player_names(batting_rows, bowling_rows)))
+    df['Total_Points'] = df['Bat_Points'] + df['Bowl_Points']
+    df['Role'] = df.apply(lambda x: infer_role(x['Bat_Points'], x['Bowl_Points']), axis=1)
+    return df
+
+
+# Raw per-player totals the points formula is applied to, and the number of
+# years they cover
+def player_components(batting_rows, bowling_rows):
+    year_count = max(len(set(batting_rows['Year']) | set(bowling_rows['Year'])), 1)
+    bat_df, bowl_df = _player_sums(batting_rows, bowling_rows, ['Player ID'])
+    df = pd.merge(
+        bat_df[['Player ID', 'Runs', '4s', '6s', 'Ducks']],
+        bowl_df[['Player ID', 'Wickets', 'Economy Rate']],
+        on='Player ID', how='outer',
+    ).fillna(0)
+    df['Player ID'] = df['Player ID'].astype(int)
+    df.insert(1, 'Player Name', df['Player ID'].map(player_names(batting_rows, bowling_rows)))
+    return df, year_count
+
+
+# Every combination of the given weight values, one configuration per row;
+# weights not given keep their default
+def weight_grid(**values):
+    names = list(DEFAULT_WEIGHTS)
+    options = [values.get(name) or [DEFAULT_WEIGHTS[name]] for name in names]
+    return pd.DataFrame(list(itertools.product(*options)), columns=names)
+
+
+# Bat and bowl points of every player under every configuration in one
+# broadcast computation, each of shape (configurations, players)
+def sweep_points(components, year_count, grid):
+    def weight(name):
+        return grid[name].to_numpy(dtype=np.float64)[:, None]
+
+    def column(name):
+        return components[name].to_numpy(dtype=np.float64)[None, :]
+
+    bat = (weight("runs") * column('Runs') + weight("fours") * column('4s') + weight("sixes") * column('6s')
+           - weight("duck_penalty") * column('Ducks')) / year_count
+    bowl = weight("wickets") * column('Wickets') / year_count + weight("economy") * economy_bonuses(column('Economy Rate'))
+    return bat, bowl
+
+
+# Best XI for one configuration as a boolean mask over players
+def _select_xi(points, roles):
+    players = range(len(points))
+    prob = LpProblem("Optimal_Team", LpMaximize)
+    x = LpVariable.dicts("Player", players, cat=LpBinary)
+    prob += lpSum([x[p] * points[p] for p in players])
+    prob += lpSum([x[p] for p in players]) == TEAM_SIZE
+    prob += lpSum([x[p] for p in players if roles[p] in ('batter', 'allrounder')]) >= MIN_BATTING
+    prob += lpSum([x[p] for p in players if roles[p] in ('bowler', 'allrounder')]) >= MIN_BOWLING
+    prob.solve(PULP_CBC_CMD(msg=False))
+    if LpStatus[prob.status] != "Optimal":
+        return np.zeros(len(points), dtype=bool)
+    return np.array([x[p].varValue > 0.5 for p in players])
+
+
+# Selection mask of shape (configurations, players): the points for all
+# configurations are computed together, then the XIs are solved concurrently
+# (each CBC solve runs in its own process)
+def weight_sweep(components, year_count, grid, workers=SWEEP_WORKERS):
+    with stage("sweep_points", rows=len(grid) * len(components)):
+        bat, bowl = sweep_points(components, year_count, grid)
+        roles = [infer_roles(b, w, scale) for b, w, scale in zip(bat, bowl, grid["roles"])]
+    with stage("sweep_solve", rows=len(grid)):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            selected = list(executor.map(_select_xi, bat + bowl, roles))
+    return np.array(selected).reshape(len(grid), len(components))
+
+
+# Share of configurations in which each player makes the XI
+def selection_frequency(components, selected):
+    frequency = components[['Player ID', 'Player Name']].copy()
+    frequency['Selected %'] = selected.mean(axis=0) * 100 if len(selected) else 0.0
+    return frequency[frequency['Selected %'] > 0].sort_values(
+        ['Selected %', 'Player Name'], ascending=[False, True], ignore_index=True
+    )
+
+
+# Points each player scored in each single year, with the same weights as
+# collect_player_data (one year, so nothing is divided by a year count)
+def yearly_player_points(batting_rows, bowling_rows):
+    bat_df, bowl_df = _player_sums(batting_rows, bowling_rows, ['Player ID', 'Year'])
+    bat_df['Bat_Points'] = bat_df['Runs'] + bat_df['4s'] + 2 * bat_df['6s'] - 2 * bat_df['Ducks']
+    bowl_df['Bowl_Points'] = bowl_df['Wickets'] * 25 + bowl_df['Economy Rate'].apply(economy_bonus)
+
+    df = pd.merge(
+        bat_df[['Player ID', 'Year', 'Bat_Points']], bowl_df[['Player ID', 'Year', 'Bowl_Points']],
+        on=['Player ID', 'Year'], how='outer',
+    ).fillna(0)
+    df[['Player ID', 'Year']] = df[['Player ID', 'Year']].astype(int)
+    df['Total_Points'] = df['Bat_Points'] + df['Bowl_Points']
+    return df
+
+
+# Best XI model for one candidate table. The objective and the base
+# constraints are built once; solve() applies a request's extra constraints,
+# solves (warm-started from the previous answer) and removes them again, so
+# the same model serves every constraint change on that slice.
+class TeamModel:
+    def __init__(self, df):
+        self.df = df
+        self.players = df['Player ID'].tolist()
+        self.roles = dict(zip(self.players, df['Role']))
+
+        self.prob = LpProblem("Optimal_Team", LpMaximize)
+        self.x = LpVariable.dicts("Player", self.players, cat=LpBinary)
+        x = self.x
+        self.prob += lpSum([x[p] * pts for p, pts in zip(self.players, df['Total_Points'])])
+        self.prob += lpSum([x[p] for p in self.players]) == TEAM_SIZE, "team_size"
+        self.prob += lpSum([x[p] for p, r in self.roles.items() if r in ['batter', 'allrounder']]) >= MIN_BATTING, "batting"
+        self.prob += lpSum([x[p] for p, r in self.roles.items() if r in ['bowler', 'allrounder']]) >= MIN_BOWLING, "bowling"
+
+        self.solver = PULP_CBC_CMD(msg=False, warmStart=True)
+        self._lock = threading.Lock()
+
+    def _extra_constraints(self, min_allrounders, keepers):
+        x = self.x
+        constraints = {}
+        if min_allrounders:
+            constraints["allrounders"] = lpSum([x[p] for p, r in self.roles.items() if r == 'allrounder']) >= min_allrounders
+        keepers = [p for p in keepers if p in x]
+        if keepers:
+            constraints["wicketkeeper"] = lpSum([x[p] for p in keepers]) >= 1
+        return constraints
+
+    # Up to k distinct XIs, best first. Locked players must play, excluded
+    # players may not, at least one of `keepers` is picked when given.
+    # Fewer than k XIs come back when the constraints run out of solutions.
+    def solve(self, k=1, locked=(), excluded=(), min_allrounders=0, keepers=()):
+        x = self.x
+        teams = []
+        with self._lock:
+            added = []
+            for name, constraint in self._extra_constraints(min_allrounders, keepers).items():
+                self.prob += constraint, name
+                added.append(name)
+            for p in locked:
+                if p in x:
+                    x[p].lowBound = 1
+            for p in excluded:
+                if p in x:
+                    x[p].upBound = 0
+            try:
+                for rank in range(k):
+                    with stage("cbc_solve", rows=len(self.players)):
+                        self.prob.solve(self.solver)
+                    if LpStatus[self.prob.status] != "Optimal":
+                        break
+                    selected = [p for p in self.players if x[p].varValue > 0.5]
+                    teams.append(self._team(selected, keepers))
+                    # No-good cut: the next XI must differ by at least one player
+                    name = f"distinct_{rank}"
+                    self.prob += lpSum([x[p] for p in selected]) <= TEAM_SIZE - 1, name
+                    added.append(name)
+            finally:
+                for name in added:
+                    del self.prob.constraints[name]
+                for p in self.players:
+                    x[p].lowBound, x[p].upBound = 0, 1
+        return teams
+
+    # The selected players, labelled with the role the model counted them
+    # under; the picked wicketkeepers are labelled as such
+    def _team(self, selected_players, keepers=()):
+        selected_df = self.df[self.df['Player ID'].isin(selected_players)].copy().sort_values(by='Total_Points', ascending=False)
+        selected_df['Assigned_Role'] = selected_df['Role'].where(~selected_df['Player ID'].isin(list(keepers)), 'wicketkeeper')
+        return selected_df
+
+
+def optimize_team(df):
+    teams = TeamModel(df).solve()
+    return teams[0] if teams else df.iloc[:0].assign(Assigned_Role=pd.Series(dtype=str))
@@ -0,0 +1,78 @@
+import json
+import time
+from urllib.parse import urlencode
+
+import api
+import dataset
+import identity
+import versioning
+
+
+def _data(runs_a):
+    batting = {
+        str(year): [
+            {"Player Name": name, "Year": year, "Matches": 3, "Innings": 3, "Not Outs": 0, "Runs": runs,
+             "Balls Faced": runs * 2, "4s": 2, "6s": 1}
+            for name, runs in [("A", runs_a if year == 2019 else 100), ("B", 80), ("C", 60)]
+        ]
+        for year in range(2017, 2022)
+    }
+    return dataset.typed_data({"odi": {"batting": batting, "bowling": {}}})
+
+
+def _update(data_file, runs_a):
+    return versioning.write_partitions({("odi", "batting", 2019): _data(runs_a)["odi"]["batting"]["2019"]}, data_file)
+
+
+def _open(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    identity.save_registry(identity.PlayerRegistry({"A": 1, "B": 2, "C": 3}))
+    data_file = str(tmp_path / "cricket_data.pack")
+    versioning.write_dataset(_data(100), data_file)
+    return data_file, api.open_api("memory", data_file)
+
+
+def _leaders(cricket_api, start, end):
+    _, body = cricket_api.respond("/leaderboard", urlencode({"format": "odi", "start": start, "end": end}))
+    return [(row["Player Name"], row["Runs"]) for row in json.loads(body)["leaderboard"]]
+
+
+def _swapped(cricket_api, version):
+    for _ in range(200):
+        if cricket_api._serving().backend.version == version:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_a_new_version_evicts_only_the_changed_responses(tmp_path, monkeypatch):
+    data_file, cricket_api = _open(tmp_path, monkeypatch)
+    assert _leaders(cricket_api, 2019, 2019)[0] == ("A", 100)
+    before = _leaders(cricket_api, 2020, 2021)
+
+    second = _update(data_file, 10)
+    assert _swapped(cricket_api, second)
+    hits = cricket_api.cache.hits
+
+    assert _leaders(cricket_api, 2019, 2019)[0] == ("B", 80)
+    assert cricket_api.cache.hits == hits
+    assert _leaders(cricket_api, 2020, 2021) == before
+    assert cricket_api.cache.hits == hits + 1
+
+
+def test_a_response_finished_after_a_swap_is_not_served_for_the_new_version(tmp_path, monkeypatch):
+    data_file, cricket_api = _open(tmp_path, monkeypatch)
+    leaderboard = cricket_api.routes["/leaderboard"]
+    swapped = []
+
+    # The version changes while the first request is being answered
+    def slow_leaderboard(served, params):
+        response = leaderboard(served, params)
+        if not swapped:
+            swapped.append(_swapped(cricket_api, _update(data_file, 10)))
+        return response
+
+    monkeypatch.setitem(cricket_api.routes, "/leaderboard", slow_leaderboard)
+    assert _leaders(cricket_api, 2019, 2019)[0] == ("A", 100)
+    assert swapped == [True]
+    assert _leaders(cricket_api, 2019, 2019)[0] == ("B", 80)
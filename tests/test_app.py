@@ -0,0 +1,42 @@
+import os
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import dataset
+import queries
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stage_cache(at, name):
+    timings = [frame.value for frame in at.sidebar.dataframe if "stage" in frame.value.columns][0]
+    return timings.set_index("stage").loc[name, "cache"]
+
+
+def test_cold_run_records_a_backend_miss(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=180)
+    at.run()
+    [box for box in at.sidebar.checkbox if box.label == "Show Performance Panel"][0].check()
+
+    st.cache_resource.clear()
+    at.run()
+    assert not at.exception
+    assert _stage_cache(at, "get_live_dataset") == "miss"
+
+    at.run()
+    assert _stage_cache(at, "get_live_dataset") == "hit"
+
+
+def test_year_pickers_offer_every_dataset_year(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    years = [str(year) for year in queries.open_backend("memory", dataset.default_data_file()).years()]
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=180)
+    at.run()
+    for view in ["Player Wise", "Format Wise", "Optimal Team Selector"]:
+        at.sidebar.selectbox[0].set_value(view).run()
+        pickers = {box.label: box for box in at.selectbox}
+        assert pickers["Start Year"].options == years
+        assert pickers["End Year"].options == years
+        assert pickers["End Year"].value == years[-1]
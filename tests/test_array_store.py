@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+import array_store
+import dataset
+import identity
+import rankings
+
+
+def _tables():
+    batting, bowling = {}, {}
+    for year in range(2018, 2022):
+        batting[str(year)] = [
+            {"Player Name": name, "Year": year, "Matches": 4, "Innings": 4, "Not Outs": 1,
+             "Runs": runs + year % 7, "Balls Faced": runs * 2, "4s": 3, "6s": 1}
+            for name, runs in [("A", 120), ("B", 90), ("C", 40)]
+        ]
+        bowling[str(year)] = [
+            {"Player Name": name, "Year": year, "Matches": 4, "Innings": 4, "Overs": 30.0,
+             "Runs": 150, "Wickets": wickets}
+            for name, wickets in [("C", 9), ("B", 3)]
+        ]
+    data = {"odi": {"batting": batting, "bowling": bowling}}
+    return dataset.build_tables(data, identity.PlayerRegistry({"A": 1, "B": 2, "C": 3}))
+
+
+def _mapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_sums_and_ranks_are_views_of_the_mapped_files(tmp_path):
+    batting, bowling = _tables()
+    data_file = str(tmp_path / "cricket_data.pack")
+    array_store.write_arrays(batting, bowling, data_file, "v1")
+    stored = array_store.open_arrays(data_file, "v1")
+
+    for frame in [stored["sums"], stored["ranks"].table]:
+        assert all(_mapped(frame[col].to_numpy()) for col in frame.columns)
+    assert all(_mapped(stored["batting"][col].array._codes) for col in ["Player Name", "Format"])
+
+    fresh = rankings.build_rank_index(batting, bowling)
+    pd.testing.assert_frame_equal(stored["sums"], rankings.yearly_sums(batting, bowling))
+    pd.testing.assert_frame_equal(stored["ranks"].table, fresh.table)
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import array_store
+import changefeed
+import dataset
+import identity
+import queries
+import versioning
+
+
+def _rows(year, runs_a):
+    return [
+        {"Player Name": name, "Year": year, "Matches": 3, "Innings": 3, "Not Outs": 0, "Runs": runs,
+         "Balls Faced": runs * 2, "4s": 2, "6s": 1}
+        for name, runs in [("A", runs_a), ("B", 80), ("C", 60)]
+    ]
+
+
+def _data(runs_a):
+    batting = {str(year): _rows(year, runs_a if year == 2019 else 100) for year in range(2017, 2022)}
+    bowling = {
+        str(year): [{"Player Name": "C", "Year": year, "Matches": 3, "Innings": 3, "Overs": 20.0, "Runs": 90, "Wickets": 6}]
+        for year in range(2017, 2022)
+    }
+    return dataset.typed_data({"odi": {"batting": batting, "bowling": bowling}})
+
+
+def _publish(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    identity.save_registry(identity.PlayerRegistry({"A": 1, "B": 2, "C": 3}))
+    data_file = str(tmp_path / "cricket_data.pack")
+    return data_file, versioning.write_dataset(_data(100), data_file)
+
+
+def _update(data_file, runs_a):
+    return versioning.write_partitions({("odi", "batting", 2019): _data(runs_a)["odi"]["batting"]["2019"]}, data_file)
+
+
+def test_changes_between_follows_the_feed(tmp_path, monkeypatch):
+    data_file, first = _publish(tmp_path, monkeypatch)
+    second = _update(data_file, 10)
+    third = _update(data_file, 20)
+
+    records = changefeed.changes_between(data_file, first, third)
+    assert [record["version"] for record in records] == [second, third]
+    assert changefeed.changes_between(data_file, third, third) == []
+    summary = changefeed.summarize(records)
+    assert summary["partitions"] == {("odi", "batting", 2019)}
+    assert summary["players"] == {"A"}
+    assert not summary["roster"]
+
+
+def test_changes_between_is_none_across_a_gap(tmp_path, monkeypatch):
+    data_file, first = _publish(tmp_path, monkeypatch)
+    second = _update(data_file, 10)
+    third = _update(data_file, 20)
+
+    # A pruned record
+    feed = [record for record in changefeed.read_feed(data_file) if record["version"] != second]
+    with open(changefeed.changes_path(data_file), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in feed)
+    assert changefeed.changes_between(data_file, first, third) is None
+    assert changefeed.changes_between(data_file, second, third) is not None
+
+    # A full rewrite
+    changefeed.record(data_file, "rewritten", third, None)
+    assert changefeed.changes_between(data_file, third, "rewritten") is None
+
+    # A version the feed never saw, such as a manual edit
+    assert changefeed.changes_between(data_file, third, "edited") is None
+
+
+def test_updated_backend_matches_a_full_load(tmp_path, monkeypatch):
+    data_file, first = _publish(tmp_path, monkeypatch)
+    backend = queries.open_backend("memory", data_file, version=first)
+    second = _update(data_file, 10)
+
+    updated = queries.update_backend(backend, data_file, second)
+    full = queries.open_backend("memory", data_file, version=second)
+
+    assert not updated.mapped
+    for style in ["batting", "bowling"]:
+        pd.testing.assert_frame_equal(updated.all_rows(style).reset_index(drop=True), full.all_rows(style).reset_index(drop=True))
+    pd.testing.assert_frame_equal(updated.sums, full.sums)
+    pd.testing.assert_frame_equal(updated.ranks.table, full.ranks.table)
+    for style in full.views.arrays:
+        for name, values in full.views.arrays[style].items():
+            np.testing.assert_array_equal(updated.views.arrays[style][name], values)
+
+
+def test_update_maps_the_new_version_when_its_arrays_exist(tmp_path, monkeypatch):
+    data_file, first = _publish(tmp_path, monkeypatch)
+    backend = queries.open_backend("memory", data_file, version=first)
+    second = _update(data_file, 10)
+    array_store.write_arrays(*dataset.build_tables(dataset.read_data(data_file)), data_file, second)
+
+    updated = queries.update_backend(backend, data_file, second)
+
+    assert updated.mapped
+    assert updated.version == second
+    assert not queries.backend_stale(updated, data_file, second)
+    assert queries.backend_stale(backend, data_file, second)
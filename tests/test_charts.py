@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import charts
+
+
+def _rows():
+    return pd.DataFrame({
+        "Player Name": ["B", "A", "B", "A", "B", "A"],
+        "Year": [2021, 2020, 2020, 2020, 2019, 2021],
+        "Runs": [10, 20, 30, 40, 50, 60],
+        "Average": [1.5, 2.5, 3.5, 4.5, 5.5, 6.5],
+    })
+
+
+def test_points_aggregate_one_row_per_series_and_x():
+    data = charts.points(_rows(), "Year", "Runs", color="Player Name")
+
+    assert data.to_dict(orient="list") == {
+        "Player Name": ["B", "B", "B", "A", "A"],
+        "Year": [2019, 2020, 2021, 2020, 2021],
+        "Runs": [50, 30, 10, 60, 60],
+    }
+
+
+def test_traces_hold_the_aggregated_points_in_compact_dtypes():
+    fig = charts.line(_rows(), "Year", "Average", color="Player Name", agg="mean")
+
+    assert [trace.name for trace in fig.data] == ["B", "A"]
+    assert fig.data[1].x.dtype == np.int16
+    assert fig.data[1].y.dtype == np.float32
+    np.testing.assert_allclose(fig.data[1].y, [3.5, 6.5])
+    assert all(isinstance(trace, go.Scatter) for trace in fig.data)
+
+
+def test_slim_keeps_only_the_drawn_trace_types():
+    fig = charts.slim(charts.bar(_rows(), "Player Name", "Runs"))
+    payload = json.loads(fig.to_json())
+
+    assert set(payload["layout"].get("template", {}).get("data", {})) <= {"bar"}
+    assert list(fig.data[0].x) == ["B", "A"]
+    assert list(fig.data[0].y) == [90, 120]
@@ -0,0 +1,69 @@
+import io
+
+import pandas as pd
+import pytest
+
+import dataset
+import export
+import identity
+import queries
+import storage
+
+
+def _backend():
+    batting = {
+        str(year): [
+            {"Player Name": f"P{i}", "Year": year, "Matches": 3, "Innings": 3, "Not Outs": 0, "Runs": i * 10 + year % 5,
+             "Balls Faced": 100, "4s": 2, "6s": 1}
+            for i in range(50)
+        ]
+        for year in range(2017, 2022)
+    }
+    registry = identity.PlayerRegistry({f"P{i}": i + 1 for i in range(50)})
+    batting, bowling = dataset.build_tables({"odi": {"batting": batting}, "t20": {"batting": batting}}, registry)
+    return queries.FrameBackend(batting, bowling)
+
+
+def test_history_is_streamed_in_chunks(tmp_path):
+    backend = _backend()
+    db_path = str(tmp_path / "cricket_data.sqlite")
+    storage.build_database(backend.all_rows("batting"), backend.all_rows("bowling"), db_path)
+
+    for source in [backend, queries.SqlBackend(db_path)]:
+        chunks = list(export.history(source, formats=["odi"], start=2018, end=2020, chunk_rows=40))
+        assert [len(chunk) for chunk in chunks] == [40, 40, 40, 30]
+        rows = pd.concat(chunks)
+        assert set(rows["Format"].astype(str)) == {"odi"}
+        assert rows["Year"].between(2018, 2020).all()
+
+
+def test_encoded_chunks_read_back_as_the_whole_export():
+    backend = _backend()
+    expected = next(export.history(backend, formats=["odi"], start=2018, end=2020, chunk_rows=10**6)).reset_index(drop=True)
+
+    csv = b"".join(export.stream(export.history(backend, formats=["odi"], start=2018, end=2020, chunk_rows=40), "csv"))
+    assert pd.read_csv(io.BytesIO(csv))["Player Name"].tolist() == expected["Player Name"].astype(str).tolist()
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    parquet = b"".join(export.stream(export.history(backend, formats=["odi"], start=2018, end=2020, chunk_rows=40), "parquet"))
+    reader = pq.ParquetFile(io.BytesIO(parquet))
+    assert reader.metadata.num_row_groups == 4
+    table = reader.read().to_pandas()
+    assert table["Runs"].tolist() == expected["Runs"].tolist()
+    assert table["Player Name"].tolist() == expected["Player Name"].astype(str).tolist()
+
+
+def test_an_empty_export_still_has_the_header():
+    backend = _backend()
+    csv = b"".join(export.stream(export.history(backend, formats=["test"], chunk_rows=40), "csv"))
+    assert csv.decode("utf-8").strip().split(",") == list(backend.all_rows("batting").columns)
+
+
+def test_bad_parameters_fail_before_any_chunk():
+    backend = _backend()
+    with pytest.raises(ValueError, match="unknown players"):
+        export.open_export(backend, "history", players=["Nobody"])
+    with pytest.raises(ValueError, match="format"):
+        export.open_export(backend, "leaderboard", format_type="odi-women")
+    with pytest.raises(ValueError, match="start"):
+        export.open_export(backend, "sweep", start=2021, end=2019)
@@ -0,0 +1,30 @@
+import numpy as np
+
+import dataset
+import form
+import identity
+
+
+def test_rolling_sum_matches_a_loop():
+    values = np.arange(12, dtype=np.float64).reshape(2, 6) ** 2
+    for window in [1, 2, 3, 6, 8]:
+        expected = [[values[row, max(0, end - window + 1):end + 1].sum() for end in range(6)] for row in range(2)]
+        np.testing.assert_array_equal(form.rolling_sum(values, window), expected)
+
+
+def test_rolling_form_sums_the_trailing_years():
+    batting = {
+        str(year): [{"Player Name": "A", "Year": year, "Matches": 2, "Innings": 2, "Not Outs": 0, "Runs": runs, "Balls Faced": runs * 2}]
+        for year, runs in [(2018, 40), (2019, 60), (2021, 100)]
+    }
+    bowling = {"2019": [{"Player Name": "A", "Year": 2019, "Matches": 2, "Innings": 2, "Overs": 10.0, "Runs": 50, "Wickets": 5}]}
+    batting, bowling = dataset.build_tables({"odi": {"batting": batting, "bowling": bowling}}, identity.PlayerRegistry({"A": 1}))
+
+    rows = form.rolling_form(batting, bowling, 2).set_index("Year")
+
+    assert rows.index.tolist() == [2018, 2019, 2020, 2021]
+    assert rows["Runs"].tolist() == [40, 100, 60, 100]
+    assert rows["Average"].tolist() == [20, 25, 30, 50]
+    assert rows.loc[2020, "Wickets"] == 5
+    assert rows.loc[2020, "Economy Rate"] == 5
+    assert np.isnan(rows.loc[2021, "Wickets"])
@@ -0,0 +1,45 @@
+import dataset
+import identity
+
+
+def _registry(*aliases):
+    return identity.PlayerRegistry({"R Sharma": 1, "RG Sharma": 2, "V Kohli": 3}, list(aliases))
+
+
+def test_unscoped_alias_applies_to_every_row():
+    registry = _registry({"alias": "Virat Kohli", "player": "V Kohli"})
+    resolved = registry.resolve(["Virat Kohli", "Virat Kohli"], ["odi", "test"], [2012, 2020])
+    assert list(resolved) == ["V Kohli", "V Kohli"]
+
+
+def test_format_scoped_alias_only_applies_to_its_format():
+    registry = _registry({"alias": "Rohit Sharma", "player": "R Sharma", "format": "test"})
+    resolved = registry.resolve(["Rohit Sharma", "Rohit Sharma"], ["test", "odi"], [2015, 2015])
+    assert list(resolved) == ["R Sharma", "Rohit Sharma"]
+
+
+def test_from_year_scoped_alias_only_applies_from_that_year():
+    registry = _registry({"alias": "Rohit Sharma", "player": "RG Sharma", "from_year": 2018})
+    resolved = registry.resolve(["Rohit Sharma"] * 3, ["odi"] * 3, [2017, 2018, 2024])
+    assert list(resolved) == ["Rohit Sharma", "RG Sharma", "RG Sharma"]
+
+
+def test_to_year_scoped_alias_only_applies_up_to_that_year():
+    registry = _registry({"alias": "Rohit Sharma", "player": "R Sharma", "to_year": 2013})
+    resolved = registry.resolve(["Rohit Sharma"] * 3, ["odi"] * 3, [2012, 2013, 2014])
+    assert list(resolved) == ["R Sharma", "R Sharma", "Rohit Sharma"]
+
+
+def test_scoped_aliases_split_namesakes_in_the_tables():
+    registry = _registry(
+        {"alias": "Rohit Sharma", "player": "R Sharma", "to_year": 2013},
+        {"alias": "Rohit Sharma", "player": "RG Sharma", "from_year": 2014},
+    )
+    row = {"Player Name": "Rohit Sharma", "Matches": "1", "Innings": "1", "Runs": "10"}
+    data = {"odi": {"batting": {
+        "2013": [dict(row, Year="2013")],
+        "2014": [dict(row, Year="2014")],
+    }}}
+    batting, _ = dataset.build_tables(data, registry)
+    players = dict(zip(batting["Year"].tolist(), batting["Player ID"].tolist()))
+    assert players == {2013: 1, 2014: 2}
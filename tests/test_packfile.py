@@ -0,0 +1,59 @@
+import pytest
+
+import packfile
+
+
+def _data():
+    return {
+        format_type: {
+            style: {str(year): [{"Player Name": f"{format_type}{style}{year}", "Runs": year, "Average": None}] for year in range(2018, 2021)}
+            for style in ["batting", "bowling"]
+        }
+        for format_type in ["odi", "t20"]
+    }
+
+
+def _write(path, payload):
+    with open(path, "wb") as f:
+        f.write(payload)
+    return str(path)
+
+
+def _blocks(path):
+    return {(entry["format"], entry["style"], entry["year"]): block for entry, block in packfile.PackReader(path).iter_blocks()}
+
+
+def test_partial_reads_decode_only_the_selected_partitions(tmp_path):
+    path = _write(tmp_path / "cricket_data.pack", packfile.encode(_data()))
+    reader = packfile.PackReader(path)
+
+    assert reader.read() == {
+        format_type: {style: {year: [{key: value for key, value in row.items() if value is not None} for row in rows]
+                              for year, rows in years.items()} for style, years in styles.items()}
+        for format_type, styles in _data().items()
+    }
+    assert reader.read(["odi"], ["bowling"], [2019]) == {"odi": {"bowling": {"2019": [{"Player Name": "odibowling2019", "Runs": 2019}]}}}
+    assert [entry["year"] for entry, _ in reader.iter_blocks(formats=["t20"], styles=["batting"])] == ["2018", "2019", "2020"]
+
+
+def test_update_copies_the_untouched_blocks(tmp_path):
+    path = _write(tmp_path / "cricket_data.pack", packfile.encode(_data()))
+    before = _blocks(path)
+
+    _write(path, packfile.update(path, {("odi", "batting", 2019): [{"Player Name": "New"}], ("test", "batting", 2019): []}))
+    reader = packfile.PackReader(path)
+    after = _blocks(path)
+
+    assert reader.read(["odi"], ["batting"], [2019])["odi"]["batting"]["2019"] == [{"Player Name": "New"}]
+    assert reader.layout["test"] == ["batting"]
+    assert {key for key in before if before[key] != after[key]} == {("odi", "batting", "2019")}
+
+
+def test_a_corrupt_block_is_detected(tmp_path):
+    payload = bytearray(packfile.encode(_data()))
+    payload[-1] ^= 0xFF
+    reader = packfile.PackReader(_write(tmp_path / "cricket_data.pack", bytes(payload)))
+
+    reader.read(["odi"])
+    with pytest.raises(ValueError, match="corrupt block t20/bowling/2020"):
+        reader.read(["t20"])
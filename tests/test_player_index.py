@@ -0,0 +1,27 @@
+import dataset
+import identity
+from player_index import PlayerIndex, build_player_index
+
+
+def test_search_puts_prefix_matches_before_substring_matches():
+    index = PlayerIndex(["MS Dhoni", "RG Sharma", "Shardul Thakur", "V Kohli", "Washington Sundar"])
+
+    assert index.search("sha") == ["RG Sharma", "Shardul Thakur"]
+    assert index.search("koh") == ["V Kohli"]
+    assert index.search("ton") == ["Washington Sundar"]
+    assert index.search("sha", exclude=["Shardul Thakur"]) == ["RG Sharma"]
+    assert index.search("", limit=2) == ["MS Dhoni", "RG Sharma"]
+
+
+def test_rows_are_the_player_ranges_of_the_sorted_tables():
+    rows = [{"Player Name": name, "Year": year, "Matches": 1, "Innings": 1, "Runs": 10}
+            for year in [2019, 2020] for name in ["B", "A", "C"]]
+    batting, bowling = dataset.build_tables({"odi": {"batting": {"2019": rows[:3], "2020": rows[3:]}}},
+                                            identity.PlayerRegistry({"A": 1, "B": 2, "C": 3}))
+    index = build_player_index(batting, bowling)
+
+    start, stop = index.rows("batting", "B")
+    assert set(batting["Player Name"].iloc[start:stop]) == {"B"}
+    assert stop - start == 2
+    assert index.rows("bowling", "B")[0] == index.rows("bowling", "B")[1]
+    assert index.rows("batting", "Nobody") is None
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import dataset
+import identity
+import queries
+import storage
+
+
+def _tables():
+    batting = {
+        str(year): [
+            {"Player Name": name, "Year": year, "Matches": 3, "Innings": 3, "Not Outs": 1, "Runs": runs + year % 4,
+             "Balls Faced": runs * 2, "Average": (runs + year % 4) / 2, "4s": 2, "6s": 1}
+            for name, runs in [("A", 120), ("B", 90), ("C", 40)]
+        ]
+        for year in range(2018, 2022)
+    }
+    bowling = {
+        str(year): [{"Player Name": "C", "Year": year, "Matches": 3, "Innings": 3, "Overs": 20.0, "Runs": 90,
+                     "Wickets": 6, "Average": 15.0}]
+        for year in range(2018, 2022)
+    }
+    registry = identity.PlayerRegistry({"A": 1, "B": 2, "C": 3})
+    return dataset.build_tables({"odi": {"batting": batting, "bowling": bowling}, "t20": {"batting": batting}}, registry)
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_sql_backends_answer_like_the_memory_backend(tmp_path, engine):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    batting, bowling = _tables()
+    memory = queries.FrameBackend(batting, bowling)
+    db_path = str(tmp_path / f"cricket_data.{engine}")
+    storage.build_database(batting, bowling, db_path, engine)
+    sql = queries.SqlBackend(db_path, engine)
+
+    def plain(frame, sort):
+        frame = frame.sort_values(sort, ignore_index=True)
+        return frame.astype({col: str for col in frame.columns if not pd.api.types.is_numeric_dtype(frame[col])})
+
+    assert sql.years() == memory.years()
+    assert sql.player_names() == memory.player_names()
+    pd.testing.assert_frame_equal(plain(sql.player_rows("batting", "B", 2019, 2020), ["Format", "Year"]),
+                                  plain(memory.player_rows("batting", "B", 2019, 2020), ["Format", "Year"]), check_dtype=False)
+    pd.testing.assert_frame_equal(plain(sql.format_rows("bowling", "odi", 2018, 2021), ["Year"]),
+                                  plain(memory.format_rows("bowling", "odi", 2018, 2021), ["Year"]), check_dtype=False)
+    pd.testing.assert_frame_equal(sql.player_totals("batting", "t20", 2018, 2021, "Runs", 2),
+                                  memory.player_totals("batting", "t20", 2018, 2021, "Runs", 2), check_dtype=False)
+    pd.testing.assert_frame_equal(sql.ranks.table, memory.ranks.table, check_dtype=False, check_index_type=False)
@@ -0,0 +1,28 @@
+import dataset
+import identity
+import ratings
+
+
+def _tables(runs_2012):
+    def rows(year, runs):
+        return [
+            {"Player Name": "A", "Year": year, "Matches": "5", "Innings": "5", "Runs": runs},
+            {"Player Name": "B", "Year": year, "Matches": "5", "Innings": "5", "Runs": "200"},
+        ]
+    data = {"odi": {"batting": {
+        "2012": rows("2012", runs_2012), "2013": rows("2013", "300"), "2014": rows("2014", "250"),
+    }}}
+    return dataset.build_tables(data, identity.PlayerRegistry({"A": 1, "B": 2}))
+
+
+def test_changed_older_year_is_rolled_forward():
+    batting, bowling = _tables("100")
+    history, _ = ratings.refresh_history(ratings.load_history("missing.csv"), batting, bowling)
+
+    batting, bowling = _tables("5100")
+    updated, years = ratings.refresh_history(history, batting, bowling, since=2012)
+    full, _ = ratings.refresh_history(ratings.load_history("missing.csv"), batting, bowling)
+
+    assert years == [2012, 2013, 2014]
+    assert updated.equals(full)
+    assert not updated.equals(history)
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import refresh
+
+
+def test_partition_keys_are_most_recent_first():
+    year = refresh.years()[-1]
+    assert refresh.partition_keys(["t20", "odi"], ["bowling", "batting"], [year - 1, year]) == [
+        f"odi/batting/{year}", f"odi/bowling/{year}", f"t20/batting/{year}", f"t20/bowling/{year}",
+        f"odi/batting/{year - 1}", f"odi/bowling/{year - 1}", f"t20/batting/{year - 1}", f"t20/bowling/{year - 1}",
+    ]
+    with pytest.raises(ValueError, match="women"):
+        refresh.partition_keys(["women"], ["batting"], [year])
+
+
+def test_a_lock_left_by_a_dead_worker_is_taken_over(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert refresh._acquire_lock()
+    assert refresh.worker_pid() == os.getpid()
+    assert not refresh._acquire_lock()
+
+    monkeypatch.setattr(refresh, "_pid_alive", lambda pid: False)
+    assert refresh.worker_pid() is None
+    assert refresh._acquire_lock()
+
+
+def test_the_worker_runs_queued_jobs_oldest_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    left = refresh.enqueue(["odi/batting/2020"])
+    left["status"] = "running"
+    refresh.save_job(left)
+    first = refresh.enqueue(["odi/batting/2021"])
+    second = refresh.enqueue(["t20/batting/2021"])
+    ran = []
+
+    def run_job(job):
+        ran.append(job["id"])
+        job["status"] = "done"
+        refresh.save_job(job)
+        return job
+
+    monkeypatch.setattr(refresh, "run_job", run_job)
+    refresh.work()
+
+    assert ran == [first["id"], second["id"]]
+    assert refresh.load_job(left["id"])["status"] == "failed"
+    assert refresh.worker_pid() is None
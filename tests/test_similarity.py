@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import similarity
+
+
+def _features(count=30):
+    rng = np.random.default_rng(3)
+    features = pd.DataFrame(rng.random((count, len(similarity.FEATURES))) * 50, columns=similarity.FEATURES,
+                            index=pd.Index(np.arange(1, count + 1), name="Player ID"))
+    features.insert(0, "Player Name", [f"P{i}" for i in features.index])
+    features["Innings"] = np.arange(count)
+    return features
+
+
+def test_neighbour_table_matches_a_brute_force_search():
+    _, matrix = similarity.feature_matrix(_features())
+    for metric in ["cosine", "euclidean"]:
+        neighbours, scores = similarity.neighbour_table(matrix, 5, metric)
+        for position in range(len(matrix)):
+            brute = [
+                (float(similarity.pairwise_scores(matrix, matrix[position:position + 1], metric)[0, other]), other)
+                for other in range(len(matrix)) if other != position
+            ]
+            expected = [other for _, other in sorted(brute, key=lambda item: -item[0])[:5]]
+            assert neighbours[position].tolist() == expected
+
+
+def test_similar_players_agree_with_and_without_the_table():
+    features = _features()
+    player_ids, matrix = similarity.feature_matrix(features, min_innings=10)
+    table = similarity.neighbour_table(matrix, 8)
+
+    assert player_ids.tolist() == list(range(11, 31))
+    looked_up = similarity.similar_players(features, player_ids, matrix, 15, k=5, table=table)
+    searched = similarity.similar_players(features, player_ids, matrix, 15, k=5)
+    pd.testing.assert_frame_equal(looked_up, searched, check_dtype=False)
+    assert 15 not in looked_up["Player ID"].tolist()
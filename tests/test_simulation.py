@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+import simulation
+
+
+def _yearly_points():
+    return pd.DataFrame({
+        "Player ID": [1, 1, 1, 2],
+        "Year": [2018, 2020, 2021, 2019],
+        "Total_Points": [10.0, 30.0, 40.0, 5.0],
+    })
+
+
+def test_pools_count_missed_seasons_as_zero():
+    pool, counts = simulation.sample_pools(_yearly_points(), [1, 2, 3])
+
+    assert counts.tolist() == [4, 1, 1]
+    np.testing.assert_array_equal(pool, [[10, 0, 30, 40], [5, 0, 0, 0], [0, 0, 0, 0]])
+
+
+def test_simulated_seasons_do_not_depend_on_the_workers():
+    in_process = simulation.simulate_xi(_yearly_points(), [1, 2], n_sims=25000, seed=7)
+    in_workers = simulation.simulate_xi(_yearly_points(), [1, 2], n_sims=25000, seed=7, workers=2)
+
+    assert in_process.shape == (25000, 2)
+    np.testing.assert_array_equal(in_workers, in_process)
+    assert set(np.unique(in_process[:, 0])) == {0.0, 10.0, 30.0, 40.0}
+    assert set(np.unique(in_process[:, 1])) == {5.0}
@@ -0,0 +1,21 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import dataset
+import identity
+import storage
+
+
+def test_concurrent_rebuilds_use_their_own_temp_files(tmp_path):
+    rows = [{"Player Name": f"P{i}", "Year": 2020, "Matches": 1, "Innings": 1, "Runs": i} for i in range(2000)]
+    batting, bowling = dataset.build_tables({"odi": {"batting": {"2020": rows}}}, identity.PlayerRegistry())
+    db_path = str(tmp_path / "cricket_data.sqlite")
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: storage.build_database(batting, bowling, db_path), range(16)))
+
+    con = sqlite3.connect(db_path)
+    assert con.execute("SELECT COUNT(*) FROM batting").fetchone() == (2000,)
+    con.close()
+    assert os.listdir(tmp_path) == ["cricket_data.sqlite"]
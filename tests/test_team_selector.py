@@ -0,0 +1,29 @@
+import pandas as pd
+
+import team_selector
+
+
+# Twelve batters and bowlers who outscore the two allrounders, and a keeper
+# who would not make the side on points alone
+def _candidates():
+    rows = [(i, f"Batter {i}", 60.0, 5.0, "batter") for i in range(1, 8)]
+    rows += [(i, f"Bowler {i}", 5.0, 60.0, "bowler") for i in range(8, 14)]
+    rows += [(14, "Allrounder 14", 25.0, 25.0, "allrounder"), (15, "Allrounder 15", 22.0, 22.0, "allrounder")]
+    rows += [(16, "Keeper 16", 45.0, 0.0, "batter")]
+    df = pd.DataFrame(rows, columns=["Player ID", "Player Name", "Bat_Points", "Bowl_Points", "Role"])
+    df["Total_Points"] = df["Bat_Points"] + df["Bowl_Points"]
+    return df
+
+
+def test_forced_allrounders_keep_their_role():
+    team = team_selector.TeamModel(_candidates()).solve(min_allrounders=2)[0]
+    roles = dict(zip(team["Player ID"], team["Assigned_Role"]))
+    assert roles[14] == roles[15] == "allrounder"
+    assert (team["Assigned_Role"] == team["Role"]).all()
+
+
+def test_picked_keeper_is_marked():
+    team = team_selector.TeamModel(_candidates()).solve(keepers=(16,))[0]
+    roles = dict(zip(team["Player ID"], team["Assigned_Role"]))
+    assert roles[16] == "wicketkeeper"
+    assert list(team["Assigned_Role"]).count("wicketkeeper") == 1
@@ -0,0 +1,37 @@
+import validation
+
+
+def _data():
+    batting = {
+        str(year): [
+            {"Player Name": "A", "Year": str(year), "Matches": "5", "Innings": "5", "Not Outs": "1", "Runs": "200",
+             "Average": "50.00", "Balls Faced": "250", "Strike Rate": "80.00"},
+            {"Player Name": "B", "Year": str(year), "Matches": "5", "Innings": "4", "Not Outs": "0", "Runs": "100",
+             "Average": "99.00" if year == 2020 else "25.00", "Balls Faced": "100", "Strike Rate": "100.00"},
+        ]
+        for year in range(2018, 2022)
+    }
+    bowling = {"2020": [{"Player Name": "C", "Year": "2020", "Matches": "3", "Innings": "7", "Overs": "10.7",
+                         "Runs": "60", "Wickets": "3"}]}
+    return {"odi": {"batting": batting, "bowling": bowling}, "t20": {"batting": {"2020": batting["2020"]}}}
+
+
+def test_validate_reports_the_failing_partitions():
+    result = validation.validate(_data())
+
+    assert result["partitions"] == 6
+    assert {(report["format"], report["style"], report["year"]) for report in result["reports"]} == {
+        ("odi", "batting", "2020"), ("t20", "batting", "2020"), ("odi", "bowling", "2020"),
+    }
+    assert result["failures"] == {"average": 2, "innings": 1, "overs_balls": 1}
+    odi_batting = next(report for report in result["reports"] if report["format"] == "odi" and report["style"] == "batting")
+    assert odi_batting["examples"] == {"average": ["B"]}
+
+
+def test_worker_processes_give_the_same_reports():
+    in_process = validation.validate(_data(), workers=1)
+    in_workers = validation.validate(_data(), workers=2)
+
+    for result in [in_process, in_workers]:
+        del result["duration_ms"]
+    assert in_workers == in_process
@@ -0,0 +1,79 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import changefeed
+import identity
+import versioning
+
+
+def _data(runs):
+    return {"odi": {"batting": {"2020": [{"Player Name": "A", "Year": 2020, "Runs": runs}]}}}
+
+
+def test_version_is_known_while_the_new_file_is_renamed(tmp_path, monkeypatch):
+    data_file = str(tmp_path / "cricket_data.pack")
+    first = versioning.write_dataset(_data(10), data_file)
+
+    seen = []
+    replace = os.replace
+
+    # The version a reader gets after each file the writer renames
+    def checked_replace(src, dst):
+        replace(src, dst)
+        seen.append(versioning.dataset_version(data_file))
+
+    monkeypatch.setattr(os, "replace", checked_replace)
+    second = versioning.write_dataset(_data(20), data_file)
+
+    assert second != first
+    assert set(seen) <= {first, second}
+    assert versioning.dataset_version(data_file) == second
+
+
+def test_prepare_runs_before_the_version_is_published(tmp_path):
+    data_file = str(tmp_path / "cricket_data.pack")
+    first = versioning.write_dataset(_data(10), data_file)
+
+    seen = []
+    second = versioning.write_dataset(_data(20), data_file, lambda version: seen.append((version, versioning.dataset_version(data_file))))
+
+    assert seen == [(second, first)]
+
+
+def test_a_stale_version_is_loaded_again_once(tmp_path):
+    data_file = str(tmp_path / "cricket_data.pack")
+    version = versioning.write_dataset(_data(10), data_file)
+    loads = []
+
+    def load(version):
+        loads.append(version)
+        return len(loads)
+
+    live = versioning.LiveDataset(data_file, load, stale=lambda value, version: True)
+    assert live.get() == (version, 1)
+    live.get()
+    for _ in range(100):
+        if live.get() == (version, 2):
+            break
+        time.sleep(0.01)
+
+    assert live.get() == (version, 2)
+    assert loads == [version, version]
+
+
+def test_concurrent_writers_use_their_own_temp_files(tmp_path):
+    data_file = str(tmp_path / "cricket_data.pack")
+    registry_file = str(tmp_path / "player_registry.json")
+
+    def write(i):
+        versioning.write_dataset(_data(i), data_file)
+        identity.save_registry(identity.PlayerRegistry({f"P{i}": i}), registry_file)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(write, range(16)))
+
+    assert sorted(os.listdir(tmp_path)) == sorted([
+        "cricket_data.pack", "player_registry.json", versioning.MANIFEST_FILE, changefeed.CHANGES_FILE,
+    ])
+    assert len(identity.load_registry(registry_file).to_dict()["players"]) == 1
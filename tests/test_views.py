@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+import identity
+import queries
+import rankings
+import storage
+import views
+
+
+def _data(runs_2019):
+    batting = {
+        str(year): [
+            {"Player Name": name, "Year": year, "Matches": 3, "Innings": 3, "Runs": runs, "Average": runs / 3}
+            for name, runs in [("A", runs_2019 if year == 2019 else 100), ("B", 80), ("C", 60)]
+        ]
+        for year in range(2017, 2022)
+    }
+    bowling = {
+        str(year): [{"Player Name": "C", "Year": year, "Matches": 3, "Innings": 3, "Overs": 20.0, "Wickets": 6, "Average": 20.0}]
+        for year in range(2017, 2022)
+    }
+    t20 = [{"Player Name": "B", "Year": 2019, "Matches": 2, "Innings": 2, "Runs": 70, "Average": 35.0}]
+    return {"odi": {"batting": batting, "bowling": bowling}, "t20": {"batting": {"2019": t20}}}
+
+
+def _views(data):
+    batting, bowling = dataset.build_tables(data, identity.PlayerRegistry({"A": 1, "B": 2, "C": 3}))
+    names = rankings.player_names(batting, bowling)
+    return batting, bowling, names, views.build_views(batting, bowling, names)
+
+
+def test_updated_views_match_a_full_build():
+    _, _, _, old = _views(_data(100))
+    batting, bowling, names, full = _views(_data(10))
+    updated = old.updated(batting, bowling, names, {("odi", 2019)})
+
+    for style in full.arrays:
+        for name in views.VIEW_ARRAYS:
+            np.testing.assert_array_equal(updated.arrays[style][name], full.arrays[style][name])
+    assert list(updated.top("batting", "odi", 2019, 2019)["Player Name"]) == ["B", "C", "A"]
+    assert list(updated.top("batting", "odi", 2020, 2021)["Player Name"]) == ["A", "B", "C"]
+
+
+def test_query_views_match_the_stored_views(tmp_path):
+    batting, bowling, _, stored = _views(_data(10))
+    db_path = str(tmp_path / "cricket.db")
+    storage.build_database(batting, bowling, db_path)
+    queried = views.QueryViews(queries.SqlBackend(db_path))
+
+    for style in views.VIEW_METRICS:
+        for start, end in [(2019, 2019), (2017, 2021), (2020, 2021)]:
+            pd.testing.assert_frame_equal(queried.top(style, "odi", start, end), stored.top(style, "odi", start, end))
+        pd.testing.assert_frame_equal(queried.contributions(style, "odi", 2019, limit=2),
+                                      stored.contributions(style, "odi", 2019, limit=2), check_dtype=False)
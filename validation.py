@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import dataset
+
+# Machine-readable report written by `python validation.py`
+REPORT_FILE = "validation_report.json"
+# Worker processes checking format and style chunks (1 runs in-process);
+# the checks hold the GIL, so threads would not run them in parallel
+VALIDATION_WORKERS = int(os.environ.get("CRICKET_VALIDATION_WORKERS", "1"))
+# Player names listed per failed check
+MAX_EXAMPLES = 5
+# Placeholders Cricinfo prints for a value that does not apply, e.g. every
+# stat of a player who did not bat
+PLACEHOLDERS = {"-", ""}
+REQUIRED_COLUMNS = ["Player Name", "Matches"]
+
+
+# Numeric columns of the rows, plus a mask of cells that held something
+# other than a number or a placeholder
+def _numeric_frame(raw, style):
+    numeric = {}
+    unparsed = pd.Series(False, index=raw.index)
+    for col in dataset.NUMERIC_COLUMNS[style]:
+        if col not in raw.columns:
+            numeric[col] = pd.Series(np.nan, index=raw.index)
+            continue
+        values = pd.to_numeric(raw[col], errors="coerce")
+        placeholder = raw[col].isna() | raw[col].isin(PLACEHOLDERS)
+        unparsed |= values.isna() & ~placeholder
+        numeric[col] = values.astype(float)
+    return pd.DataFrame(numeric), unparsed
+
+
+# Reported value differs from the one recomputed from the counts by more
+# than its printed precision
+def _mismatch(reported, expected, tolerance):
+    return reported.notna() & np.isfinite(expected) & ((reported - expected).abs() > tolerance)
+
+
+def _batting_checks(raw, values):
+    dismissals = values["Innings"] - values["Not Outs"].fillna(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = values["Runs"] / dismissals.where(dismissals > 0)
+        strike_rate = values["Runs"] / values["Balls Faced"].where(values["Balls Faced"] > 0) * 100
+    high_score = raw["High Score"] if "High Score" in raw.columns else pd.Series(None, index=raw.index, dtype=object)
+    high_score = pd.to_numeric(high_score.astype(str).str.rstrip("*"), errors="coerce")
+    return {
+        "average": _mismatch(values["Average"], average, 0.01),
+        "strike_rate": _mismatch(values["Strike Rate"], strike_rate, 0.01),
+        "not_outs": values["Not Outs"] > values["Innings"],
+        "hundreds_fifties": values["100s"].fillna(0) + values["50s"].fillna(0) > values["Innings"],
+        "ducks": values["Ducks"] > values["Innings"],
+        "high_score": high_score > values["Runs"],
+    }
+
+
+def _bowling_checks(raw, values):
+    overs = values["Overs"]
+    balls = dataset.overs_to_float(overs).where(overs.notna()) * 6
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wickets = values["Wickets"].where(values["Wickets"] > 0)
+        average = values["Runs"] / wickets
+        strike_rate = balls / wickets
+        economy = values["Runs"] / (balls / 6).where(balls > 0)
+    return {
+        "average": _mismatch(values["Average"], average, 0.01),
+        "strike_rate": _mismatch(values["Strike Rate"], strike_rate, 0.1),
+        "economy": _mismatch(values["Economy Rate"], economy, 0.01),
+        "overs_balls": overs.notna() & (np.round((overs - np.floor(overs)) * 10) > 5),
+        "maidens": values["Maidens"] > np.floor(overs),
+        "hauls": values["4 Wicket Hauls"].fillna(0) + values["5 Wicket Hauls"].fillna(0) > values["Innings"],
+        "ten_wickets": values["10 Wicket Hauls"] > values["Matches"],
+    }
+
+
+# Failed-row masks per check over rows of one format and style, from any
+# number of partitions; `years` is each row's partition year
+def _check_rows(raw, style, format_type, years):
+    values, unparsed = _numeric_frame(raw, style)
+    names = raw["Player Name"] if "Player Name" in raw.columns else pd.Series(None, index=raw.index, dtype=object)
+    present = [raw[col].notna() & ~raw[col].isin(PLACEHOLDERS) if col in raw.columns
+               else pd.Series(False, index=raw.index) for col in REQUIRED_COLUMNS]
+    checks = {
+        "missing_columns": ~np.logical_and.reduce(present),
+        "unparsed": unparsed,
+        # Stats without innings are what a shifted row looks like
+        "shifted": values["Innings"].isna() & values["Runs"].notna(),
+        "duplicate_player": pd.Series(list(zip(years, names)), index=raw.index).duplicated(keep=False),
+        "year": values["Year"].notna() & (values["Year"] != years),
+        "innings": values["Innings"] > values["Matches"] * (2 if format_type == "test" else 1),
+    }
+    checks.update(_batting_checks(raw, values) if style == "batting" else _bowling_checks(raw, values))
+    return checks
+
+
+# Reports for the partitions of one format and style, all checked in one
+# vectorized pass and then split by partition
+def _validate_chunk(format_type, style, year_rows):
+    reports = {
+        year: {"format": format_type, "style": style, "year": str(year), "rows": len(rows), "failures": {}, "examples": {}}
+        for year, rows in year_rows.items()
+    }
+    rows = [row for year_list in year_rows.values() for row in year_list]
+    if not rows:
+        return list(reports.values())
+    raw = pd.DataFrame(rows)
+    years = np.repeat([int(year) for year in year_rows], [len(year_list) for year_list in year_rows.values()])
+    partition_keys = np.repeat(list(year_rows), [len(year_list) for year_list in year_rows.values()])
+    names = raw["Player Name"].astype(str) if "Player Name" in raw.columns else pd.Series("?", index=raw.index)
+
+    for name, failed in _check_rows(raw, style, format_type, years).items():
+        failed = np.asarray(pd.Series(failed).fillna(False), dtype=bool)
+        if not failed.any():
+            continue
+        for year in pd.unique(partition_keys[failed]):
+            in_partition = failed & (partition_keys == year)
+            reports[year]["failures"][name] = int(in_partition.sum())
+            reports[year]["examples"][name] = names[in_partition].head(MAX_EXAMPLES).tolist()
+    return list(reports.values())
+
+
+# Report for one partition's rows
+def validate_partition(format_type, style, year, rows):
+    return _validate_chunk(format_type, style, {str(year): rows})[0]
+
+
+# Reports for every partition of the nested data, with totals per check.
+# Each format and style is checked in one vectorized pass; with more than
+# one worker those passes run in separate processes.
+def validate(data, workers=VALIDATION_WORKERS):
+    chunks = [
+        (format_type, style, {str(year): rows for year, rows in years.items()})
+        for format_type, styles in data.items()
+        for style, years in styles.items()
+    ]
+    started = time.perf_counter()
+    args = [list(values) for values in zip(*chunks)] or [[], [], []]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_validate_chunk, *args))
+    else:
+        results = list(map(_validate_chunk, *args))
+    reports = [report for chunk in results for report in chunk]
+    totals = {}
+    for report in reports:
+        for name, count in report["failures"].items():
+            totals[name] = totals.get(name, 0) + count
+    return {
+        "partitions": len(reports),
+        "rows": sum(report["rows"] for report in reports),
+        "failed_partitions": sum(bool(report["failures"]) for report in reports),
+        "failures": totals,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "reports": [report for report in reports if report["failures"]],
+    }
+
+
+# One line per failed partition, for console output
+def summary_lines(result):
+    lines = [f"Validated {result['rows']} rows in {result['partitions']} partitions: "
+             f"{result['failed_partitions']} with failures ({result['duration_ms']} ms)"]
+    for report in result["reports"]:
+        failures = ", ".join(f"{name} x{count}" for name, count in report["failures"].items())
+        lines.append(f"  {report['format']} {report['style']} {report['year']}: {failures}")
+    return lines
+
+
+def save_report(result, report_file=REPORT_FILE):
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=4)
+
+
+def main():
+    result = validate(dataset.read_data(dataset.default_data_file()))
+    save_report(result)
+    if "--json" in sys.argv:
+        print(json.dumps(result, indent=4))
+    else:
+        print("\n".join(summary_lines(result)))
+        print(f"Report saved to {REPORT_FILE}")
+    sys.exit(1 if result["failed_partitions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
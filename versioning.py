@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import changefeed
+import packfile
+
+logger = logging.getLogger("cricket.versioning")
+
+MANIFEST_FILE = "dataset_manifest.json"
+
+
+def manifest_path(data_file):
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), MANIFEST_FILE)
+
+
+# Payload written to a temp file of its own next to `path`, so concurrent
+# writers never share one; mkstemp's owner-only mode is widened to what a
+# plain open() would usually give
+def _write_temp(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def write_atomic(path, payload):
+    os.replace(_write_temp(path, payload), path)
+
+
+def read_manifest(data_file):
+    try:
+        with open(manifest_path(data_file), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Write the dataset through a temp file and rename, so readers only ever see
+# a complete file, and record its version in the manifest and the change
+# feed. The version is a hash of the content. The manifest is written before
+# the rename with the stats of the temp file, which the rename keeps, and
+# those of the file it replaces, so a reader between the two still gets the
+# right version. `changes` are the feed entries against the file being
+# replaced, or None when they are unknown. `prepare(version)`, when given,
+# writes files derived from the new version before it is published, so
+# readers that see the version find them already in place.
+def _commit(payload, data_file, changes=None, prepare=None):
+    version = hashlib.sha256(payload).hexdigest()[:12]
+    previous = dataset_version(data_file) if os.path.exists(data_file) else None
+    if prepare is not None:
+        prepare(version)
+
+    tmp_path = _write_temp(data_file, payload)
+    stat = os.stat(tmp_path)
+    manifest = {
+        "file": os.path.basename(data_file),
+        "version": version,
+        "previous": previous,
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "written_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    if previous is not None:
+        old = os.stat(data_file)
+        manifest["replaces"] = {"version": previous, "bytes": old.st_size, "mtime_ns": old.st_mtime_ns}
+    write_atomic(manifest_path(data_file), json.dumps(manifest, indent=4).encode("utf-8"))
+    os.replace(tmp_path, data_file)
+    if version != previous:
+        changefeed.record(data_file, version, previous, changes if previous else None)
+    return version
+
+
+# Nested {format: {style: {year: rows}}} data as {(format, style, year): rows}
+def _flatten(data):
+    return {
+        (format_type, style, str(year)): rows
+        for format_type, styles in data.items()
+        for style, years in styles.items()
+        for year, rows in years.items()
+    }
+
+
+def write_dataset(data, data_file, prepare=None):
+    if data_file.endswith(".pack"):
+        payload = packfile.encode(data)
+        changes = None
+        if os.path.exists(data_file):
+            changes = changefeed.diff_partitions(_flatten(packfile.PackReader(data_file).read()), _flatten(data))
+    else:
+        payload = json.dumps(data, indent=4).encode("utf-8")
+        changes = None
+    return _commit(payload, data_file, changes, prepare)
+
+
+# Replace or add some {(format, style, year): rows} partitions of a packed
+# dataset as one new version; the other partitions are carried over as is
+def write_partitions(partitions, data_file):
+    partitions = {(format_type, style, str(year)): rows for (format_type, style, year), rows in partitions.items()}
+    old = {}
+    if os.path.exists(data_file):
+        reader = packfile.PackReader(data_file)
+        for format_type, style, year in partitions:
+            old.update(_flatten(reader.read([format_type], [style], [year])))
+    changes = changefeed.diff_partitions(old, partitions)
+    return _commit(packfile.update(data_file, partitions), data_file, changes)
+
+
+# Current version of a dataset file from two stats and the small manifest:
+# the version written, or the one it replaces while the new file is being
+# renamed into place. A file changed without going through write_dataset
+# gets a version made from its size and modification time instead.
+def dataset_version(data_file):
+    stat = os.stat(data_file)
+    manifest = read_manifest(data_file)
+    if manifest and manifest.get("file") == os.path.basename(data_file):
+        for entry in [manifest, manifest.get("replaces") or {}]:
+            if (entry.get("bytes"), entry.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+                return entry["version"]
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+# One loaded dataset version shared by every reader. The first call loads
+# synchronously; after that a new version on disk is loaded on a background
+# thread while the current one keeps serving, and swapped in when ready.
+# `update(value, version)`, when given, is tried first to move the current
+# value forward incrementally; it returns None to fall back to a full load.
+# `stale(value, version)`, when given, says whether the current version is
+# worth loading again because files derived from it appeared after it was
+# loaded; each version is loaded again at most once.
+class LiveDataset:
+    def __init__(self, data_file, load, update=None, stale=None):
+        self.data_file = data_file
+        self.load = load
+        self.update = update
+        self.stale = stale
+        self.version = None
+        self.value = None
+        self.loading = None
+        self.reloaded = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = dataset_version(self.data_file)
+        with self._lock:
+            if self.value is None:
+                self.version, self.value = version, self.load(version)
+            elif version != self.version and version != self.loading:
+                self.loading = version
+                threading.Thread(target=self._warm, args=(version,), daemon=True).start()
+            elif (version == self.version and self.loading is None and self.reloaded != version
+                  and self.stale and self.stale(self.value, version)):
+                self.loading = self.reloaded = version
+                threading.Thread(target=self._warm, args=(version,), daemon=True).start()
+            return self.version, self.value
+
+    def _warm(self, version):
+        started = time.perf_counter()
+        with self._lock:
+            current = self.value
+            reload = version == self.version
+        try:
+            value = self.update(current, version) if self.update and not reload else None
+            incremental = value is not None
+            if value is None:
+                value = self.load(version)
+        except Exception:
+            logger.exception("loading dataset version %s failed", version)
+            with self._lock:
+                if self.loading == version:
+                    self.loading = None
+            return
+        with self._lock:
+            # A newer version may have started warming meanwhile; it wins
+            if self.loading != version:
+                return
+            self.version, self.value, self.loading = version, value, None
+        logger.info(json.dumps({"dataset_version": version, "incremental": incremental,
+                                "warm_ms": round((time.perf_counter() - started) * 1000, 2)}))
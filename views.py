@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import dataset
+
+# Summed metric shown per style on the Format Wise and Year Wise pages
+VIEW_METRICS = {"batting": "Runs", "bowling": "Wickets"}
+# Players kept per span
+TOP_N = 5
+VIEW_ARRAYS = ["ids", "values", "averages", "totals"]
+
+
+# Top players of every format and (start, end) year span, precomputed once
+# per dataset version. Per style the arrays are (format, span, rank) for the
+# player IDs (-1 when fewer players played), their metric sums and mean
+# Average, plus the (format, span) metric total. Spans are numbered like
+# np.triu_indices over the years, so single years are the diagonal.
+class SpanViews:
+    def __init__(self, years, arrays, names):
+        self.years = list(years)
+        self.arrays = arrays
+        self.names = names
+        starts, ends = np.triu_indices(len(self.years))
+        self.spans = {(self.years[start], self.years[end]): i for i, (start, end) in enumerate(zip(starts, ends))}
+
+    def _lookup(self, style, format_type, start_year, end_year):
+        span = self.spans.get((int(start_year), int(end_year)))
+        if span is None or format_type not in dataset.FORMATS:
+            return None
+        position = dataset.FORMATS.index(format_type)
+        return {name: values[position, span] for name, values in self.arrays[style].items()}
+
+    # Top players by the style's metric with their mean Average, as
+    # QueryViews.top gets them from the query backend
+    def top(self, style, format_type, start_year, end_year, limit=TOP_N):
+        metric = VIEW_METRICS[style]
+        view = self._lookup(style, format_type, start_year, end_year)
+        if view is None:
+            return pd.DataFrame(columns=["Player Name", metric, "Average"])
+        played = view["ids"][:limit] >= 0
+        return pd.DataFrame({
+            "Player Name": [self.names.get(player_id) for player_id in view["ids"][:limit][played]],
+            metric: view["values"][:limit][played],
+            "Average": view["averages"][:limit][played],
+        })
+
+    # Top players of one year with everyone else summed into an "Others" row
+    def contributions(self, style, format_type, year, limit=TOP_N):
+        metric = VIEW_METRICS[style]
+        top = self.top(style, format_type, year, year, limit)[["Player Name", metric]]
+        view = self._lookup(style, format_type, year, year)
+        total = view["totals"] if view is not None else 0
+        others = pd.DataFrame({"Player Name": ["Others"], metric: [total - top[metric].sum()]})
+        return pd.concat([top, others], ignore_index=True)
+
+
+    # Views for new tables that differ only in the given (format, year)
+    # cells: spans covering none of them are carried over, the others are
+    # built again
+    def updated(self, batting, bowling, names, cells):
+        tables = {"batting": batting, "bowling": bowling}
+        years = _years(tables)
+        if years != self.years or any(year not in years for _, year in cells):
+            return build_views(batting, bowling, names)
+        starts, ends = np.triu_indices(len(years))
+        arrays = {style: {name: np.array(values) for name, values in self.arrays[style].items()} for style in tables}
+        for format_type in sorted({format_type for format_type, _ in cells}):
+            changed = np.array([years.index(year) for cell_format, year in cells if cell_format == format_type])
+            covering = ((starts[:, None] <= changed) & (changed <= ends[:, None])).any(axis=1)
+            position = dataset.FORMATS.index(format_type)
+            for style, table in tables.items():
+                fresh = _span_arrays(table, style, years, [format_type], starts[covering], ends[covering])
+                for name, values in fresh.items():
+                    arrays[style][name][position, covering] = values[0]
+        return SpanViews(years, arrays, names)
+
+
+# The same views answered by aggregate queries on a backend, for a SQL
+# backend whose dataset version has no stored views: each lookup is one
+# grouped query, and no rows are loaded into memory
+class QueryViews:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def top(self, style, format_type, start_year, end_year, limit=TOP_N):
+        metric = VIEW_METRICS[style]
+        totals = self.backend.player_totals(style, format_type, start_year, end_year, metric, limit)
+        return totals[["Player Name", metric, "Average"]].astype({metric: np.int32, "Average": np.float32})
+
+    def contributions(self, style, format_type, year, limit=TOP_N):
+        metric = VIEW_METRICS[style]
+        totals = self.backend.player_totals(style, format_type, year, year, metric)
+        top = totals[["Player Name", metric]].head(limit).astype({metric: np.int32})
+        others = pd.DataFrame({"Player Name": ["Others"], metric: [int(totals[metric].sum()) - top[metric].sum()]})
+        return pd.concat([top, others], ignore_index=True)
+
+
+def _years(tables):
+    all_years = np.concatenate([table["Year"].to_numpy() for table in tables.values()])
+    return list(range(int(all_years.min()), int(all_years.max()) + 1)) if len(all_years) else []
+
+
+# View arrays of one style for some formats and (start, end) spans, as
+# positions into `years`: per (format, player, year) sums are cumulated over
+# the years so every span is a difference of two prefix sums, then the
+# players of all spans are ranked in one sort
+def _span_arrays(table, style, years, formats, starts, ends):
+    player_ids, players = np.unique(table["Player ID"].to_numpy(), return_inverse=True)
+    rows = table["Format"].astype(str).isin(formats).to_numpy()
+    players = players[rows]
+    format_positions = pd.Index(formats).get_indexer(table["Format"].astype(str)[rows])
+    year_positions = table["Year"].to_numpy()[rows].astype(int) - (years[0] if years else 0)
+    averages = table["Average"].to_numpy(dtype=np.float64)[rows]
+    averaged = ~np.isnan(averages)
+
+    shape = (len(formats), len(player_ids), len(years))
+    sums = {name: np.zeros(shape) for name in ["values", "average_sums", "average_counts", "rows"]}
+    cell = (format_positions, players, year_positions)
+    np.add.at(sums["values"], cell, table[VIEW_METRICS[style]].to_numpy(dtype=np.float64)[rows])
+    np.add.at(sums["average_sums"], cell, np.where(averaged, averages, 0))
+    np.add.at(sums["average_counts"], cell, averaged)
+    np.add.at(sums["rows"], cell, 1)
+
+    spans = {}
+    for name, values in sums.items():
+        cumulative = np.concatenate([np.zeros(shape[:2] + (1,)), np.cumsum(values, axis=2)], axis=2)
+        spans[name] = (cumulative[:, :, ends + 1] - cumulative[:, :, starts]).transpose(0, 2, 1)
+
+    # Players are in ID order, so a stable sort breaks ties by ID
+    ranked = np.where(spans["rows"] > 0, spans["values"], -np.inf)
+    order = np.argsort(-ranked, axis=2, kind="stable")[:, :, :TOP_N]
+    played = np.take_along_axis(spans["rows"], order, axis=2) > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_averages = spans["average_sums"] / spans["average_counts"]
+    return {
+        "ids": np.where(played, player_ids[order], -1).astype(np.int32),
+        "values": np.take_along_axis(spans["values"], order, axis=2).astype(np.int32),
+        "averages": np.take_along_axis(mean_averages, order, axis=2).astype(np.float32),
+        "totals": spans["values"].sum(axis=2).astype(np.int64),
+    }
+
+
+# Views of every format and span for the typed tables
+def build_views(batting, bowling, names):
+    tables = {"batting": batting, "bowling": bowling}
+    years = _years(tables)
+    starts, ends = np.triu_indices(len(years))
+    arrays = {style: _span_arrays(table, style, years, dataset.FORMATS, starts, ends) for style, table in tables.items()}
+    return SpanViews(years, arrays, names)
+
+
+# Save the view arrays as .npy files; returns the metadata load_views needs,
+# with the names of the players that appear in any view
+def save_views(views, directory):
+    player_ids = set()
+    for style, arrays in views.arrays.items():
+        for name in VIEW_ARRAYS:
+            np.save(os.path.join(directory, f"views.{style}.{name}.npy"), arrays[name])
+        player_ids.update(int(player_id) for player_id in np.unique(arrays["ids"]) if player_id >= 0)
+    return {"years": views.years, "names": {str(player_id): views.names[player_id] for player_id in sorted(player_ids)}}
+
+
+def load_views(directory, meta, load=np.load):
+    arrays = {
+        style: {name: load(os.path.join(directory, f"views.{style}.{name}.npy")) for name in VIEW_ARRAYS}
+        for style in VIEW_METRICS
+    }
+    return SpanViews(meta["years"], arrays, {int(player_id): name for player_id, name in meta["names"].items()})